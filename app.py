@@ -3,17 +3,27 @@
 Upload invoice PDFs → watch live progress → view results in accordions → download JSON.
 """
 
-import io
+import hashlib
 import json
 import os
+import queue
+import re
 import tempfile
-import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable, Iterator
 
-import pandas as pd
 import streamlit as st
 
+try:
+    import orjson  # type: ignore[import-untyped]
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 # ── Page config ──────────────────────────────────────────────────────────────
 st.set_page_config(
     page_title="Invoice Analysis Pipeline",
@@ -23,8 +33,13 @@ st.set_page_config(
 )
 
 # ── Load API key from Streamlit secrets or .env ──────────────────────────────
+@st.cache_resource(show_spinner=False)
 def _load_default_api_key() -> str:
-    """Get the default GEMINI_API_KEY from Streamlit secrets or .env."""
+    """Get the default GEMINI_API_KEY from Streamlit secrets or .env.
+
+    Resolved once per server process, so reruns skip the secrets lookup and
+    ``.env`` read (and a user's override never becomes the default).
+    """
     # 1) Already in environment
     key = os.environ.get("GEMINI_API_KEY", "")
     if key:
@@ -73,13 +88,23 @@ with st.sidebar:
 _active_key = user_key.strip() if user_key else _default_key
 if _active_key:
     os.environ["GEMINI_API_KEY"] = _active_key
+# Every Gemini key starts "AIzaSy", so a prefix can't tell keys apart; cache
+# entries are keyed on a digest of the whole key instead.
+_key_digest = hashlib.sha256(_active_key.encode("utf-8")).hexdigest()
 
 
-# ── Custom CSS ───────────────────────────────────────────────────────────────
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
+# ── Pipeline import (once per server process) ────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def _get_pipeline() -> Callable[..., dict[str, Any] | None]:
+    """Import the pipeline once so its dependencies load while the landing page renders."""
+    from invoice_uom.pipeline import process_pdf
+    return process_pdf
+
+process_pdf = _get_pipeline()
 
+
+# ── Custom CSS ───────────────────────────────────────────────────────────────
+_RAW_CSS = """
     html, body, .stApp { font-family: 'Inter', sans-serif; }
     .block-container { padding-top: 1.5rem; max-width: 1100px; }
 
@@ -126,8 +151,28 @@ st.markdown("""
 
     /* Footer */
     .footer { text-align: center; padding: 2rem 0 1rem; color: #a0aec0; font-size: 0.82rem; }
-</style>
-""", unsafe_allow_html=True)
+"""
+
+# Font stylesheet is preloaded and applied non-blocking (media swap)
+# instead of a render-blocking CSS @import
+_FONT_CSS_URL = "https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap"
+_FONT_LINKS = (
+    '<link rel="preconnect" href="https://fonts.googleapis.com">'
+    '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+    f'<link rel="preload" as="style" href="{_FONT_CSS_URL}">'
+    f'<link rel="stylesheet" href="{_FONT_CSS_URL}" media="print" onload="this.media=\'all\'">'
+)
+
+
+@st.cache_resource(show_spinner=False)
+def _css() -> str:
+    """Minified ``<style>`` block plus font links, built once per server process."""
+    css = re.sub(r"/\*.*?\*/", "", _RAW_CSS, flags=re.S)
+    css = re.sub(r"\s+", " ", css).strip()
+    return f"{_FONT_LINKS}<style>{css}</style>"
+
+
+st.markdown(_css(), unsafe_allow_html=True)
 
 
 # ── Header ───────────────────────────────────────────────────────────────────
@@ -149,43 +194,177 @@ uploaded_files = st.file_uploader(
 
 
 # ── Processing function ─────────────────────────────────────────────────────
-def run_pipeline(uploaded_file: Any) -> tuple[dict[str, Any] | None, list[str]]:
-    """Process an uploaded PDF. Returns (result, log_messages)."""
-    from invoice_uom.pipeline import process_pdf
-
+_MAX_WORKERS = min(os.cpu_count() or 1, 4)
+_TOTAL_STEPS = 5
+_STATUS_INTERVAL = 0.1  # repaint progress bars at most ~10 times a second
+_MAX_SESSION_RESULTS = 16
+
+
+class _PipelineFailed(Exception):
+    """Raised inside the cached runner so failed runs are never memoised."""
+
+    def __init__(self, log_messages: list[str]) -> None:
+        super().__init__("pipeline failed")
+        self.log_messages = log_messages
+
+
+@st.cache_data(show_spinner=False, max_entries=32, ttl=3600)
+def _cached_process(
+    digest: str,
+    key_digest: str,
+    filename: str,
+    _upload: Any,
+    _status_cb: Callable[[str], None] | None = None,
+) -> tuple[dict[str, Any], list[str]]:
+    """Run the pipeline on the *_upload* file, memoised on its SHA-256 *digest*.
+
+    *key_digest* (SHA-256 of the active API key) is part of the cache key so
+    switching keys forces a fresh run.  Underscore-prefixed arguments are not
+    hashed by Streamlit.
+    """
     log_messages: list[str] = []
 
+    def _status(msg: str) -> None:
+        log_messages.append(msg)
+        if _status_cb:
+            _status_cb(msg)
+
     with tempfile.TemporaryDirectory() as tmp_dir:
-        tmp_path = Path(tmp_dir) / uploaded_file.name
-        tmp_path.write_bytes(uploaded_file.getvalue())
+        tmp_path = Path(tmp_dir) / filename
+        with _upload.getbuffer() as buf, open(tmp_path, "wb") as fh:
+            fh.write(buf)
         output_dir = Path(tmp_dir) / "out"
         failed_dir = Path(tmp_dir) / "failed"
 
-        # Progress bar
-        progress_bar = st.progress(0, text="Initialising pipeline...")
-        total_steps = 5
-
-        def _status_cb(msg: str) -> None:
-            log_messages.append(msg)
-            pct = min(int(len(log_messages) / total_steps * 100), 95)
-            progress_bar.progress(pct, text=msg)
-
         try:
             result = process_pdf(
                 pdf_path=tmp_path,
                 output_dir=output_dir,
                 failed_dir=failed_dir,
                 force=True,
-                status_cb=_status_cb,
+                status_cb=_status,
             )
-            progress_bar.progress(100, text="✅ Processing complete!")
-            time.sleep(0.5)
-            progress_bar.empty()
-            return result, log_messages
         except Exception as exc:
-            progress_bar.progress(100, text="❌ Error occurred")
             log_messages.append(f"ERROR: {exc}")
-            return None, log_messages
+            raise _PipelineFailed(log_messages) from exc
+        if result is None:
+            raise _PipelineFailed(log_messages)
+        return result, log_messages
+
+
+def _upload_digest(uploaded_file: Any) -> str:
+    """SHA-256 of an upload, hashed straight from its in-memory buffer."""
+    with uploaded_file.getbuffer() as buf:
+        return hashlib.sha256(buf).hexdigest()
+
+
+def run_pipeline(
+    uploaded_file: Any,
+    digest: str,
+    status_cb: Callable[[str], None] | None = None,
+) -> tuple[dict[str, Any] | None, list[str]]:
+    """Process an uploaded PDF. Returns (result, log_messages).
+
+    Runs on a worker thread, so it must not touch Streamlit widgets –
+    progress is reported through *status_cb* and rendered by the main thread.
+    Reruns on the same bytes are served from the ``st.cache_data`` cache;
+    the logged status messages are replayed through *status_cb* on a hit.
+    """
+    ran = False
+
+    def _status(msg: str) -> None:
+        nonlocal ran
+        ran = True
+        if status_cb:
+            status_cb(msg)
+
+    try:
+        result, log_messages = _cached_process(
+            digest, _key_digest, uploaded_file.name, uploaded_file, _status,
+        )
+    except _PipelineFailed as exc:
+        return None, exc.log_messages
+    if not ran and status_cb:
+        for msg in log_messages:
+            status_cb(msg)
+    return result, log_messages
+
+
+_TABLE_COLUMNS = [
+    "#", "Description", "MPN", "Original UOM", "Pack Qty",
+    "Base UOM", "Price/Base Unit", "Confidence", "Escalation",
+]
+
+
+@st.cache_resource(show_spinner=False)
+def _get_dataframe_libs() -> tuple[Any, Any]:
+    """Import numpy/pandas on first render rather than at app start-up."""
+    import numpy as np
+    import pandas as pd
+    return np, pd
+
+
+@st.cache_data(show_spinner=False)
+def _prepare_render(
+    filename: str, result: dict[str, Any],
+) -> tuple["pd.DataFrame", bytes, bytes, float, str, list[dict[str, Any]]]:
+    """Pure computation behind ``render_results``, cached across reruns.
+
+    Returns ``(df, csv_bytes, json_bytes, avg_conf, conf_class, escalated_items)``.
+    """
+    np, pd = _get_dataframe_libs()
+    items = result.get("line_items", [])
+
+    scores = np.fromiter(
+        (c for i in items if isinstance(c := i.get("confidence_score"), (int, float))),
+        dtype=np.float64,
+    )
+    avg_conf = float(scores.mean()) if scores.size else 0.0
+    conf_class = "green" if avg_conf >= 0.7 else "yellow" if avg_conf >= 0.4 else "red"
+
+    escalated_items: list[dict[str, Any]] = []
+
+    def _rows() -> Iterator[tuple[Any, ...]]:
+        for i, item in enumerate(items, 1):
+            conf = item.get("confidence_score", 0)
+            pack_qty = item.get("detected_pack_quantity")
+            escalated = bool(item.get("escalation_flag", False))
+            if escalated:
+                escalated_items.append(item)
+            yield (
+                i,
+                item.get("item_description", ""),
+                item.get("manufacturer_part_number") or "—",
+                item.get("original_uom") or "—",
+                str(pack_qty) if pack_qty is not None else "—",
+                item.get("canonical_base_uom") or "—",
+                item.get("price_per_base_unit"),
+                conf * 100 if isinstance(conf, (int, float)) else None,
+                "🚩 Yes" if escalated else "✅ No",
+            )
+
+    # Explicit columns + nrows let pandas consume the generator without an
+    # intermediate list of rows
+    df = pd.DataFrame.from_records(
+        _rows(), columns=_TABLE_COLUMNS, nrows=len(items),
+    ).astype({"Price/Base Unit": "Float64", "Confidence": "Float64"})
+
+    # The table keeps numeric columns so they sort and format in the UI; the
+    # CSV download keeps its established "$1.2345" / "85%" / "—" text format.
+    csv_df = df.assign(**{
+        "Price/Base Unit": df["Price/Base Unit"].map(
+            lambda v: f"${v:.4f}", na_action="ignore",
+        ).astype(object).fillna("—"),
+        "Confidence": df["Confidence"].map(
+            lambda v: f"{v:.0f}%", na_action="ignore",
+        ).astype(object).fillna("—"),
+    })
+    csv_bytes = csv_df.to_csv(index=False).encode("utf-8")
+    if _HAS_ORJSON:
+        json_bytes = orjson.dumps(result, default=str, option=orjson.OPT_INDENT_2)
+    else:
+        json_bytes = json.dumps(result, indent=2, default=str).encode("utf-8")
+    return df, csv_bytes, json_bytes, avg_conf, conf_class, escalated_items
 
 
 def render_results(result: dict[str, Any], filename: str, log_messages: list[str]) -> None:
@@ -208,11 +387,7 @@ def render_results(result: dict[str, Any], filename: str, log_messages: list[str
     """, unsafe_allow_html=True)
 
     # ── Metrics row ───────────────────────────────────────────────────
-    avg_conf = 0.0
-    if items:
-        scores = [i.get("confidence_score", 0) for i in items if isinstance(i.get("confidence_score"), (int, float))]
-        avg_conf = sum(scores) / len(scores) if scores else 0
-    conf_class = "green" if avg_conf >= 0.7 else "yellow" if avg_conf >= 0.4 else "red"
+    df, csv_bytes, json_bytes, avg_conf, conf_class, escalated_items = _prepare_render(filename, result)
 
     c1, c2, c3 = st.columns(3)
     with c1:
@@ -227,39 +402,23 @@ def render_results(result: dict[str, Any], filename: str, log_messages: list[str
     # ── Line items table ──────────────────────────────────────────────
     if items:
         with st.expander(f"📋 **Line Items Table** ({num_items} items)", expanded=True):
-            rows = []
-            for i, item in enumerate(items, 1):
-                conf = item.get("confidence_score", 0)
-                escalation = item.get("escalation_flag", False)
-                row = {
-                    "#": i,
-                    "Description": item.get("item_description", ""),
-                    "MPN": item.get("manufacturer_part_number") or "—",
-                    "Original UOM": item.get("original_uom") or "—",
-                    "Pack Qty": str(item.get("detected_pack_quantity")) if item.get("detected_pack_quantity") is not None else "—",
-                    "Base UOM": item.get("canonical_base_uom") or "—",
-                    "Price/Base Unit": f"${item['price_per_base_unit']:.4f}" if item.get("price_per_base_unit") is not None else "—",
-                    "Confidence": f"{conf:.0%}" if isinstance(conf, (int, float)) else str(conf),
-                    "Escalation": "🚩 Yes" if escalation else "✅ No",
-                }
-                rows.append(row)
-
-            df = pd.DataFrame(rows)
             st.dataframe(
                 df,
                 width="stretch",
                 hide_index=True,
-                height=min(500, 40 + len(rows) * 35),
+                height=min(500, 40 + len(df) * 35),
                 column_config={
                     "#": st.column_config.NumberColumn(width="small"),
                     "Description": st.column_config.TextColumn(width="large"),
-                    "Confidence": st.column_config.TextColumn(width="small"),
+                    "Price/Base Unit": st.column_config.NumberColumn(format="$%.4f"),
+                    "Confidence": st.column_config.ProgressColumn(
+                        width="small", min_value=0, max_value=100, format="%.0f%%",
+                    ),
                     "Escalation": st.column_config.TextColumn(width="small"),
                 },
             )
 
         # ── Escalated items evidence ──────────────────────────────────
-        escalated_items = [item for item in items if item.get("escalation_flag")]
         if escalated_items:
             with st.expander(f"🚩 **Escalated Items Evidence** ({len(escalated_items)} items)", expanded=False):
                 for item in escalated_items:
@@ -290,18 +449,16 @@ def render_results(result: dict[str, Any], filename: str, log_messages: list[str
         st.markdown("#### 📥 Download")
         dl1, dl2, _ = st.columns([1, 1, 4])
         with dl1:
-            csv_data = df.to_csv(index=False)
             st.download_button(
                 "⬇️ CSV",
-                data=csv_data,
+                data=csv_bytes,
                 file_name=f"{Path(filename).stem}_results.csv",
                 mime="text/csv",
             )
         with dl2:
-            json_str = json.dumps(result, indent=2, default=str)
             st.download_button(
                 "⬇️ JSON",
-                data=json_str,
+                data=json_bytes,
                 file_name=f"{Path(filename).stem}_results.json",
                 mime="application/json",
             )
@@ -314,10 +471,9 @@ def render_results(result: dict[str, Any], filename: str, log_messages: list[str
         )
         with st.expander("🔍 **Raw JSON Output** (diagnostics)"):
             st.json(result, expanded=True)
-        json_str = json.dumps(result, indent=2, default=str)
         st.download_button(
             "⬇️ Download JSON",
-            data=json_str,
+            data=json_bytes,
             file_name=f"{Path(filename).stem}_results.json",
             mime="application/json",
         )
@@ -349,30 +505,98 @@ def render_results(result: dict[str, Any], filename: str, log_messages: list[str
 
 
 # ── Main flow ────────────────────────────────────────────────────────────────
+def render_failure(filename: str, log_messages: list[str]) -> None:
+    """Show the error + raw logs for a file whose pipeline run failed."""
+    st.error(f"Processing failed for **{filename}**.")
+    # Still show logs for failed files without an expander
+    if log_messages:
+        st.markdown(f"**Processing Logs** ({len(log_messages)} entries)")
+        for log in log_messages:
+            if log.startswith("ERROR:"):
+                st.error(log)
+            else:
+                st.text(f"• {log}")
+
+
 if uploaded_files:
     st.markdown("---")
     st.markdown("## 📊 Results")
 
-    for uploaded_file in uploaded_files:
-        st.markdown(f"### 📄 `{uploaded_file.name}`")
-
-        result, log_messages = run_pipeline(uploaded_file)
-
-        if result is not None:
-            render_results(result, uploaded_file.name, log_messages)
-        else:
-            st.error(f"Processing failed for **{uploaded_file.name}**.")
-            # Still show logs for failed files without an expander
-            if log_messages:
-                st.markdown(f"**Processing Logs** ({len(log_messages)} entries)")
-                for log in log_messages:
-                    if log.startswith("ERROR:"):
-                        st.error(log)
-                    else:
-                        st.text(f"• {log}")
+    # Results survive reruns (expander toggles, sidebar edits) in session
+    # state, keyed by content hash, so unchanged uploads are rendered
+    # straight away instead of going back through the pipeline.
+    processed: dict[tuple[str, str, str], tuple[dict[str, Any], list[str]]] = (
+        st.session_state.setdefault("processed", {})
+    )
 
+    # One section per file, laid out in upload order and filled in as each
+    # worker finishes.  Only the main thread talks to Streamlit; workers push
+    # status messages onto a queue that is drained between waits.
+    sections: list[Any] = []
+    progress_bars: dict[int, Any] = {}
+    keys: list[tuple[str, str, str]] = []
+    for idx, uploaded_file in enumerate(uploaded_files):
+        key = (_upload_digest(uploaded_file), uploaded_file.name, _key_digest)
+        section = st.container()
+        section.markdown(f"### 📄 `{uploaded_file.name}`")
+        if key not in processed:
+            progress_bars[idx] = section.progress(0, text="Initialising pipeline...")
+        sections.append(section)
+        keys.append(key)
         st.markdown("---")
 
+    for idx, key in enumerate(keys):
+        if key in processed:
+            with sections[idx]:
+                render_results(processed[key][0], uploaded_files[idx].name, processed[key][1])
+
+    status_queue: queue.Queue[tuple[int, str]] = queue.Queue()
+    step_counts = [0] * len(uploaded_files)
+
+    def _drain_status() -> None:
+        # Coalesce: count every message, but repaint each bar once per drain
+        latest: dict[int, str] = {}
+        while True:
+            try:
+                idx, msg = status_queue.get_nowait()
+            except queue.Empty:
+                break
+            step_counts[idx] += 1
+            latest[idx] = msg
+        for idx, msg in latest.items():
+            pct = min(int(step_counts[idx] / _TOTAL_STEPS * 100), 95)
+            progress_bars[idx].progress(pct, text=msg)
+
+    with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as pool:
+        futures = {
+            pool.submit(
+                run_pipeline,
+                uploaded_files[idx],
+                keys[idx][0],
+                lambda msg, idx=idx: status_queue.put((idx, msg)),
+            ): idx
+            for idx in progress_bars
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=_STATUS_INTERVAL, return_when=FIRST_COMPLETED)
+            _drain_status()
+            for future in done:
+                idx = futures[future]
+                filename = uploaded_files[idx].name
+                result, log_messages = future.result()
+                with sections[idx]:
+                    if result is not None:
+                        progress_bars[idx].empty()
+                        render_results(result, filename, log_messages)
+                    else:
+                        progress_bars[idx].progress(100, text="❌ Error occurred")
+                        render_failure(filename, log_messages)
+                if result is not None:
+                    processed[keys[idx]] = (result, log_messages)
+                    while len(processed) > _MAX_SESSION_RESULTS:
+                        processed.pop(next(iter(processed)))  # FIFO eviction
+
     st.success(f"🎉 All {len(uploaded_files)} file(s) processed!")
 
 else:
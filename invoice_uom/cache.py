@@ -3,20 +3,82 @@
 Keyed on a *normalised query string* (lower-cased, whitespace-collapsed).
 Stores resolved pack_qty, uom, evidence snippets, source URLs, and timestamp.
 Thread-safe (SQLite handles its own locking in WAL mode).
+
+Writes are buffered in memory and committed in batches (one transaction
+per batch) by a background writer thread, so ``put`` never waits on SQLite;
+buffered rows are visible to ``get`` immediately.  Call ``flush()`` at the
+end of a unit of work – any rows still pending at interpreter exit are
+flushed by an ``atexit`` hook.  A bounded in-memory
+LRU sits in front of SQLite so repeated queries skip the database and the
+JSON decode entirely.
 """
 
 from __future__ import annotations
 
+import atexit
 import json
+import logging
+import os
+import queue
 import sqlite3
 import threading
 import time
-from dataclasses import dataclass, field
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from typing import Any
 
 from invoice_uom import config
 
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson  # type: ignore[import-untyped]
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+
+def _dumps(obj: Any) -> bytes | str:
+    """Serialise *obj* as JSON.
+
+    With orjson the UTF-8 bytes are stored directly as a BLOB, skipping the
+    decode on write and the encode on read; ``_loads`` accepts either form,
+    so rows written by the stdlib fallback (TEXT) stay readable.
+    """
+    if _HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj)
+
+
+def _loads(text: str | bytes) -> Any:
+    if _HAS_ORJSON:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+# Evidence is stored with each distinct URL written once:
+#   {"v": 1, "u": [url, ...], "e": [[url_index, snippet], ...]}
+# Rows written before this format hold the plain list-of-dicts and are
+# returned unchanged.
+_EVIDENCE_FORMAT = 1
+
+
+def _pack_evidence(snippets: list[dict[str, str]]) -> Any:
+    if not snippets or any(d.keys() != {"url", "snippet"} for d in snippets):
+        return snippets
+    ids: dict[str, int] = {}
+    entries = [[ids.setdefault(d["url"], len(ids)), d["snippet"]] for d in snippets]
+    return {"v": _EVIDENCE_FORMAT, "u": list(ids), "e": entries}
+
+
+def _unpack_evidence(obj: Any) -> list[dict[str, str]]:
+    if isinstance(obj, dict) and obj.get("v") == _EVIDENCE_FORMAT:
+        urls = obj["u"]
+        return [{"url": urls[i], "snippet": snippet} for i, snippet in obj["e"]]
+    return obj
+
 
 @dataclass
 class LookupResult:
@@ -47,13 +109,49 @@ CREATE TABLE IF NOT EXISTS lookup_cache (
     query_key    TEXT PRIMARY KEY,
     pack_qty     INTEGER,
     uom          TEXT,
-    evidence     TEXT,      -- JSON array of {url, snippet}
-    source_urls  TEXT,      -- JSON array of strings
+    evidence     TEXT,      -- JSON array of {url, snippet} (TEXT or BLOB)
+    source_urls  TEXT,      -- JSON array of strings (TEXT or BLOB)
     llm_used     INTEGER DEFAULT 0,
     ts           REAL
 );
 """
 
+_PAGE_CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS page_cache (
+    url       TEXT PRIMARY KEY,
+    snippets  TEXT,      -- JSON array of snippet strings (TEXT or BLOB)
+    ts        REAL
+);
+"""
+
+# Kept as module constants so every call passes the identical SQL string and
+# hits sqlite3's per-connection prepared-statement cache.
+_SELECT_SQL = (
+    "SELECT pack_qty, uom, evidence, source_urls, llm_used, ts "
+    "FROM lookup_cache WHERE query_key = ?"
+)
+_UPSERT_SQL = (
+    "INSERT OR REPLACE INTO lookup_cache "
+    "(query_key, pack_qty, uom, evidence, source_urls, llm_used, ts) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_PAGE_SELECT_SQL = "SELECT snippets FROM page_cache WHERE url = ? AND ts >= ?"
+_PAGE_UPSERT_SQL = "INSERT OR REPLACE INTO page_cache (url, snippets, ts) VALUES (?, ?, ?)"
+_CACHED_STATEMENTS = 128
+_BATCH_SIZE = 64
+_MEM_MAX = 4096
+
+# synchronous=NORMAL under WAL only risks losing the last commits on power
+# loss, never corruption – acceptable for a cache that can be re-derived.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",        # 64 MiB page cache
+    "PRAGMA mmap_size=268435456",      # 256 MiB memory-mapped reads
+    "PRAGMA wal_autocheckpoint=1000",
+)
+
 
 class LookupCache:
     """Thread-safe SQLite cache for lookup results."""
@@ -61,59 +159,214 @@ class LookupCache:
     def __init__(self, db_path: Path = config.CACHE_DB_FILE) -> None:
         self._db_path = db_path
         self._local = threading.local()
+        self._pending: dict[str, tuple[Any, ...]] = {}
+        self._pending_lock = threading.Lock()
+        # Serialises swap-and-commit so batches land in the order queued.
+        self._write_lock = threading.Lock()
+        self._mem: OrderedDict[str, LookupResult] = OrderedDict()
+        self._mem_lock = threading.Lock()
         db_path.parent.mkdir(parents=True, exist_ok=True)
         # Ensure table exists via a temporary connection.
         with self._connect() as conn:
             conn.execute(_CREATE_SQL)
+            conn.execute(_PAGE_CREATE_SQL)
+        _INSTANCES.add(self)
 
     # ── public API ─────────────────────────────────────────────────────
     def get(self, query: str) -> LookupResult | None:
         key = self._normalise(query)
-        with self._connect() as conn:
-            row = conn.execute(
-                "SELECT pack_qty, uom, evidence, source_urls, llm_used, ts "
-                "FROM lookup_cache WHERE query_key = ?",
-                (key,),
-            ).fetchone()
+        with self._mem_lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                self._mem.move_to_end(key)
+        if hit is not None:
+            return replace(hit, query=query)
+
+        with self._pending_lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            row = pending[1:]
+        else:
+            # Plain autocommit read – no transaction to open or commit
+            row = self._connect().execute(_SELECT_SQL, (key,)).fetchone()
         if row is None:
             return None
-        return LookupResult(
+        result = LookupResult(
             query=query,
             pack_qty=row[0],
             uom=row[1],
-            evidence_snippets=json.loads(row[2]) if row[2] else [],
-            source_urls=json.loads(row[3]) if row[3] else [],
+            evidence_snippets=_unpack_evidence(_loads(row[2])) if row[2] else [],
+            source_urls=_loads(row[3]) if row[3] else [],
             llm_used=bool(row[4]),
             timestamp=row[5] or 0.0,
         )
+        self._remember(key, result)
+        return result
 
     def put(self, result: LookupResult) -> None:
-        key = self._normalise(result.query)
-        with self._connect() as conn:
-            conn.execute(
-                "INSERT OR REPLACE INTO lookup_cache "
-                "(query_key, pack_qty, uom, evidence, source_urls, llm_used, ts) "
-                "VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (
-                    key,
-                    result.pack_qty,
-                    result.uom,
-                    json.dumps(result.evidence_snippets),
-                    json.dumps(result.source_urls),
-                    int(result.llm_used),
-                    time.time(),
-                ),
-            )
+        """Buffer *result*; full batches are handed to the background writer."""
+        row = self._to_row(result)
+        self._remember(row[0], replace(result, timestamp=row[6]))
+        with self._pending_lock:
+            self._pending[row[0]] = row
+            full = len(self._pending) >= _BATCH_SIZE
+        if full:
+            _schedule_flush(self)
+
+    def put_many(self, results: list[LookupResult]) -> None:
+        """Store several results in one transaction, reusing one prepared INSERT."""
+        if not results:
+            return
+        with self._pending_lock:
+            for r in results:
+                row = self._to_row(r)
+                self._pending[row[0]] = row
+                self._remember(row[0], replace(r, timestamp=row[6]))
+        self.flush()
+
+    def flush(self) -> None:
+        """Commit all buffered rows in a single transaction."""
+        with self._write_lock:
+            with self._pending_lock:
+                if not self._pending:
+                    return
+                batch = dict(self._pending)
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(_UPSERT_SQL, batch.values())
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            # Rows stay buffered until committed, so a failed write loses
+            # nothing; keep any that were re-put while the batch was written.
+            with self._pending_lock:
+                for key, row in batch.items():
+                    if self._pending.get(key) is row:
+                        del self._pending[key]
+
+    def get_page(self, url: str, max_age: float) -> list[str] | None:
+        """Snippets stored for *url* within the last *max_age* seconds, else None."""
+        row = self._connect().execute(_PAGE_SELECT_SQL, (url, time.time() - max_age)).fetchone()
+        return _loads(row[0]) if row is not None else None
+
+    def put_page(self, url: str, snippets: list[str]) -> None:
+        """Record the snippets found on *url* (an empty list means none)."""
+        with self._write_lock:
+            conn = self._connect()
+            conn.execute(_PAGE_UPSERT_SQL, (url, _dumps(snippets), time.time()))
+            conn.commit()
 
     # ── internals ──────────────────────────────────────────────────────
     def _connect(self) -> sqlite3.Connection:
         conn = getattr(self._local, "conn", None)
         if conn is None:
-            conn = sqlite3.connect(str(self._db_path), timeout=10)
-            conn.execute("PRAGMA journal_mode=WAL")
+            conn = sqlite3.connect(
+                str(self._db_path), timeout=10,
+                cached_statements=_CACHED_STATEMENTS,
+            )
+            for pragma in _PRAGMAS:
+                conn.execute(pragma)
             self._local.conn = conn
         return conn
 
+    def _remember(self, key: str, result: LookupResult) -> None:
+        with self._mem_lock:
+            self._mem[key] = result
+            self._mem.move_to_end(key)
+            if len(self._mem) > _MEM_MAX:
+                self._mem.popitem(last=False)
+
+    @classmethod
+    def _to_row(cls, result: LookupResult) -> tuple[Any, ...]:
+        return (
+            cls._normalise(result.query),
+            result.pack_qty,
+            result.uom,
+            _dumps(_pack_evidence(result.evidence_snippets)),
+            _dumps(result.source_urls),
+            int(result.llm_used),
+            time.time(),
+        )
+
     @staticmethod
     def _normalise(query: str) -> str:
-        return " ".join(query.lower().split())
+        # Collapse first so lower() runs over the shorter string
+        return " ".join(query.split()).lower()
+
+
+# ── shared instance ────────────────────────────────────────────────────────
+# One cache per process, so the in-memory tier and the per-thread SQLite
+# connections (and their PRAGMA setup) outlive any single PDF.
+_shared: LookupCache | None = None
+_shared_lock = threading.Lock()
+
+
+def get_cache() -> LookupCache:
+    """Return the process-wide *LookupCache* on ``config.CACHE_DB_FILE``."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = LookupCache(config.CACHE_DB_FILE)
+    return _shared
+
+
+def _reset_after_fork() -> None:
+    # The parent's connections and locks must not be used by a child.
+    global _shared, _shared_lock
+    _shared_lock = threading.Lock()
+    _shared = None
+
+
+if hasattr(os, "register_at_fork"):  # POSIX only; spawned children re-import
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# ── background writer ──────────────────────────────────────────────────────
+# One daemon thread serves every cache; it opens its own (thread-local)
+# connection per cache, so readers never share a connection with it.
+_WRITE_QUEUE: queue.Queue[LookupCache] = queue.Queue(maxsize=1024)
+_writer: threading.Thread | None = None
+_writer_lock = threading.Lock()
+
+
+def _schedule_flush(cache: LookupCache) -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(
+                target=_writer_loop, name="lookup-cache-writer", daemon=True,
+            )
+            _writer.start()
+    try:
+        _WRITE_QUEUE.put_nowait(cache)
+    except queue.Full:
+        cache.flush()
+
+
+def _writer_loop() -> None:
+    while True:
+        cache = _WRITE_QUEUE.get()
+        try:
+            cache.flush()
+        except sqlite3.Error:
+            logger.warning("Background lookup-cache flush failed", exc_info=True)
+        finally:
+            del cache
+            _WRITE_QUEUE.task_done()
+
+
+# Live caches, so rows still buffered at interpreter exit are not lost.
+_INSTANCES: weakref.WeakSet[LookupCache] = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all() -> None:
+    for cache in list(_INSTANCES):
+        try:
+            cache.flush()
+        except sqlite3.Error:
+            pass
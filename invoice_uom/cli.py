@@ -10,7 +10,9 @@ from __future__ import annotations
 import argparse
 import logging
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Any
 
 from invoice_uom import config
 
@@ -28,7 +30,12 @@ def _setup_logging(log_dir: Path) -> None:
 
 
 def _run(args: argparse.Namespace) -> None:
-    from invoice_uom.pipeline import process_pdf
+    from invoice_uom.pipeline import (
+        flush_manifest,
+        mark_processed,
+        pipeline_batch,
+        process_pdf,
+    )
 
     input_dir = Path(args.input)
     output_dir = Path(args.output)
@@ -52,9 +59,21 @@ def _run(args: argparse.Namespace) -> None:
         return
 
     console.print(f"Found [bold]{len(pdfs)}[/bold] PDF(s) in {input_dir}")
-    success = 0
-    skipped = 0
-    failed_count = 0
+    jobs = max(1, min(args.jobs, len(pdfs)))
+    counts = {"success": 0, "skipped": 0, "failed": 0}
+
+    def _report(progress: Any, pdf: Path, result: dict[str, Any] | None) -> None:
+        if result is None:
+            counts["skipped"] += 1
+            progress.console.print(f"[yellow]Skipped[/yellow] {pdf.name} (already processed)")
+        elif result:
+            counts["success"] += 1
+            progress.console.print(
+                f"[green]✓ Success[/green] {pdf.name} → [{result['stats']['num_items']} items, {result['stats']['num_escalations']} escalations]"
+            )
+        else:
+            counts["failed"] += 1
+            progress.console.print(f"[red]✗ Failed[/red]  {pdf.name}")
 
     with Progress(
         SpinnerColumn(),
@@ -66,38 +85,50 @@ def _run(args: argparse.Namespace) -> None:
     ) as progress:
         overall_task = progress.add_task("[cyan]Processing PDFs...", total=len(pdfs))
 
-        for pdf in pdfs:
-            pdf_task = progress.add_task(f"[bold blue]{pdf.name}[/bold blue] Starting...", total=None)
-
-            # Define localized callback for closures
-            def create_cb(t_id, p_name):
-                def cb(msg: str) -> None:
-                    progress.update(t_id, description=f"[bold blue]{p_name}[/bold blue] {msg}")
-                return cb
-
-            status_cb = create_cb(pdf_task, pdf.name)
-
-            result = process_pdf(
-                pdf, output_dir, failed_dir, force=args.force, status_cb=status_cb
-            )
-
-            progress.update(overall_task, advance=1)
-            progress.stop_task(pdf_task)
-
-            if result is None:
-                skipped += 1
-                progress.console.print(f"[yellow]Skipped[/yellow] {pdf.name} (already processed)")
-            elif result:
-                success += 1
-                progress.console.print(
-                    f"[green]✓ Success[/green] {pdf.name} → [{result['stats']['num_items']} items, {result['stats']['num_escalations']} escalations]"
+        if jobs > 1:
+            # Files are independent and extraction is CPU-bound: one process
+            # each.  Per-stage status callbacks can't cross the process
+            # boundary, so only the overall bar is driven here.
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = {
+                    pool.submit(process_pdf, pdf, output_dir, failed_dir, args.force): pdf
+                    for pdf in pdfs
+                }
+                for fut in as_completed(futures):
+                    pdf = futures[fut]
+                    try:
+                        result = fut.result()
+                    except Exception:
+                        logging.getLogger(__name__).exception("Worker failed on %s", pdf.name)
+                        result = {}  # reported as failed
+                    progress.update(overall_task, advance=1)
+                    _report(progress, pdf, result)
+                    if result:
+                        # Re-record in case concurrent manifest updates raced
+                        mark_processed(pdf)
+        else:
+            # Stages overlap across files (Docling on the next PDF while the
+            # current one is enriched), so several per-PDF rows can be live.
+            pdf_tasks = {
+                pdf: progress.add_task(f"[bold blue]{pdf.name}[/bold blue] Starting...", total=None, visible=False)
+                for pdf in pdfs
+            }
+
+            def status_cb(pdf: Path, msg: str) -> None:
+                progress.update(
+                    pdf_tasks[pdf], description=f"[bold blue]{pdf.name}[/bold blue] {msg}", visible=True
                 )
-            else:
-                failed_count += 1
-                progress.console.print(f"[red]✗ Failed[/red]  {pdf.name}")
 
-            progress.remove_task(pdf_task)
+            for pdf, result in pipeline_batch(
+                pdfs, output_dir, failed_dir, force=args.force, status_cb=status_cb
+            ):
+                progress.update(overall_task, advance=1)
+                progress.stop_task(pdf_tasks[pdf])
+                _report(progress, pdf, result)
+                progress.remove_task(pdf_tasks[pdf])
 
+    flush_manifest()
+    success, skipped, failed_count = counts["success"], counts["skipped"], counts["failed"]
     console.print(f"\n[bold green]Done:[/bold green] {success} processed, {skipped} skipped, {failed_count} failed")
 
 def _watch(args: argparse.Namespace) -> None:
@@ -127,6 +158,14 @@ def main() -> None:
     p_run.add_argument("--failed", "-f", default=None, help="Failed output directory")
     p_run.add_argument("--log-dir", default=None, help="Log directory")
     p_run.add_argument("--force", action="store_true", help="Reprocess even if already done")
+    p_run.add_argument(
+        "--jobs", "-j", type=int, default=1,
+        help=(
+            "Worker processes (default 1: overlapped stages with live status). "
+            "Each worker enforces the Gemini RPM/RPD caps on its own, so the "
+            "effective LLM budget scales with this number"
+        ),
+    )
     p_run.set_defaults(func=_run)
 
     # ── watch ────────────────────────────────────────────────────────────
@@ -4,6 +4,8 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
 
 # ── directory defaults ──────────────────────────────────────────────────────
 BASE_DIR = Path(os.environ.get("INVOICE_UOM_BASE", "."))
@@ -138,6 +140,13 @@ LLM_RPD = 50                    # max requests per day
 LLM_MAX_RETRIES = 5             # retries on 429 / RESOURCE_EXHAUSTED
 LLM_MAX_CALLS_PER_PDF = 10      # budget cap per single PDF run
 LLM_TEMPERATURE = 0.0
+LLM_EXTRACT_MAX_CHARS = 12000   # invoice text kept for the LLM extraction fallback
+
+LOOKUP_WORKERS = 8              # concurrent lookups per PDF
+
+# Outbound lookup HTTP: at most N requests per host within a sliding window
+LOOKUP_HOST_MAX_REQUESTS = 4
+LOOKUP_HOST_WINDOW_S = 2.0
 
 # ── confidence thresholds ───────────────────────────────────────────────────
 CONFIDENCE_THRESHOLD = 0.60     # below this → escalation_flag = True
@@ -159,3 +168,16 @@ NON_ITEM_KEYWORDS: list[str] = [
 MANIFEST_FILE = CACHE_DIR / "manifest.json"
 DAILY_COUNTER_FILE = CACHE_DIR / "daily_llm_counter.json"
 CACHE_DB_FILE = CACHE_DIR / "lookup_cache.db"
+PAGE_CACHE_TTL_S = 24 * 3600    # fetched product pages are re-read after a day
+GEMINI_CACHE_DIR = CACHE_DIR / "gemini"
+
+# ── debug artefacts ─────────────────────────────────────────────────────────
+# ``outputs/<name>.debug.json`` is only written for successful PDFs when set;
+# failures always embed the debug data in ``failed/<name>.error.json``.
+WRITE_DEBUG_ALWAYS = os.environ.get("INVOICE_UOM_WRITE_DEBUG", "") == "1"
+
+# ── freeze lookup tables ────────────────────────────────────────────────────
+# Keys are upper-cased once here so callers only upper-case their token; the
+# read-only views stop any module from mutating the shared tables at runtime.
+UOM_ALIASES: Mapping[str, str] = MappingProxyType({k.upper(): v for k, v in UOM_ALIASES.items()})
+SUPPLIER_ALIASES: Mapping[str, str] = MappingProxyType({k.upper(): v for k, v in SUPPLIER_ALIASES.items()})
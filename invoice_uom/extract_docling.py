@@ -8,10 +8,12 @@ Key fix: Docling is now configured to export tables directly into Semantic HTML
 
 from __future__ import annotations
 
+import io
 import logging
 import re
+import threading
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +27,38 @@ _MD_NOISE = re.compile(
     re.MULTILINE,
 )
 
+# ── per-cell / per-line cleaning patterns ───────────────────────────────────
+_RE_COMMENT = re.compile(r"<!--.*?-->")
+_RE_HEADER = re.compile(r"^\s*#{1,6}\s+")
+_RE_WS = re.compile(r"\s+")
+_RE_HR = re.compile(r"^\s*[\*\-=]{3,}\s*$")
+
+
+# The converter loads its layout / table-structure models on construction,
+# so one instance is shared by every PDF processed in this process.
+_converter: Any = None
+_converter_lock = threading.Lock()
+# The converter's pipelines and model predictors are not thread-safe, and the
+# app and the watcher convert several PDFs on worker threads at once, so
+# ``convert()`` is serialised.  Walking the resulting document is not.
+_convert_lock = threading.Lock()
+
+
+def _get_converter() -> Any:
+    """Return the shared docling ``DocumentConverter`` (created on first call)."""
+    global _converter
+    if _converter is None:
+        with _converter_lock:
+            if _converter is None:
+                try:
+                    from docling.document_converter import DocumentConverter  # type: ignore[import-untyped]
+                except ImportError as exc:
+                    raise RuntimeError(
+                        "docling is not installed.  Install it with: pip install docling"
+                    ) from exc
+                _converter = DocumentConverter()
+    return _converter
+
 
 def extract_with_docling(pdf_path: Path) -> dict[str, Any]:
     """Extract tables and text blocks from *pdf_path* using docling.
@@ -34,47 +68,24 @@ def extract_with_docling(pdf_path: Path) -> dict[str, Any]:
     dict
         ``{"tables": [...], "text_blocks": [...], "method": "docling"}``
     """
-    try:
-        from docling.document_converter import DocumentConverter  # type: ignore[import-untyped]
-    except ImportError as exc:
-        raise RuntimeError(
-            "docling is not installed.  Install it with: pip install docling"
-        ) from exc
+    converter = _get_converter()
 
     logger.info("Extracting with docling: %s", pdf_path.name)
 
-    converter = DocumentConverter()
-    result = converter.convert(str(pdf_path))
+    with _convert_lock:
+        result = converter.convert(str(pdf_path))
     doc = result.document
 
     tables: list[list[list[str]]] = []
     structured_tables: list[str] = []
     text_blocks: list[str] = []
+    out: dict[str, list[Any]] = {"tables": tables, "structured_tables": structured_tables, "text_blocks": text_blocks}
 
     # Walk document items
     for item in doc.iterate_items():
         # Pyre narrowing
         item_obj: Any = item[1] if isinstance(item, tuple) and len(item) > 1 else (item[0] if isinstance(item, tuple) else item)
-        type_name = type(item_obj).__name__
-
-        if type_name == "TableItem":
-            try:
-                table_data = _extract_table(item_obj)
-                if table_data:
-                    tables.append(table_data)
-                
-                # Also save the semantic HTML specifically for the LLM Fallback pipeline
-                html_table = item_obj.export_to_html()
-                if html_table:
-                    structured_tables.append(str(html_table))
-            except Exception:
-                logger.debug("Failed to parse a TableItem, skipping", exc_info=True)
-
-        elif type_name == "TextItem":
-            text = getattr(item_obj, "text", None) or str(item_obj)
-            text = text.strip()
-            if text:
-                text_blocks.append(text)
+        _handler_for(type(item_obj))(item_obj, out)
 
     # If no tables found, try export_to_markdown and parse pipe tables from it
     if not tables:
@@ -105,6 +116,50 @@ def extract_with_docling(pdf_path: Path) -> dict[str, Any]:
     }
 
 
+# ── per-item handlers ───────────────────────────────────────────────────────
+def _handle_table(item_obj: Any, out: dict[str, list[Any]]) -> None:
+    try:
+        table_data = _extract_table(item_obj)
+        if table_data:
+            out["tables"].append(table_data)
+
+        # Also save the semantic HTML specifically for the LLM Fallback pipeline
+        html_table = item_obj.export_to_html()
+        if html_table:
+            out["structured_tables"].append(str(html_table))
+    except Exception:
+        logger.debug("Failed to parse a TableItem, skipping", exc_info=True)
+
+
+def _handle_text(item_obj: Any, out: dict[str, list[Any]]) -> None:
+    text = getattr(item_obj, "text", None) or str(item_obj)
+    text = text.strip()
+    if text:
+        out["text_blocks"].append(text)
+
+
+def _ignore_item(item_obj: Any, out: dict[str, list[Any]]) -> None:
+    pass
+
+
+# Matched on the exact class name (not isinstance) so docling subclasses such
+# as SectionHeaderItem keep being skipped, and docling_core need not be
+# importable here.  Resolved once per concrete type, then a dict hit per item.
+_HANDLERS_BY_NAME: dict[str, Callable[[Any, dict[str, list[Any]]], None]] = {
+    "TableItem": _handle_table,
+    "TextItem": _handle_text,
+}
+_HANDLERS: dict[type, Callable[[Any, dict[str, list[Any]]], None]] = {}
+
+
+def _handler_for(cls: type) -> Callable[[Any, dict[str, list[Any]]], None]:
+    handler = _HANDLERS.get(cls)
+    if handler is None:
+        handler = _HANDLERS_BY_NAME.get(cls.__name__, _ignore_item)
+        _HANDLERS[cls] = handler
+    return handler
+
+
 def _extract_table(table_item: Any) -> list[list[str]]:
     """Convert a docling TableItem to a list of rows (list of cell strings)."""
     rows: list[list[str]] = []
@@ -113,10 +168,9 @@ def _extract_table(table_item: Any) -> list[list[str]]:
     try:
         df = table_item.export_to_dataframe()
         header = [str(c) for c in df.columns.tolist()]
-        rows.append(header)
-        for _, row in df.iterrows():
-            rows.append([str(v) for v in row.tolist()])
-        return rows
+        # One vectorised cast + a single C-level tolist() instead of a
+        # Series per row from iterrows()
+        return [header, *df.astype(str).to_numpy().tolist()]
     except Exception:
         pass
 
@@ -140,6 +194,30 @@ def _extract_table(table_item: Any) -> list[list[str]]:
     return rows
 
 
+def _scan(md_text: str) -> Iterator[tuple[str, str]]:
+    """Classify each stripped markdown line as ``row``, ``sep`` or ``text``.
+
+    Dispatches on the first character so plain text lines – the bulk of an
+    invoice export – are classified without any further scan.
+    """
+    for line in io.StringIO(md_text, newline=None):
+        stripped = line.strip()
+        first = stripped[:1]
+        if first == "|":
+            # Pipe-table rows: wrapped in pipes with at least 2 pipe characters
+            if stripped[-1] == "|" and len(stripped) > 1:
+                yield "row", stripped
+            elif _is_separator_line(stripped):
+                yield "sep", stripped
+            else:
+                yield "text", stripped
+        elif first and first in "-:" and _is_separator_line(stripped):
+            # Separator row like ---|--- without outer pipes
+            yield "sep", stripped
+        else:
+            yield "text", stripped
+
+
 def _parse_markdown_content(md_text: str) -> tuple[list[list[list[str]]], list[str]]:
     """Parse full markdown export: extract pipe tables AND remaining text blocks.
 
@@ -148,54 +226,42 @@ def _parse_markdown_content(md_text: str) -> tuple[list[list[list[str]]], list[s
     tables: list[list[list[str]]] = []
     text_blocks: list[str] = []
 
-    lines = md_text.splitlines()
-    i = 0
-    current_table_lines: list[str] = []
-    non_table_lines: list[str] = []
-
-    while i < len(lines):
-        line = lines[i]
-        stripped = line.strip()
+    table_buf = io.StringIO()
+    text_buf = io.StringIO()
 
-        # Detect pipe-table rows: lines with at least 2 pipe characters
-        if stripped.startswith("|") and stripped.endswith("|") and stripped.count("|") >= 2:
-            current_table_lines.append(stripped)
-        elif _is_separator_line(stripped):
-            # Separator row like |---|---|---| or just ---|---
-            if current_table_lines:
-                current_table_lines.append(stripped)
+    def flush_table() -> None:
+        table = _parse_pipe_table(table_buf.getvalue())
+        if table and len(table) >= 2:
+            tables.append(table)
+        table_buf.seek(0)
+        table_buf.truncate()
+
+    for kind, stripped in _scan(md_text):
+        if kind == "row":
+            table_buf.write(stripped)
+            table_buf.write("\n")
+        elif kind == "sep":
+            if table_buf.tell():
+                table_buf.write(stripped)
+                table_buf.write("\n")
             # else skip stray separators
         else:
             # Non-table line — flush any accumulated table
-            if current_table_lines:
-                table = _parse_pipe_table("\n".join(current_table_lines))
-                if table and len(table) >= 2:
-                    tables.append(table)
-                current_table_lines = []
+            if table_buf.tell():
+                flush_table()
 
-            # Clean the text line
+            # Clean the text line; adjacent non-table lines form one block
             cleaned = _clean_md_line(stripped)
             if cleaned:
-                non_table_lines.append(cleaned)
-        i += 1
+                if text_buf.tell():
+                    text_buf.write(" ")
+                text_buf.write(cleaned)
 
     # Flush final table if any
-    if current_table_lines:
-        table = _parse_pipe_table("\n".join(current_table_lines))
-        if table and len(table) >= 2:
-            tables.append(table)
-
-    # Consolidate adjacent non-table lines into blocks
-    if non_table_lines:
-        current_block: list[str] = []
-        for ln in non_table_lines:
-            if ln:
-                current_block.append(ln)
-            elif current_block:
-                text_blocks.append(" ".join(current_block))
-                current_block = []
-        if current_block:
-            text_blocks.append(" ".join(current_block))
+    if table_buf.tell():
+        flush_table()
+    if text_buf.tell():
+        text_blocks.append(text_buf.getvalue())
 
     return tables, text_blocks
 
@@ -227,32 +293,47 @@ def _parse_pipe_table(md_text: str) -> list[list[str]]:
 def _is_separator_line(line: str) -> bool:
     """Check if a line is a markdown table separator (e.g. |---|---|)."""
     stripped = line.strip().strip("|").strip()
-    if not stripped:
+    # A separator can only start with - : or | – rejects content rows
+    # without scanning them
+    if not stripped or stripped[0] not in "-:|":
         return False
     # Separator lines contain only dashes, colons, pipes, and spaces
-    return bool(re.match(r"^[\s\-:|]+$", stripped))
+    return not stripped.replace("-", "").replace(":", "").replace("|", "").strip()
 
 
 def _clean_cell(text: str) -> str:
-    """Clean a single table cell value."""
+    """Clean a single table cell value.
+
+    Runs on every cell, so the common case (no comment, no header marker)
+    is a single ``split``/``join`` pass with no regex.
+    """
     text = text.strip()
-    # Remove markdown artifacts
-    text = re.sub(r"<!--.*?-->", "", text)
-    text = re.sub(r"^\s*#{1,6}\s+", "", text)
-    # Collapse whitespace
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    # Remove markdown artifacts (rare – only pay for the regex when present)
+    if "<!--" in text:
+        text = _RE_COMMENT.sub("", text).lstrip()
+    if text.startswith("#"):
+        n = len(text) - len(text.lstrip("#"))
+        if n <= 6 and text[n:n + 1].isspace():
+            text = text[n:]
+    # Collapse whitespace (also strips both ends)
+    return " ".join(text.split())
 
 
 def _clean_md_line(line: str) -> str:
-    """Clean a non-table markdown line."""
+    """Clean a non-table markdown line.
+
+    Each regex is gated on a cheap character test, so plain prose lines –
+    the common case – are returned after a single ``strip``.
+    """
     if not line:
         return ""
     # Remove HTML comments
-    line = re.sub(r"<!--.*?-->", "", line)
+    if "<!--" in line:
+        line = _RE_COMMENT.sub("", line)
     # Remove markdown header markers
-    line = re.sub(r"^\s*#{1,6}\s+", "", line)
+    if "#" in line:
+        line = _RE_HEADER.sub("", line)
     # Remove horizontal rules
-    if re.match(r"^\s*[\*\-=]{3,}\s*$", line):
+    if line.lstrip()[:1] in ("*", "-", "=") and _RE_HR.match(line):
         return ""
     return line.strip()
@@ -10,6 +10,7 @@ Handles:
 
 from __future__ import annotations
 
+import functools
 import logging
 import re
 from typing import Any, cast
@@ -18,22 +19,76 @@ from invoice_uom import config  # type: ignore[import-not-found]
 
 logger = logging.getLogger(__name__)
 
+# ── cell / line patterns ────────────────────────────────────────────────────
+_RE_COMMENT = re.compile(r"<!--.*?-->")
+_RE_PRICE = re.compile(r"\d+\.\d{2}")
+
+
+class _NumericKeepTable(dict[int, "int | None"]):
+    """``str.translate`` table keeping decimal digits, ``.`` and ``-``.
+
+    Filled lazily per code point, so currency symbols of any script (₹, €,
+    £ …) are deleted just like ``$`` and ``,`` without enumerating Unicode.
+    """
+
+    def __missing__(self, cp: int) -> int | None:
+        ch = chr(cp)
+        keep = cp if ch.isdecimal() or ch in ".-" else None
+        self[cp] = keep
+        return keep
+
+
+_NUMERIC_KEEP = _NumericKeepTable()
+
+# Fastenal borderless pattern
+# e.g.: "1      2     2       0   SG Model 31 H3 Eyewe 144819 1050072 195.0000 3.90"
+_FASTENAL_LINE_RE = re.compile(
+    r"^(?P<line_no>\d+)\s+"                 # Line No: "1"
+    r"(?P<qty_ord>\d+(?:\.\d+)?)\s+"        # Qty Ordered: "2"
+    r"(?P<qty_ship>\d+(?:\.\d+)?)\s+"       # Qty Shipped: "2"
+    r"(?P<qty_bo>\d+(?:\.\d+)?)\s+"         # Qty Backordered: "0"
+    r"(?P<desc>.+?)\s+"                     # Description: "SG Model 31 H3 Eyewe"
+    r"(?P<sku>\w[\w\-]+(?:(?:[\s\w\-]+)?\w)?)\s+" # Part No: "144819" (sometimes there's another Control No before or after)
+    r"(?P<price_per_hund>\d{1,3}(?:,\d{3})*\.\d{2,4})\s+" # Price / Hundred: "195.0000"
+    r"(?P<amount>\d{1,3}(?:,\d{3})*\.\d{2})$"            # Amount: "3.90"
+)
+
+# Generic "description  qty  [uom]  price" text line
+_TEXT_LINE_RE = re.compile(
+    r"^(?P<desc>.{10,}?)\s+"
+    r"(?P<qty>\d+(?:\.\d+)?)\s+"
+    r"(?:(?P<uom>[A-Za-z]{1,6})\s+)?"
+    r"(?P<price>\d+(?:,\d{3})*\.\d{2})"
+)
+
 
 def _clean_cell_value(text: str) -> str:
-    """Strip markdown noise from a cell value."""
+    """Strip markdown noise from a cell value.
+
+    Runs on every cell, so only the comment removal uses a regex and only
+    when a comment is actually present; everything else is C-level ``str``
+    methods.
+    """
     if not text:
         return ""
+    # Plain tokens like "12" or "EA" carry nothing to strip
+    if text.isalnum():
+        return text
     # Remove HTML comments
-    text = re.sub(r"<!--.*?-->", "", text)
-    # Remove markdown header markers
-    text = re.sub(r"^\s*#{1,6}\s+", "", text)
+    if "<!--" in text:
+        text = _RE_COMMENT.sub("", text)
+    # Remove markdown header markers (1-6 '#' followed by whitespace)
+    head = text.lstrip()
+    if head.startswith("#"):
+        n = len(head) - len(head.lstrip("#"))
+        if n <= 6 and head[n:n + 1].isspace():
+            text = head[n:].lstrip()
     # Remove leading/trailing pipes (leftover from bad splits)
     text = text.strip("| ")
     # Collapse whitespace
-    text = re.sub(r"\s+", " ", text).strip()
+    text = " ".join(text.split())
     # Remove trailing dots that are just noise
-    text = text.rstrip(".")
-    return text
+    return text.rstrip(".")
 
 # ── column-identification keywords ──────────────────────────────────────────
 _COL_PATTERNS: dict[str, list[str]] = {
@@ -98,34 +153,44 @@ _COL_PATTERNS: dict[str, list[str]] = {
     ],
 }
 
-
-def _identify_columns(header: list[str]) -> dict[str, int]:
-    """Map semantic column roles to header indices."""
+# Pre-sort patterns by length descending so "item #" is checked before "item"
+_SORTED_PATTERNS: tuple[tuple[str, str], ...] = tuple(sorted(
+    ((kw, role) for role, keywords in _COL_PATTERNS.items() for kw in keywords),
+    key=lambda x: len(x[0]),
+    reverse=True,
+))
+# Keywords are unique across roles, so exact matches are one dict hit
+_EXACT_PATTERNS: dict[str, str] = {kw: role for kw, role in _SORTED_PATTERNS}
+# One scan telling whether a cell contains *any* keyword; cells that don't
+# (most data rows probed by _find_header_row) skip the ordered search.
+_ANY_KEYWORD_RE = re.compile("|".join(re.escape(kw) for kw, _ in _SORTED_PATTERNS))
+
+
+@functools.lru_cache(maxsize=512)
+def _identify_columns(header: tuple[str, ...]) -> dict[str, int]:
+    """Map semantic column roles to header indices.
+
+    Memoised on the header tuple – multi-page invoices repeat the same
+    header row on every page.  The returned dict is shared; copy before
+    mutating.
+    """
     mapping: dict[str, int] = {}
-    
-    # Pre-sort patterns by length descending so "item #" is checked before "item"
-    sorted_patterns: list[tuple[str, str]] = []
-    for role, keywords in _COL_PATTERNS.items():
-        for kw in keywords:
-            sorted_patterns.append((kw, role))
-    sorted_patterns.sort(key=lambda x: len(x[0]), reverse=True)
 
     for idx, cell in enumerate(header):
         cell_lower = cell.lower().strip()
         
         # 1. Look for exact matches first
         found = False
-        for kw, role in sorted_patterns:
-            if role in mapping:
-                continue
-            if cell_lower == kw:
-                mapping[role] = idx
-                found = True
-                break
-                
+        role = _EXACT_PATTERNS.get(cell_lower)
+        if role is not None and role not in mapping:
+            mapping[role] = idx
+            found = True
+
         # 2. Look for partial matches if no exact match
-        if not found:
-            for kw, role in sorted_patterns:
+        # (longest keyword wins, so the ordered scan – not the regex match –
+        # decides the role)
+        if not found and _ANY_KEYWORD_RE.search(cell_lower):
+            for kw, role in _SORTED_PATTERNS:
                 if role in mapping:
                     continue
                 # If kw is 'item' and cell is 'item #', don't match 'item' if we already
@@ -150,10 +215,9 @@ def _find_header_row(table: list[list[str]], max_rows: int = 6) -> tuple[int, di
     best_idx = 0
     best_map: dict[str, int] = {}
     best_score = -1
-    
-    import itertools
-    for i, row in enumerate(itertools.islice(table, max_rows)):
-        col_map = _identify_columns(row)
+
+    for i, row in enumerate(table[:max_rows]):
+        col_map = _identify_columns(tuple(row))
         
         # We value finding 'description' highly.
         score = len(col_map)
@@ -164,22 +228,34 @@ def _find_header_row(table: list[list[str]], max_rows: int = 6) -> tuple[int, di
             best_map = col_map
             best_idx = i
             best_score = score
-            
-    return best_idx, best_map
 
+    # Copy: the caller fills in defaults and the cached mapping is shared
+    return best_idx, dict(best_map)
 
+
+# Keywords are lower-case; matched against the lower-cased text in one scan
+_NON_ITEM_RE = re.compile("|".join(re.escape(kw) for kw in config.NON_ITEM_KEYWORDS))
+
+
+@functools.lru_cache(maxsize=2048)
 def _is_non_item(text: str) -> bool:
     """Return True if *text* looks like a subtotal / tax / non-item line."""
-    text_lower = text.lower().strip()
-    return any(kw in text_lower for kw in config.NON_ITEM_KEYWORDS)
+    return _NON_ITEM_RE.search(text.lower()) is not None
 
 
+@functools.lru_cache(maxsize=4096)
 def _parse_number(val: str | None) -> float | None:
-    """Attempt to parse a numeric value from a cell string."""
+    """Attempt to parse a numeric value from a cell string.
+
+    Memoised: quantities, UOM tokens and prices repeat heavily across rows.
+    """
     if not val:
         return None
+    val = val.strip()
+    if val.isdecimal():
+        return float(val)
     # Remove currency symbols and commas
-    cleaned = re.sub(r"[^\d.\-]", "", val.strip())
+    cleaned = val.translate(_NUMERIC_KEEP)
     if not cleaned or cleaned in (".", "-"):
         return None
     try:
@@ -218,77 +294,95 @@ def extract_line_items_from_tables(
             continue
 
         debug_info["tables_processed"] += 1
+        items, mapping, raw_rows = _extract_one_table(table)
+        debug_info["column_mappings"].append(mapping)
+        debug_info["raw_rows"].extend(raw_rows)
+        all_items.extend(items)
 
-        # Scan the first few rows to find the most likely header
-        header_idx, col_map = _find_header_row(table)
-        header = table[header_idx]
-        debug_info["column_mappings"].append({"header": header, "mapping": col_map, "header_row_index": header_idx})
+    all_items = _merge_orphaned_descriptions(all_items)
+    return all_items, debug_info
 
-        if not col_map.get("description"):
-            # No description column found — skip or try heuristic
-            logger.debug("No description column identified in table header: %s", header)
-            # Try using the first column as description
-            col_map.setdefault("description", 0)
 
-        desc_idx = col_map.get("description", 0)
-        qty_idx = col_map.get("quantity")
-        uom_idx = col_map.get("uom")
-        uprice_idx = col_map.get("unit_price")
-        amount_idx = col_map.get("amount")
-        sku_idx = col_map.get("sku")
-        mpn_idx = col_map.get("mpn")
+def _extract_one_table(
+    table: list[list[str]],
+) -> tuple[list[dict[str, Any]], dict[str, Any], list[list[str]]]:
+    """Parse one table (of at least two rows) into line items.
 
-        prev_item: dict[str, Any] | None = None
+    Self-contained – continuation rows only merge within the table – so
+    tables can be processed independently.  Returns ``(items,
+    column_mapping_debug, raw_rows)``; descriptions are fragment lists.
+    """
+    items: list[dict[str, Any]] = []
+    # Local aliases for the per-row hot loop
+    cell = _cell
+    parse_number = _parse_number
+
+    # Scan the first few rows to find the most likely header
+    header_idx, col_map = _find_header_row(table)
+    header = table[header_idx]
+    mapping_debug = {"header": header, "mapping": col_map, "header_row_index": header_idx}
+
+    if not col_map.get("description"):
+        # No description column found — skip or try heuristic
+        logger.debug("No description column identified in table header: %s", header)
+        # Try using the first column as description
+        col_map.setdefault("description", 0)
+
+    desc_idx = col_map.get("description", 0)
+    qty_idx = col_map.get("quantity")
+    uom_idx = col_map.get("uom")
+    uprice_idx = col_map.get("unit_price")
+    amount_idx = col_map.get("amount")
+    sku_idx = col_map.get("sku")
+    mpn_idx = col_map.get("mpn")
 
-        import itertools
-        for row in itertools.islice(table, header_idx + 1, None):
-            debug_info["raw_rows"].append(row)
+    prev_item: dict[str, Any] | None = None
+    raw_rows = table[header_idx + 1:]
 
-            if not row or all(not c.strip() for c in row):
-                continue
+    for row in raw_rows:
+        if not row or all(not c.strip() for c in row):
+            continue
 
-            desc = _clean_cell_value(_safe_get(row, desc_idx) or "")
-            if not desc:
-                continue
+        desc = cell(row, desc_idx)
+        if not desc:
+            continue
 
-            # Filter non-item rows
-            if _is_non_item(desc):
-                continue
+        # Filter non-item rows
+        if _is_non_item(desc):
+            continue
 
-            qty = _parse_number(_clean_cell_value(_safe_get(row, qty_idx) or ""))
-            uom_raw = _clean_cell_value(_safe_get(row, uom_idx) or "") or None
-            unit_price = _parse_number(_clean_cell_value(_safe_get(row, uprice_idx) or ""))
-            amount = _parse_number(_clean_cell_value(_safe_get(row, amount_idx) or ""))
-            sku = _clean_cell_value(_safe_get(row, sku_idx) or "") or None
-            mpn = _clean_cell_value(_safe_get(row, mpn_idx) or "") or None
-
-            # Continuation-row logic: row has description but no qty and no price
-            if qty is None and unit_price is None and amount is None:
-                if prev_item is not None:
-                    # Merge description
-                    p_item = cast(dict[str, Any], prev_item)
-                    desc = str(desc)
-                    p_item["item_description"] = f"{str(p_item.get('item_description', ''))} {desc}".strip()
-                    if sku and not p_item.get("sku"):
-                        p_item["sku"] = sku
-                    if mpn and not p_item.get("manufacturer_part_number"):
-                        p_item["manufacturer_part_number"] = mpn
-                    continue
+        qty = parse_number(cell(row, qty_idx))
+        uom_raw = cell(row, uom_idx) or None
+        unit_price = parse_number(cell(row, uprice_idx))
+        amount = parse_number(cell(row, amount_idx))
+        sku = cell(row, sku_idx) or None
+        mpn = cell(row, mpn_idx) or None
+
+        # Continuation-row logic: row has description but no qty and no price
+        if qty is None and unit_price is None and amount is None:
+            if prev_item is not None:
+                # Merge description
+                p_item = cast(dict[str, Any], prev_item)
+                p_item["item_description"].append(desc)
+                if sku and not p_item.get("sku"):
+                    p_item["sku"] = sku
+                if mpn and not p_item.get("manufacturer_part_number"):
+                    p_item["manufacturer_part_number"] = mpn
+                continue
 
-            item: dict[str, Any] = {
-                "item_description": desc,
-                "quantity": qty,
-                "uom_raw": uom_raw,
-                "unit_price": unit_price,
-                "amount": amount,
-                "sku": sku,
-                "manufacturer_part_number": mpn,
-            }
-            all_items.append(item)
-            prev_item = item
+        item: dict[str, Any] = {
+            "item_description": [desc],
+            "quantity": qty,
+            "uom_raw": uom_raw,
+            "unit_price": unit_price,
+            "amount": amount,
+            "sku": sku,
+            "manufacturer_part_number": mpn,
+        }
+        items.append(item)
+        prev_item = item
 
-    all_items = _merge_orphaned_descriptions(all_items)
-    return all_items, debug_info
+    return items, mapping_debug, raw_rows
 
 
 def extract_line_items_from_text(
@@ -315,26 +409,7 @@ def extract_line_items_from_text(
             return items, debug_info
 
     # ── Step 2: regex line matching ─────────────────────────────────
-    # Look for Fastenal borderless pattern first
-    # e.g.: "1      2     2       0   SG Model 31 H3 Eyewe 144819 1050072 195.0000 3.90"
-    fastenal_pat = re.compile(
-        r"^(?P<line_no>\d+)\s+"                 # Line No: "1"
-        r"(?P<qty_ord>\d+(?:\.\d+)?)\s+"        # Qty Ordered: "2"
-        r"(?P<qty_ship>\d+(?:\.\d+)?)\s+"       # Qty Shipped: "2"
-        r"(?P<qty_bo>\d+(?:\.\d+)?)\s+"         # Qty Backordered: "0"
-        r"(?P<desc>.+?)\s+"                     # Description: "SG Model 31 H3 Eyewe"
-        r"(?P<sku>\w[\w\-]+(?:(?:[\s\w\-]+)?\w)?)\s+" # Part No: "144819" (sometimes there's another Control No before or after)
-        r"(?P<price_per_hund>\d{1,3}(?:,\d{3})*\.\d{2,4})\s+" # Price / Hundred: "195.0000"
-        r"(?P<amount>\d{1,3}(?:,\d{3})*\.\d{2})$"            # Amount: "3.90"
-    )
-
-    line_pat = re.compile(
-        r"^(?P<desc>.{10,}?)\s+"
-        r"(?P<qty>\d+(?:\.\d+)?)\s+"
-        r"(?:(?P<uom>[A-Za-z]{1,6})\s+)?"
-        r"(?P<price>\d+(?:,\d{3})*\.\d{2})"
-    )
-
+    # Fastenal borderless rows first, then the generic line pattern
     prev_item: dict[str, Any] | None = None
 
     for line in combined.splitlines():
@@ -345,7 +420,17 @@ def extract_line_items_from_text(
         if _is_non_item(line):
             continue
 
-        m_fastenal = fastenal_pat.search(line)
+        # Both item patterns end in a price like "3.90", so a line without
+        # one can only be a description continuation – skip the heavy
+        # regexes.  The "." test rejects most prose before the regex starts.
+        if "." not in line or not _RE_PRICE.search(line):
+            if prev_item and len(line) > 3:
+                p_item = cast(dict[str, Any], prev_item)
+                p_item["item_description"].append(line)
+            continue
+
+        # Fastenal rows start with the line number
+        m_fastenal = _FASTENAL_LINE_RE.search(line) if line[0].isdecimal() else None
         if m_fastenal:
             desc = _clean_cell_value(m_fastenal.group("desc"))
             qty = _parse_number(m_fastenal.group("qty_ship"))
@@ -371,7 +456,7 @@ def extract_line_items_from_text(
             debug_info["matched_lines"].append(line)
 
             item: dict[str, Any] = {
-                "item_description": desc,
+                "item_description": [desc],
                 "quantity": qty,
                 "uom_raw": "EA", # Fastenal typically implies EA or PC for these
                 "unit_price": unit_price,
@@ -383,7 +468,7 @@ def extract_line_items_from_text(
             prev_item = item
             continue
 
-        m = line_pat.match(line)  # type: ignore
+        m = _TEXT_LINE_RE.match(line)
         if m:
             desc = _clean_cell_value(m.group("desc"))
             qty = _parse_number(m.group("qty"))
@@ -393,7 +478,7 @@ def extract_line_items_from_text(
             debug_info["matched_lines"].append(line)
 
             item: dict[str, Any] = {
-                "item_description": desc,
+                "item_description": [desc],
                 "quantity": qty,
                 "uom_raw": uom.strip().upper() if uom else None,
                 "unit_price": price,
@@ -403,11 +488,6 @@ def extract_line_items_from_text(
             }
             all_items.append(item)
             prev_item = item
-        else:
-            if prev_item and not re.search(r"\d+\.\d{2}", line) and len(line) > 3:
-                p_item = cast(dict[str, Any], prev_item)
-                p_item["item_description"] = f"{str(p_item.get('item_description', ''))} {line}".strip()
-                continue
 
     all_items = _merge_orphaned_descriptions(all_items)
     return all_items, debug_info
@@ -420,9 +500,9 @@ def _detect_pipe_tables_in_text(text: str) -> list[list[list[str]]]:
 
     for line in text.splitlines():
         stripped = line.strip()
-        if stripped.startswith("|") and stripped.endswith("|") and stripped.count("|") >= 3:
+        if stripped[:1] == "|" and stripped[-1] == "|" and stripped.count("|") >= 3:
             current_table_lines.append(stripped)
-        elif _is_pipe_separator(stripped) and current_table_lines:
+        elif current_table_lines and _is_pipe_separator(stripped):
             current_table_lines.append(stripped)
         else:
             if len(current_table_lines) >= 2:
@@ -443,9 +523,12 @@ def _detect_pipe_tables_in_text(text: str) -> list[list[list[str]]]:
 def _is_pipe_separator(line: str) -> bool:
     """Check if line is a table separator like |---|---|."""
     stripped = line.strip().strip("|").strip()
-    if not stripped:
+    # A separator can only start with - : or | – rejects content rows
+    # without scanning them
+    if not stripped or stripped[0] not in "-:|":
         return False
-    return bool(re.match(r"^[\s\-:|]+$", stripped))
+    # Only dashes, colons, pipes and whitespace may remain
+    return not stripped.replace("-", "").replace(":", "").replace("|", "").strip()
 
 
 def _parse_pipe_rows(lines: list[str]) -> list[list[str]]:
@@ -471,33 +554,41 @@ def _merge_orphaned_descriptions(items: list[dict[str, Any]]) -> list[dict[str,
     If an item has a description, but NO quantity, NO price, and NO amount,
     it is almost certainly an orphaned description line belonging to the item above it.
     This safely merges the text up and removes the row.
+
+    Descriptions arrive as lists of fragments (see the extractors) and are
+    joined into strings here.
     """
     if not items:
         return items
 
     merged: list[dict[str, Any]] = []
     for item in items:
-        # Check if it's an orphan
-        is_orphan = (
-            bool(item.get("item_description")) and 
-            item.get("quantity") is None and 
-            item.get("unit_price") is None and 
-            item.get("amount") is None and
-            item.get("manufacturer_part_number") is None
-        )
-        
-        if is_orphan and merged:
+        # Orphan: has a description but no qty / price / amount / MPN.
+        # Checked cheapest-first so real items exit on their first value.
+        if (
+            merged
+            and item.get("quantity") is None
+            and item.get("unit_price") is None
+            and item.get("amount") is None
+            and item.get("manufacturer_part_number") is None
+            and any(item["item_description"])
+        ):
+            parent = merged[-1]
             # Append description to the active parent above
-            merged[-1]["item_description"] = f"{merged[-1]['item_description']} {item['item_description']}".strip()
-            
+            parent["item_description"].extend(item["item_description"])
+
             # If the orphan somehow snagged a SKU or UOM, carry it up
-            if item.get("sku") and not merged[-1].get("sku"):
-                merged[-1]["sku"] = item["sku"]
-            if item.get("uom_raw") and not merged[-1].get("uom_raw"):
-                merged[-1]["uom_raw"] = item["uom_raw"]
+            if item.get("sku") and not parent.get("sku"):
+                parent["sku"] = item["sku"]
+            if item.get("uom_raw") and not parent.get("uom_raw"):
+                parent["uom_raw"] = item["uom_raw"]
         else:
             merged.append(item)
-            
+
+    # Join each item's fragments once, instead of re-concatenating the
+    # growing description for every continuation line
+    for item in merged:
+        item["item_description"] = " ".join(filter(None, item["item_description"]))
     return merged
 
 
@@ -536,10 +627,11 @@ def extract_line_items(extraction: dict[str, Any]) -> tuple[list[dict[str, Any]]
     return [], debug_info
 
 
-def _safe_get(row: list[str], idx: int | None) -> str | None:
-    if idx is None:
-        return None
-    if idx < 0 or idx >= len(row):
-        return None
+def _cell(row: list[str], idx: int | None) -> str:
+    """Cleaned value of ``row[idx]``, or ``""`` when missing or blank."""
+    if idx is None or idx < 0 or idx >= len(row):
+        return ""
     val = row[idx]
-    return val if val.strip() else None
+    if not val or val.isspace():
+        return ""
+    return _clean_cell_value(val)
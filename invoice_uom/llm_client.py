@@ -10,7 +10,10 @@ import json
 import logging
 import os
 import random
+import re
+import threading
 import time
+from collections import OrderedDict
 from typing import Any
 
 from invoice_uom import config
@@ -18,6 +21,12 @@ from invoice_uom.rate_limit import get_limiter
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson  # type: ignore[import-untyped]
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
 # ── expected output schema for UOM/pack resolution ──────────────────────────
 _UOM_RESPONSE_SCHEMA = {
     "type": "object",
@@ -34,6 +43,8 @@ _UOM_RESPONSE_SCHEMA = {
 class LLMCallResult:
     """Outcome of a single LLM call attempt."""
 
+    __slots__ = ("status", "data", "reason", "attempts")
+
     def __init__(
         self,
         status: str = "not_needed",
@@ -55,6 +66,13 @@ class LLMCallResult:
         }
 
 
+# Successful answers keyed by (description, mpn, source URLs) so duplicate
+# line items don't spend LLM budget twice.  Failures are never cached.
+_LLM_CACHE: OrderedDict[tuple[str, str, tuple[str, ...]], LLMCallResult] = OrderedDict()
+_LLM_CACHE_MAX = 1024
+_llm_cache_lock = threading.Lock()
+
+
 def resolve_uom_with_llm(
     description: str,
     snippets: list[dict[str, str]],
@@ -78,6 +96,24 @@ def resolve_uom_with_llm(
     if not snippets:
         return LLMCallResult(status="not_needed", reason="no snippets provided")
 
+    cache_key = (
+        description.strip().lower(),
+        mpn or "",
+        tuple(s["url"] for s in snippets[:3]),
+    )
+    with _llm_cache_lock:
+        cached = _LLM_CACHE.get(cache_key)
+        if cached is not None:
+            _LLM_CACHE.move_to_end(cache_key)
+            # A fresh copy, so callers can't mutate the cached answer and the
+            # evidence shows no call was spent on this item
+            return LLMCallResult(
+                status=cached.status,
+                data=dict(cached.data),
+                reason="cached result",
+                attempts=0,
+            )
+
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
         return LLMCallResult(status="failed_other", reason="GEMINI_API_KEY not set")
@@ -87,9 +123,10 @@ def resolve_uom_with_llm(
     if limiter.daily_remaining <= 0:
         return LLMCallResult(status="skipped_rate_limit", reason="daily LLM budget exhausted")
 
-    # Build a concise prompt
+    # Build a concise prompt; collapsing whitespace in the scraped snippets
+    # trims tokens (and so latency / cost) without changing their content
     snippet_text = "\n---\n".join(
-        f"Source: {s['url']}\n{s['snippet'][:500]}" for s in snippets[:3]
+        f"Source: {s['url']}\n{' '.join(s['snippet'][:500].split())}" for s in snippets[:3]
     )
     prompt = (
         "You are a product-data extraction assistant.\n"
@@ -121,7 +158,12 @@ def resolve_uom_with_llm(
             )
         try:
             data = _call_gemini(api_key, prompt)
-            return LLMCallResult(status="success", data=data, attempts=attempt)
+            result = LLMCallResult(status="success", data=data, attempts=attempt)
+            with _llm_cache_lock:
+                _LLM_CACHE[cache_key] = result
+                if len(_LLM_CACHE) > _LLM_CACHE_MAX:
+                    _LLM_CACHE.popitem(last=False)
+            return result
         except _RateLimitError as exc:
             wait = _backoff(attempt, exc.retry_after)
             logger.warning("Gemini 429 (attempt %d/%d), backing off %.1fs", attempt, max_retries, wait)
@@ -147,31 +189,52 @@ class _RateLimitError(Exception):
         self.retry_after = retry_after
 
 
+# One client per API key so consecutive calls reuse its HTTP connection pool
+# (no TCP/TLS handshake per call); the generation config never changes.
+_CLIENTS: dict[str, Any] = {}
+_GEN_CONFIG: Any = None
+_clients_lock = threading.Lock()
+
+
+def _get_client(api_key: str) -> tuple[Any, Any]:
+    """Return the cached ``(genai.Client, GenerateContentConfig)`` for *api_key*."""
+    global _GEN_CONFIG
+    client = _CLIENTS.get(api_key)
+    if client is None:
+        with _clients_lock:
+            client = _CLIENTS.get(api_key)
+            if client is None:
+                try:
+                    from google import genai  # type: ignore[import-untyped]
+                except ImportError as exc:
+                    raise RuntimeError("google-genai is not installed") from exc
+                if _GEN_CONFIG is None:
+                    _GEN_CONFIG = genai.types.GenerateContentConfig(
+                        temperature=config.LLM_TEMPERATURE,
+                        max_output_tokens=256,
+                        # JSON mode: bare JSON back, no markdown fences
+                        response_mime_type="application/json",
+                    )
+                client = _CLIENTS[api_key] = genai.Client(api_key=api_key)
+    return client, _GEN_CONFIG
+
+
 def _call_gemini(api_key: str, prompt: str) -> dict[str, Any]:
     """Make a single Gemini API call and parse the JSON response."""
-    try:
-        from google import genai  # type: ignore[import-untyped]
-    except ImportError as exc:
-        raise RuntimeError("google-genai is not installed") from exc
-
-    client = genai.Client(api_key=api_key)
+    client, gen_config = _get_client(api_key)
 
     try:
         response = client.models.generate_content(
             model=config.GEMINI_MODEL,
             contents=prompt,
-            config=genai.types.GenerateContentConfig(
-                temperature=config.LLM_TEMPERATURE,
-                max_output_tokens=256,
-            ),
+            config=gen_config,
         )
     except Exception as exc:
         exc_str = str(exc).lower()
         if "429" in exc_str or "resource_exhausted" in exc_str:
             retry_after = None
             # Try to parse Retry-After
-            import re as _re
-            m = _re.search(r"retry.after[:\s]+(\d+)", exc_str)
+            m = re.search(r"retry.after[:\s]+(\d+)", exc_str)
             if m:
                 retry_after = float(m.group(1))
             raise _RateLimitError(str(exc), retry_after) from exc
@@ -179,17 +242,19 @@ def _call_gemini(api_key: str, prompt: str) -> dict[str, Any]:
 
     text = response.text.strip()
 
-    # Strip markdown fences if present
+    # Strip markdown fences if present (JSON mode shouldn't emit them, but
+    # the check is free when they're absent)
     if text.startswith("```"):
         lines = text.splitlines()
         text = "\n".join(lines[1:-1] if lines[-1].strip() == "```" else lines[1:])
 
-    data: dict[str, Any] = json.loads(text)
+    data: dict[str, Any] = orjson.loads(text) if _HAS_ORJSON else json.loads(text)
     return data
 
 
 def _backoff(attempt: int, retry_after: float | None = None) -> float:
     """Exponential backoff with jitter."""
+    jitter = random.random()
     if retry_after and retry_after > 0:
-        return retry_after + random.uniform(0, 1)
-    return min(60, (2 ** attempt) + random.uniform(0, 1))
+        return retry_after + jitter
+    return min(60.0, (1 << attempt) + jitter)
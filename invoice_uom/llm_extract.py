@@ -2,18 +2,28 @@
 
 Used when deterministic extraction yields 0 line items or clearly
 garbage output.  Sends raw text to Gemini and asks for structured
-extraction of supplier name + line items.
+extraction of supplier name + line items.  ``BatchedLLMExtractor``
+combines the fallback texts of several PDFs into one request.
 """
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
 import json
 import logging
 import os
+import random
 import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
+from invoice_uom import config
+
 # Load .env if python-dotenv is available
 try:
     from dotenv import load_dotenv  # type: ignore[import-untyped]
@@ -26,6 +36,12 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson  # type: ignore[import-untyped]
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
 _EXTRACT_PROMPT = """You are an elite invoice data extraction expert. Your job is to extract highly precise line-item data and supplier information from messy, OCR-extracted invoice text (which may contain HTML tables or raw Markdown).
 
 Your output MUST be a valid JSON object matching this exact schema:
@@ -77,7 +93,95 @@ OUTPUT JSON:
 RAW INVOICE TEXT:
 """
 
-_MAX_TEXT_LENGTH = 12000  # Increased token limit since prompt is longer and we support HTML
+_MAX_TEXT_LENGTH = config.LLM_EXTRACT_MAX_CHARS  # Increased token limit since prompt is longer and we support HTML
+
+_MODEL = "gemini-2.0-flash"
+# Bump when the prompt/response schema or the validation below changes so
+# stale on-disk answers are not reused.
+_SCHEMA_VERSION = "1"
+
+# Rate-limit retry policy: decorrelated jitter between _RETRY_BASE and
+# _RETRY_CAP seconds, giving up after _MAX_ATTEMPTS calls or once the total
+# sleep would exceed _RETRY_BUDGET.
+_MAX_ATTEMPTS = 5
+_RETRY_BASE = 1.0
+_RETRY_CAP = 60.0
+_RETRY_BUDGET = 180.0
+_FENCE_HEAD = re.compile(r"^```(?:json)?\s*\n?")
+_FENCE_TAIL = re.compile(r"\n?```\s*$")
+_RE_RETRY_AFTER = re.compile(r"retry.after[:\s]+(\d+(?:\.\d+)?)")
+
+# Multi-document requests (see ``extract_many_with_llm``)
+_BATCH_SEPARATOR = "\n---DOC|||SEP|||BOUNDARY---\n"
+_BATCH_MAX_DOCS = 8
+_BATCH_MAX_WAIT_S = 2.0
+# Keeps the combined reply well inside the model's output-token limit
+_BATCH_MAX_CHARS = 24000
+_BATCH_INSTRUCTIONS = """The text below contains {n} separate invoices separated by the line
+`---DOC|||SEP|||BOUNDARY---`. Each invoice starts with a `DOCUMENT: <name>` line.
+Extract every invoice independently using the rules above and return a JSON array
+with exactly one object per invoice, in the same order. Each object has the
+invoice's name in "pdf_name" plus its "supplier_name" and "line_items".
+
+"""
+
+
+# ── persistent response cache ───────────────────────────────────────────────
+def _cache_enabled() -> bool:
+    return os.environ.get("INVOICE_UOM_GEMINI_CACHE", "") == "1"
+
+
+def _cache_key(prompt: str) -> str:
+    return hashlib.sha256(f"{_MODEL}\0{_SCHEMA_VERSION}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+@functools.lru_cache(maxsize=256)
+def _read_cached(key: str) -> bytes | None:
+    """Raw JSON for *key* from the on-disk cache, or None on a miss."""
+    try:
+        return (config.GEMINI_CACHE_DIR / f"{key}.json").read_bytes()
+    except OSError:
+        return None
+
+
+def _load_cached(key: str) -> dict[str, Any] | None:
+    raw = _read_cached(key)
+    if raw is None:
+        return None
+    try:
+        # Parsed per hit so callers can't mutate the memoised copy.
+        return _loads(raw)
+    except json.JSONDecodeError:  # orjson's error subclasses it
+        return None
+
+
+def _store_cached(key: str, result: dict[str, Any]) -> None:
+    """Atomically write *result* so concurrent workers never see a partial file."""
+    path = config.GEMINI_CACHE_DIR / f"{key}.json"
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(_dumps(result))
+        os.replace(tmp, path)
+    except OSError as exc:
+        logger.debug("Could not write Gemini cache entry %s: %s", key, exc)
+        return
+    # A miss for this key may have been memoised before the write.
+    _read_cached.cache_clear()
+
+
+def _run_sync(coro: Any) -> Any:
+    """Run *coro* to completion from synchronous code.
+
+    ``asyncio.run`` refuses to start inside a running loop, so when called
+    from one the coroutine gets its own loop on a helper thread instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-extract") as pool:
+        return pool.submit(asyncio.run, coro).result()
 
 
 def extract_with_llm(
@@ -86,129 +190,458 @@ def extract_with_llm(
 ) -> dict[str, Any]:
     """Send raw text to Gemini for structured extraction.
 
+    Synchronous wrapper around :func:`extract_with_llm_async` for
+    single-file callers.  Safe to call from inside a running event loop
+    (e.g. a notebook); the request then runs on a helper thread.
+
     Returns
     -------
     dict with keys: supplier_name, line_items, llm_extraction_used
     """
-    api_key = os.environ.get("GEMINI_API_KEY", "")
-    if not api_key:
-        logger.warning("GEMINI_API_KEY not set, skipping LLM extraction fallback")
-        return {"supplier_name": "", "line_items": [], "llm_extraction_used": False}
+    return _run_sync(extract_with_llm_async(raw_text, pdf_name))
 
-    # Truncate text if too long
-    text = raw_text[:_MAX_TEXT_LENGTH] if len(raw_text) > _MAX_TEXT_LENGTH else raw_text
 
-    prompt = _EXTRACT_PROMPT + text
+def extract_batch(
+    texts: list[tuple[str, str]],
+    concurrency: int | None = None,
+) -> list[dict[str, Any]]:
+    """Run the LLM fallback for several ``(pdf_name, raw_text)`` pairs at once.
 
-    try:
-        import time
-        from google import genai  # type: ignore[import-untyped]
+    Requests overlap on the network, with at most *concurrency* in flight
+    (default ``GEMINI_CONCURRENCY`` or 8).  Results are returned in input
+    order.
+    """
+    if concurrency is None:
+        concurrency = int(os.environ.get("GEMINI_CONCURRENCY", "8"))
 
-        client = genai.Client(api_key=api_key)
+    async def _run() -> list[dict[str, Any]]:
+        # Created inside the running loop; a module-level semaphore would be
+        # bound to whichever loop first waited on it.
+        sem = asyncio.Semaphore(max(1, concurrency))
 
-        from pydantic import BaseModel, Field  # type: ignore[import-not-found, import-untyped]
+        async def _one(pdf_name: str, raw_text: str) -> dict[str, Any]:
+            async with sem:
+                return await extract_with_llm_async(raw_text, pdf_name)
 
-        class LineItem(BaseModel):
-            item_description: str
-            manufacturer_part_number: str | None
-            sku: str | None
-            quantity: float | None
-            uom_raw: str | None
-            unit_price: float | None
-            amount: float | None
+        return await asyncio.gather(*(_one(name, raw) for name, raw in texts))
 
-        class InvoiceData(BaseModel):
-            supplier_name: str
-            line_items: list[LineItem]
+    return _run_sync(_run())
 
-        # Retry with backoff for rate limit errors
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = client.models.generate_content(
-                    model="gemini-2.0-flash",
-                    contents=prompt,
-                    config=genai.types.GenerateContentConfig(
-                        temperature=0.1,
-                        max_output_tokens=8192,
-                        response_mime_type="application/json",
-                        response_schema=InvoiceData,
-                    ),
-                )
-                break  # Success
-            except Exception as api_err:
-                err_str = str(api_err)
-                if "429" in err_str or "RESOURCE_EXHAUSTED" in err_str:
-                    wait_time = 30 * (2 ** attempt)  # 30s, 60s, 120s
-                    logger.info(
-                        "Rate limited (attempt %d/%d), waiting %ds before retry",
-                        attempt + 1, max_retries, wait_time,
-                    )
-                    time.sleep(wait_time)
-                    if attempt == max_retries - 1:
-                        raise
-                else:
-                    raise
-
-        response_text = response.text or ""
 
-        try:
-            with open("gemini_raw_input.txt", "w", encoding="utf-8") as f:
-                f.write(prompt)
-            with open("gemini_raw_output_post.json", "w", encoding="utf-8") as f:
-                f.write(response_text)
-        except Exception:
-            pass
+def extract_many_with_llm(docs: list[tuple[str, str]]) -> list[dict[str, Any]]:
+    """Extract several ``(pdf_name, raw_text)`` invoices with one Gemini call.
+
+    The texts are joined with ``_BATCH_SEPARATOR`` and the model returns one
+    result per document, keyed by name.  When the reply doesn't map back
+    one-to-one onto the submitted names, the documents are re-sent as
+    individual requests via :func:`extract_batch`.  Results are returned in
+    input order.
+    """
+    if len(docs) < 2:
+        return [extract_with_llm(raw, name) for name, raw in docs]
+    api_key = os.environ.get("GEMINI_API_KEY", "")
+    if not api_key:
+        logger.warning("GEMINI_API_KEY not set, skipping LLM extraction fallback")
+        return [_empty_result() for _ in docs]
+
+    texts = [raw[:_MAX_TEXT_LENGTH] for _, raw in docs]
+    keys = [_cache_key(_EXTRACT_PROMPT + text) for text in texts]
+    use_cache = _cache_enabled()
+    results: list[dict[str, Any] | None] = [
+        _load_cached(key) if use_cache else None for key in keys
+    ]
+    todo = [i for i, r in enumerate(results) if r is None]
+
+    names = [docs[i][0] for i in todo]
+    batch = None
+    if len(todo) > 1 and len(set(names)) == len(names):
+        batch = _run_sync(_generate_many(api_key, [(docs[i][0], texts[i]) for i in todo]))
+    if batch is not None:
+        for i in todo:
+            results[i] = batch[docs[i][0]]
+            if use_cache:
+                _store_cached(keys[i], batch[docs[i][0]])
+    elif todo:
+        for i, result in zip(todo, extract_batch([docs[i] for i in todo])):
+            results[i] = result
+    return results  # type: ignore[return-value]
+
+
+async def _generate_many(
+    api_key: str,
+    docs: list[tuple[str, str]],
+) -> dict[str, dict[str, Any]] | None:
+    """One request for several ``(pdf_name, text)`` pairs.
+
+    Returns results keyed by name, or None if the call failed or the reply
+    doesn't cover exactly the submitted names.
+    """
+    contents = _BATCH_INSTRUCTIONS.format(n=len(docs)) + _BATCH_SEPARATOR.join(
+        f"DOCUMENT: {name}\n{text}" for name, text in docs
+    )
+    try:
+        data = _loads(await _request(api_key, _EXTRACT_PROMPT + contents, _batch_schema()))
+    except Exception as exc:
+        logger.warning("Batched LLM extraction of %d documents failed: %s", len(docs), exc)
+        return None
 
-        # Strip markdown code fencing if present
-        response_text = re.sub(r"^```(?:json)?\s*\n?", "", response_text.strip())
-        response_text = re.sub(r"\n?```\s*$", "", response_text.strip())
+    by_name = {
+        str(entry.get("pdf_name", "")): entry
+        for entry in (data if isinstance(data, list) else [])
+        if isinstance(entry, dict)
+    }
+    if len(by_name) != len(docs) or set(by_name) != {name for name, _ in docs}:
+        logger.warning(
+            "Batched LLM reply didn't match the %d submitted documents, retrying individually",
+            len(docs),
+        )
+        return None
 
-        data = json.loads(response_text)
+    results: dict[str, dict[str, Any]] = {}
+    for name, entry in by_name.items():
+        results[name] = {
+            "supplier_name": entry.get("supplier_name", "") or "",
+            "line_items": _validate_items(entry.get("line_items", []) or []),
+            "llm_extraction_used": True,
+        }
+        logger.info(
+            "LLM extraction for %s: supplier=%r, %d items (batched)",
+            name, results[name]["supplier_name"], len(results[name]["line_items"]),
+        )
+    return results
 
-        supplier = data.get("supplier_name", "") or ""
-        items = data.get("line_items", []) or []
 
-        # Validate items structure
-        validated_items: list[dict[str, Any]] = []
-        for item in items:
-            if not isinstance(item, dict):
-                continue
-            desc = item.get("item_description", "")
-            if not desc or len(str(desc)) < 3:
-                continue
-            validated_items.append({
-                "item_description": str(desc).strip(),
-                "manufacturer_part_number": item.get("manufacturer_part_number"),
-                "sku": item.get("sku"),
-                "quantity": _to_float(item.get("quantity")),
-                "uom_raw": item.get("uom_raw"),
-                "unit_price": _to_float(item.get("unit_price")),
-                "amount": _to_float(item.get("amount")),
-            })
+async def extract_with_llm_async(
+    raw_text: str,
+    pdf_name: str,
+) -> dict[str, Any]:
+    """Coroutine form of :func:`extract_with_llm`."""
+    api_key = os.environ.get("GEMINI_API_KEY", "")
+    if not api_key:
+        logger.warning("GEMINI_API_KEY not set, skipping LLM extraction fallback")
+        return _empty_result()
+
+    # Truncate text if too long
+    text = raw_text[:_MAX_TEXT_LENGTH] if len(raw_text) > _MAX_TEXT_LENGTH else raw_text
+
+    prompt = _EXTRACT_PROMPT + text
+
+    key = _cache_key(prompt)
+    use_cache = _cache_enabled()
+    if use_cache:
+        cached = _load_cached(key)
+        if cached is not None:
+            logger.info("LLM extraction for %s served from cache", pdf_name)
+            return cached
+
+    # Single-flight: concurrent callers with the same prompt (duplicate
+    # invoices in one batch, or on other threads / event loops) share one
+    # request instead of each paying for it.
+    while True:
+        with _inflight_lock:
+            shared = _inflight.get(key)
+            owner = shared is None
+            if owner:
+                shared = _inflight[key] = Future()
+        if owner:
+            task = asyncio.ensure_future(
+                _generate(api_key, text, prompt, pdf_name, key if use_cache else None)
+            )
+            task.add_done_callback(functools.partial(_settle_inflight, key, shared))
+            # Shielded so cancelling the owner doesn't cancel the request.
+            result = await asyncio.shield(task)
+            break
+        try:
+            # Shielded so one cancelled waiter doesn't cancel the shared future.
+            result = await asyncio.shield(asyncio.wrap_future(shared))  # type: ignore[arg-type]
+            break
+        except _OwnerCancelled:
+            continue  # owner's loop went away mid-request; take over
+    return {**result, "line_items": [dict(item) for item in result["line_items"]]}
+
+
+async def _generate(
+    api_key: str,
+    text: str,
+    prompt: str,
+    pdf_name: str,
+    store_key: str | None,
+) -> dict[str, Any]:
+    """Call Gemini for *text* and validate the reply; never raises."""
+    try:
+        response_text = await _request(api_key, prompt, _invoice_schema())
+        data = _loads(response_text)
+
+        supplier = data.get("supplier_name", "") or ""
+        validated_items = _validate_items(data.get("line_items", []) or [])
 
         logger.info(
             "LLM extraction for %s: supplier=%r, %d items",
             pdf_name, supplier, len(validated_items),
         )
 
-        return {
+        result = {
             "supplier_name": supplier,
             "line_items": validated_items,
             "llm_extraction_used": True,
         }
+        if store_key is not None:
+            _store_cached(store_key, result)
+        return result
 
     except json.JSONDecodeError as exc:
         logger.warning("LLM returned invalid JSON for %s: %s", pdf_name, exc)
-        return {"supplier_name": "", "line_items": [], "llm_extraction_used": False}
+        return _empty_result()
     except Exception as exc:
         logger.error("LLM extraction failed for %s: %s: %s", pdf_name, type(exc).__name__, exc)
+        logger.debug("Failed extraction prompt for %s:\n%s", pdf_name, prompt)
+        return _empty_result()
+
+
+async def _request(api_key: str, prompt: str, schema: Any) -> str:
+    """Send *prompt* and return the de-fenced reply.
+
+    Raises on API errors once the rate-limit retries are exhausted.
+    """
+    from google import genai  # type: ignore[import-untyped]
+
+    client = genai.Client(api_key=api_key)
+    config_ = genai.types.GenerateContentConfig(
+        temperature=0.1,
+        max_output_tokens=8192,
+        response_mime_type="application/json",
+        response_schema=schema,
+    )
+
+    # Retry rate-limit errors with decorrelated jitter, preferring the
+    # server's own Retry-After hint when it sends one.
+    wait = _RETRY_BASE
+    waited = 0.0
+    for attempt in range(1, _MAX_ATTEMPTS + 1):
+        try:
+            response = await client.aio.models.generate_content(
+                model=_MODEL,
+                contents=prompt,
+                config=config_,
+            )
+            break  # Success
+        except Exception as api_err:
+            if not _is_rate_limited(api_err) or attempt == _MAX_ATTEMPTS:
+                raise
+            hinted = _retry_after(api_err)
+            wait = hinted if hinted is not None else _next_wait(wait)
+            if waited + wait > _RETRY_BUDGET:
+                raise
+            logger.info(
+                "Rate limited (attempt %d/%d), waiting %.1fs before retry",
+                attempt, _MAX_ATTEMPTS, wait,
+            )
+            await asyncio.sleep(wait)
+            waited += wait
+
+    response_text = response.text or ""
+    # Logged rather than dumped to files: requests run concurrently on the
+    # event loop, and fixed file names would be overwritten by each other.
+    logger.debug("Gemini prompt:\n%s", prompt)
+    logger.debug("Gemini raw reply:\n%s", response_text)
+
+    # Strip markdown code fencing if present
+    response_text = _FENCE_HEAD.sub("", response_text.strip())
+    return _FENCE_TAIL.sub("", response_text.strip())
+
+
+def _validate_items(items: list[Any]) -> list[dict[str, Any]]:
+    """Keep well-formed items with a real description, coercing numbers."""
+    validated_items: list[dict[str, Any]] = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        desc = item.get("item_description", "")
+        if not desc or len(str(desc)) < 3:
+            continue
+        validated_items.append({
+            "item_description": str(desc).strip(),
+            "manufacturer_part_number": item.get("manufacturer_part_number"),
+            "sku": item.get("sku"),
+            "quantity": _to_float(item.get("quantity")),
+            "uom_raw": item.get("uom_raw"),
+            "unit_price": _to_float(item.get("unit_price")),
+            "amount": _to_float(item.get("amount")),
+        })
+    return validated_items
+
+
+def _empty_result() -> dict[str, Any]:
+    return {"supplier_name": "", "line_items": [], "llm_extraction_used": False}
+
+
+@functools.lru_cache(maxsize=1)
+def _invoice_schema() -> type:
+    """Pydantic response schema, built once on first use."""
+    from pydantic import BaseModel  # type: ignore[import-not-found, import-untyped]
+
+    class LineItem(BaseModel):
+        item_description: str
+        manufacturer_part_number: str | None
+        sku: str | None
+        quantity: float | None
+        uom_raw: str | None
+        unit_price: float | None
+        amount: float | None
+
+    class InvoiceData(BaseModel):
+        supplier_name: str
+        line_items: list[LineItem]
+
+    return InvoiceData
+
+
+@functools.lru_cache(maxsize=1)
+def _batch_schema() -> Any:
+    """Response schema for multi-document requests: one entry per invoice."""
+    class BatchInvoiceData(_invoice_schema()):  # type: ignore[misc, valid-type]
+        pdf_name: str
+
+    return list[BatchInvoiceData]
+
+
+def _loads(data: str | bytes) -> Any:
+    return orjson.loads(data) if _HAS_ORJSON else json.loads(data)
+
+
+def _dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj) if _HAS_ORJSON else json.dumps(obj).encode("utf-8")
+
+
+# In-flight extraction requests, keyed by prompt hash.  Process-wide: every
+# sync entry point runs its own event loop (``_run_sync``), so callers on
+# different threads can only meet through thread-safe futures.
+_inflight: dict[str, Future[dict[str, Any]]] = {}
+_inflight_lock = threading.Lock()
+
+
+class _OwnerCancelled(Exception):
+    """The request a caller was waiting on was cancelled by its owner."""
+
+
+def _settle_inflight(key: str, shared: Future[dict[str, Any]], task: asyncio.Future[Any]) -> None:
+    """Publish the owner's outcome to every waiter and free the slot."""
+    with _inflight_lock:
+        if _inflight.get(key) is shared:
+            del _inflight[key]
+    if task.cancelled():
+        shared.set_exception(_OwnerCancelled())
+    elif task.exception() is not None:
+        shared.set_exception(task.exception())  # type: ignore[arg-type]
+    else:
+        shared.set_result(task.result())
+
+
+# ── cross-PDF batching ──────────────────────────────────────────────────────
+class BatchedLLMExtractor:
+    """Coalesce LLM fallback requests from several PDFs into shared calls.
+
+    Submissions are buffered until *max_docs* are waiting, their text
+    reaches *max_chars*, or *max_wait* seconds pass since the first one;
+    the buffer is then sent through :func:`extract_many_with_llm` on a
+    background thread.
+
+    Parameters
+    ----------
+    max_docs : int
+        Flush once this many documents are buffered.
+    max_wait : float
+        Flush this many seconds after the first buffered submission.
+    max_chars : int
+        Flush once the buffered (truncated) text reaches this length.
+    """
+
+    def __init__(
+        self,
+        max_docs: int = _BATCH_MAX_DOCS,
+        max_wait: float = _BATCH_MAX_WAIT_S,
+        max_chars: int = _BATCH_MAX_CHARS,
+    ) -> None:
+        self.max_docs = max_docs
+        self.max_wait = max_wait
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._pending: list[tuple[str, str, Future[dict[str, Any]]]] = []
+        self._chars = 0
+        self._timer: threading.Timer | None = None
+
+    def submit(self, pdf_name: str, raw_text: str) -> Future[dict[str, Any]]:
+        """Queue one document; the future resolves to its extraction result."""
+        future: Future[dict[str, Any]] = Future()
+        with self._lock:
+            self._pending.append((pdf_name, raw_text, future))
+            self._chars += min(len(raw_text), _MAX_TEXT_LENGTH)
+            if len(self._pending) >= self.max_docs or self._chars >= self.max_chars:
+                batch = self._take()
+            else:
+                batch = []
+                if self._timer is None:
+                    self._timer = threading.Timer(self.max_wait, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if batch:
+            self._dispatch(batch)
+        return future
+
+    def flush(self) -> None:
+        """Send whatever is buffered now."""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._dispatch(batch)
+
+    def _take(self) -> list[tuple[str, str, Future[dict[str, Any]]]]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._chars = self._pending, [], 0
+        return batch
+
+    def _dispatch(self, batch: list[tuple[str, str, Future[dict[str, Any]]]]) -> None:
+        threading.Thread(target=self._run, args=(batch,), name="llm-batch", daemon=True).start()
+
+    @staticmethod
+    def _run(batch: list[tuple[str, str, Future[dict[str, Any]]]]) -> None:
         try:
-            with open("gemini_api_error.txt", "w", encoding="utf-8") as f:
-                f.write(f"PROMPT:\\n{prompt}\\n\\nERROR: {type(exc).__name__}: {exc}")
-        except Exception:
-            pass
-        return {"supplier_name": "", "line_items": [], "llm_extraction_used": False}
+            results = extract_many_with_llm([(name, raw) for name, raw, _ in batch])
+        except Exception as exc:
+            for _, _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+# ── rate-limit retry helpers ────────────────────────────────────────────────
+def _is_rate_limited(exc: Exception) -> bool:
+    err_str = str(exc)
+    return "429" in err_str or "RESOURCE_EXHAUSTED" in err_str
+
+
+def _retry_after(exc: Exception) -> float | None:
+    """Seconds the server asked us to wait, from headers or the error text."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if headers:
+        for name in ("retry-after", "x-ratelimit-reset"):
+            try:
+                value = float(headers.get(name))
+            except (TypeError, ValueError):
+                continue
+            if value > 1e9:  # epoch timestamp rather than a delay
+                value -= time.time()
+            return max(0.0, value)
+    m = _RE_RETRY_AFTER.search(str(exc).lower())
+    return float(m.group(1)) if m else None
+
+
+def _next_wait(prev: float) -> float:
+    """Decorrelated jitter: uniform in [base, 3 * prev], capped."""
+    return min(_RETRY_CAP, random.uniform(_RETRY_BASE, prev * 3))
 
 
 def _to_float(val: Any) -> float | None:
@@ -16,55 +16,182 @@ Lookup flow:
 
 from __future__ import annotations
 
+import functools
 import logging
 import re
-from typing import Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Iterable
 from urllib.parse import quote_plus
 
 from invoice_uom import config
 from invoice_uom.cache import LookupCache, LookupResult
 from invoice_uom.llm_client import LLMCallResult, resolve_uom_with_llm
+from invoice_uom.rate_limit import host_limiter
 from invoice_uom.uom_normalize import parse_uom_and_pack
 
 logger = logging.getLogger(__name__)
 
+try:
+    from bs4 import BeautifulSoup  # type: ignore[import-untyped]
+    _HAS_BS4 = True
+except ImportError:
+    _HAS_BS4 = False
+
+# lxml's C parser is several times faster than the pure-Python html.parser
+# on full retailer pages; fall back when it isn't installed.
+try:
+    import lxml  # type: ignore[import-untyped]  # noqa: F401
+    _BS4_PARSER = "lxml"
+except ImportError:
+    _BS4_PARSER = "html.parser"
+
+_SEARCH_URL = "https://html.duckduckgo.com/html/?q={}"
+_SEARCH_SUFFIX = " pack size UOM"
+_RE_QUERY_JUNK = re.compile(r"[^\w\s\-/]")
+_MAX_PAGE_CHARS = 256_000
+
 # ── snippet extraction patterns ─────────────────────────────────────────────
-_PACK_SNIPPET_RE = re.compile(
-    r"(?:\d+\s*/\s*(?:CS|CASE|BX|BOX|PK|PACK|PKG|EA|EACH|UNIT|ROLL|BAG|CT|DZ))"
-    r"|(?:(?:PK|PACK|PKG)\s*\d+)"
-    r"|(?:(?:CASE|BOX|PACK|PACKAGE|PKG)\s+OF\s+\d+)"
-    r"|(?:\d+\s+PER\s+(?:PACK|CASE|BOX|PACKAGE|PKG|ROLL|BAG))"
-    r"|(?:\d+\s+(?:EA|EACH|UNIT|PC|PCS))",
-    re.I,
+# Alternatives sharing a leading number are factored under one ``\d+`` so it
+# is matched once per position, and unit words end on ``\b`` so "12/CASE"
+# no longer matches inside "12/CASEMENT" (nor "5 EA" inside "5 EAST").
+_PACK_SNIPPET_BODY = (
+    r"\d+(?:\s*/\s*(?:CS|CASE|BX|BOX|PK|PACK|PKG|EA|EACH|UNIT|ROLL|BAG|CT|DZ)"
+    r"|\s+PER\s+(?:PACK|CASE|BOX|PACKAGE|PKG|ROLL|BAG)"
+    r"|\s+(?:EA|EACH|UNIT|PC|PCS))\b"
+    r"|\b(?:(?:PK|PACK|PKG)\s*\d+"
+    r"|(?:CASE|BOX|PACK|PACKAGE|PKG)\s+OF\s+\d+)"
 )
 
+# RE2 scans in linear time without backtracking, which matters on
+# whole-page text.  It has no lookahead, so only the stdlib fallback gets
+# the leading-character guard that skips most positions without entering
+# the alternation.
+try:
+    import re2  # type: ignore[import-untyped]
+    _PACK_SNIPPET_RE = re2.compile(r"(?i)" + _PACK_SNIPPET_BODY)
+except ImportError:
+    _PACK_SNIPPET_RE = re.compile(r"(?i)(?=[\dpcb])(?:" + _PACK_SNIPPET_BODY + ")")
+
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; InvoiceUOM/0.1; +internal-use-only)",
+    "Accept": "text/html",
+}
+
 _SESSION = None
+_session_lock = threading.Lock()
 
 
 def _get_session():
-    """Lazy-init a requests.Session."""
+    """Lazy-init the shared HTTP client.
+
+    Prefers an HTTP/2 ``httpx.Client`` so search and page fetches to the same
+    host multiplex over one kept-alive connection; falls back to a
+    ``requests.Session`` when httpx isn't installed.
+    """
     global _SESSION
     if _SESSION is None:
-        import requests  # type: ignore[import-untyped]  # lazy import
-        _SESSION = requests.Session()
-        _SESSION.headers.update({
-            "User-Agent": "Mozilla/5.0 (compatible; InvoiceUOM/0.1; +internal-use-only)",
-            "Accept": "text/html",
-        })
+        with _session_lock:
+            if _SESSION is None:
+                _SESSION = _new_session()
     return _SESSION
 
 
+def _new_session():
+    try:
+        import httpx  # type: ignore[import-untyped]  # lazy import
+    except ImportError:
+        import requests  # type: ignore[import-untyped]  # lazy import
+        session = requests.Session()
+        session.headers.update(_HEADERS)
+        return session
+
+    kwargs: dict[str, Any] = {
+        "headers": _HEADERS,
+        "timeout": httpx.Timeout(10, connect=5),
+        "limits": httpx.Limits(max_keepalive_connections=20),
+        "follow_redirects": True,  # requests' default; DDG links redirect
+    }
+    try:
+        return httpx.Client(http2=True, **kwargs)
+    except ImportError:  # the optional h2 package is missing
+        return httpx.Client(**kwargs)
+
+
+def _read_page(session: Any, url: str, timeout: float) -> str:
+    """GET *url* and return at most ``_MAX_PAGE_CHARS`` of its decoded body.
+
+    The body is streamed so multi-MB product pages (inline scripts, base64
+    images) are never held in memory whole; pack-size text sits well inside
+    the first couple of hundred KB.
+    """
+    # httpx.Client.stream is a method; requests.Session.stream is a bool flag.
+    if callable(getattr(session, "stream", None)):
+        with session.stream("GET", url, timeout=timeout) as resp:
+            resp.raise_for_status()
+            return _take_chars(resp.iter_text())
+    resp = session.get(url, timeout=timeout, stream=True)
+    try:
+        resp.raise_for_status()
+        if resp.encoding is None:
+            resp.encoding = "utf-8"
+        return _take_chars(resp.iter_content(chunk_size=16384, decode_unicode=True))
+    finally:
+        resp.close()
+
+
+def _take_chars(chunks: Iterable[str]) -> str:
+    parts: list[str] = []
+    total = 0
+    for chunk in chunks:
+        parts.append(chunk)
+        total += len(chunk)
+        if total >= _MAX_PAGE_CHARS:
+            break
+    return "".join(parts)[:_MAX_PAGE_CHARS]
+
+
+# Memoised: the pipeline derives the dedup key and ``resolve`` the search
+# query from the same (description, sku, mpn) rows, often repeated per run.
+@functools.lru_cache(maxsize=2048)
+def _query_for(
+    description: str, sku: str | None, mpn: str | None, supplier: str | None,
+) -> str:
+    if mpn and mpn.strip():
+        return mpn.strip()
+    if sku and sku.strip():
+        return sku.strip()
+    # Clean description: remove special chars, collapse whitespace
+    cleaned = _RE_QUERY_JUNK.sub(" ", description)
+    cleaned = " ".join(cleaned.split())
+    if len(cleaned) < 5:
+        return ""
+    # Truncate very long descriptions
+    query = " ".join(cleaned.split()[:10])
+    # Prepend supplier for more targeted results
+    if supplier and supplier.strip() and supplier.strip().lower() not in query.lower():
+        query = f"{supplier.strip()} {query}"
+    return query
+
+
 class LookupAgent:
     """Agentic lookup resolver with caching and LLM budget tracking."""
 
     def __init__(self, cache: LookupCache | None = None) -> None:
         self._cache = cache or LookupCache()
         self._pdf_llm_calls = 0
+        # resolve() may run on several threads for one PDF
+        self._budget_lock = threading.Lock()
 
     def reset_pdf_budget(self) -> None:
         """Reset the per-PDF LLM call counter (call at the start of each PDF)."""
         self._pdf_llm_calls = 0
 
+    def flush_cache(self) -> None:
+        """Commit any lookup results still buffered in the cache."""
+        self._cache.flush()
+
     @property
     def pdf_llm_budget_remaining(self) -> int:
         return max(0, config.LLM_MAX_CALLS_PER_PDF - self._pdf_llm_calls)
@@ -105,7 +232,7 @@ class LookupAgent:
             return self._empty_result("no search results")
 
         # 3) Fetch pages & extract snippets
-        snippets = self._fetch_snippets(urls)
+        snippets = self._fetch_snippets(urls, self._cache)
         if not snippets:
             self._cache.put(LookupResult(query=query, source_urls=urls))
             return self._empty_result("no relevant snippets found")
@@ -129,7 +256,7 @@ class LookupAgent:
             }
 
         # 5) LLM if budget allows
-        if self._pdf_llm_calls >= config.LLM_MAX_CALLS_PER_PDF:
+        if not self._take_llm_call():
             self._cache.put(LookupResult(
                 query=query,
                 source_urls=[s["url"] for s in snippets],
@@ -145,7 +272,6 @@ class LookupAgent:
                 ).to_evidence_dict(),
             }
 
-        self._pdf_llm_calls += 1
         llm_result = resolve_uom_with_llm(description, snippets, mpn)
 
         pack_qty = None
@@ -174,38 +300,34 @@ class LookupAgent:
 
     # ── internal helpers ────────────────────────────────────────────────
 
+    def _take_llm_call(self) -> bool:
+        """Reserve one call from the per-PDF LLM budget; False if exhausted."""
+        with self._budget_lock:
+            if self._pdf_llm_calls >= config.LLM_MAX_CALLS_PER_PDF:
+                return False
+            self._pdf_llm_calls += 1
+            return True
+
     @staticmethod
     def _build_query(
         description: str, sku: str | None, mpn: str | None,
         supplier: str | None = None,
     ) -> str:
         """Build a normalised search query string."""
-        if mpn and mpn.strip():
-            return mpn.strip()
-        if sku and sku.strip():
-            return sku.strip()
-        # Clean description: remove special chars, collapse whitespace
-        cleaned = re.sub(r"[^\w\s\-/]", " ", description)
-        cleaned = " ".join(cleaned.split())
-        if len(cleaned) < 5:
-            return ""
-        # Truncate very long descriptions
-        query = " ".join(cleaned.split()[:10])
-        # Prepend supplier for more targeted results
-        if supplier and supplier.strip() and supplier.strip().lower() not in query.lower():
-            query = f"{supplier.strip()} {query}"
-        return query
+        return _query_for(description, sku, mpn, supplier)
 
     @staticmethod
     def _search(query: str, max_results: int = 3) -> list[str]:
         """Simple DuckDuckGo-HTML search → return top URLs."""
         try:
-            from bs4 import BeautifulSoup  # type: ignore[import-untyped]
+            if not _HAS_BS4:
+                raise RuntimeError("beautifulsoup4 is not installed")
             session = _get_session()
-            url = f"https://html.duckduckgo.com/html/?q={quote_plus(query + ' pack size UOM')}"
+            url = _SEARCH_URL.format(quote_plus(query + _SEARCH_SUFFIX))
+            host_limiter(url).acquire()
             resp = session.get(url, timeout=10)
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "html.parser")
+            soup = BeautifulSoup(resp.text, _BS4_PARSER)
             urls: list[str] = []
             for a in soup.select("a.result__a"):
                 href = a.get("href", "")
@@ -219,34 +341,64 @@ class LookupAgent:
             return []
 
     @staticmethod
-    def _fetch_snippets(urls: list[str]) -> list[dict[str, str]]:
-        """Fetch pages and extract text snippets containing UOM/pack patterns."""
-        from bs4 import BeautifulSoup  # type: ignore[import-untyped]
-        session = _get_session()
+    def _fetch_snippets(
+        urls: list[str], cache: LookupCache | None = None,
+    ) -> list[dict[str, str]]:
+        """Fetch pages and extract text snippets containing UOM/pack patterns.
+
+        Pages are fetched concurrently, but the snippets still come from the
+        first URL (in search-rank order) that yields any.  With a *cache*,
+        pages fetched within ``config.PAGE_CACHE_TTL_S`` are not re-fetched.
+        """
+        if not _HAS_BS4:
+            raise RuntimeError("beautifulsoup4 is not installed")
+        known: dict[str, list[dict[str, str]]] = {}
+        if cache is not None:
+            for url in urls:
+                hit = cache.get_page(url, config.PAGE_CACHE_TTL_S)
+                if hit is not None:
+                    known[url] = [{"url": url, "snippet": s} for s in hit]
+        todo = [url for url in dict.fromkeys(urls) if url not in known]
+        futures: dict[str, Any] = {}
+        pool = None
+        if todo:
+            session = _get_session()
+            pool = ThreadPoolExecutor(max_workers=len(todo), thread_name_prefix="lookup-fetch")
+            futures = {url: pool.submit(LookupAgent._fetch_one, session, url) for url in todo}
+        try:
+            for url in urls:
+                snippets = known.get(url)
+                if snippets is None:
+                    snippets = futures[url].result()
+                    if snippets is not None and cache is not None:
+                        cache.put_page(url, [s["snippet"] for s in snippets])
+                if snippets:
+                    return snippets[:5]  # Got good snippets from this page
+            return []
+        finally:
+            # Don't wait on lower-ranked pages once we have an answer.
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _fetch_one(session: Any, url: str) -> list[dict[str, str]] | None:
+        """Snippets around the first pack/UOM matches on *url*; None if the fetch failed."""
         snippets: list[dict[str, str]] = []
-        for url in urls:
-            try:
-                resp = session.get(url, timeout=8)
-                resp.raise_for_status()
-                soup = BeautifulSoup(resp.text, "html.parser")
-                # Remove scripts, styles
-                for tag in soup(["script", "style", "nav", "footer", "header"]):
-                    tag.decompose()
-                text = soup.get_text(separator=" ", strip=True)
-                # Find sentences containing pack/UOM patterns
-                matches = _PACK_SNIPPET_RE.findall(text)
-                if matches:
-                    # Grab context around first match
-                    for m in matches[:3]:
-                        idx = text.find(m)
-                        start = max(0, idx - 100)
-                        end = min(len(text), idx + len(m) + 150)
-                        snippet = text[start:end].strip()
-                        snippets.append({"url": url, "snippet": snippet})
-                    break  # Got good snippets from this page
-            except Exception as exc:
-                logger.debug("Fetch failed for %s: %s", url, exc)
-        return snippets[:5]
+        try:
+            host_limiter(url).acquire()
+            soup = BeautifulSoup(_read_page(session, url, timeout=8), _BS4_PARSER)
+            # Remove scripts, styles
+            for tag in soup(["script", "style", "nav", "footer", "header"]):
+                tag.decompose()
+            text = soup.get_text(separator=" ", strip=True)
+            # Grab context around the first pack/UOM matches, in one pass
+            for m in islice(_PACK_SNIPPET_RE.finditer(text), 3):
+                snippet = text[max(0, m.start() - 100):m.end() + 150].strip()
+                snippets.append({"url": url, "snippet": snippet})
+        except Exception as exc:
+            logger.debug("Fetch failed for %s: %s", url, exc)
+            return None
+        return snippets
 
     @staticmethod
     def _regex_extract(snippets: list[dict[str, str]]) -> dict[str, Any]:
@@ -7,12 +7,54 @@ can treat them interchangeably.
 from __future__ import annotations
 
 import logging
-import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Generator, Iterator
 
 logger = logging.getLogger(__name__)
 
+try:
+    from lxml import etree  # type: ignore[import-untyped]
+    from lxml import html as lxml_html  # type: ignore[import-untyped]
+    _HAS_LXML = True
+except ImportError:
+    _HAS_LXML = False
+
+# PPStructure loads its detection, recognition and table models on
+# construction, so one engine is shared by every PDF processed in this process.
+_engine: Any = None
+_engine_lock = threading.Lock()
+# Paddle predictors are not thread-safe, and the app and the watcher run
+# several PDFs on worker threads at once, so calls into the shared engine are
+# serialised.  Page rendering and table parsing still run concurrently.
+_ocr_lock = threading.Lock()
+
+
+def _get_engine() -> Any:
+    """Return the shared ``PPStructure`` engine (created on first call)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                try:
+                    from paddleocr import PPStructure  # type: ignore[import-untyped]
+                except ImportError as exc:
+                    raise RuntimeError(
+                        "PaddleOCR is not installed.  Install with: pip install paddleocr paddlepaddle"
+                    ) from exc
+                _engine = PPStructure(show_log=False, recovery=True, lang="en")
+    return _engine
+
+
+def warmup() -> None:
+    """Load the OCR models now rather than on the first scanned PDF.
+
+    Useful for long-running callers (the watcher, a batch worker) that would
+    otherwise pay the model-load cost in the middle of a run.
+    """
+    _get_engine()
+
 
 def extract_with_paddle(pdf_path: Path) -> dict[str, Any]:
     """Extract tables and text blocks from *pdf_path* using PaddleOCR.
@@ -22,52 +64,19 @@ def extract_with_paddle(pdf_path: Path) -> dict[str, Any]:
     dict
         ``{"tables": [...], "text_blocks": [...], "method": "paddleocr"}``
     """
-    try:
-        from paddleocr import PPStructure  # type: ignore[import-untyped]
-    except ImportError as exc:
-        raise RuntimeError(
-            "PaddleOCR is not installed.  Install with: pip install paddleocr paddlepaddle"
-        ) from exc
+    engine = _get_engine()
 
     logger.info("Extracting with PaddleOCR: %s", pdf_path.name)
 
-    engine = PPStructure(show_log=False, recovery=True, lang="en")
-
-    # PaddleOCR works on images; convert PDF pages to images first.
-    images = _pdf_to_images(pdf_path)
-
     tables: list[list[list[str]]] = []
     text_blocks: list[str] = []
 
-    for page_idx, img_path in enumerate(images):
-        import cv2  # type: ignore[import-untyped]
-        img = cv2.imread(str(img_path))
-        if img is None:
-            logger.warning("Could not read image for page %d", page_idx)
-            continue
-
-        result = engine(img)
-        for block in result:
-            block_type = block.get("type", "")
-            if block_type == "table":
-                html = block.get("res", {}).get("html", "")
-                if html:
-                    parsed = _parse_html_table(html)
-                    if parsed:
-                        tables.append(parsed)
-            elif block_type == "text":
-                text = block.get("res", {}).get("text", "")
-                if text and text.strip():
-                    text_blocks.append(text.strip())
-            elif block_type == "figure":
-                # Figures may contain embedded text via OCR
-                ocr_res = block.get("res", [])
-                if isinstance(ocr_res, list):
-                    for item in ocr_res:
-                        if isinstance(item, dict):
-                            t = item.get("text", "")
-                            if t:
-                                text_blocks.append(t.strip())
+    # PaddleOCR works on images; the next page renders while this one is
+    # recognised, so at most two pages are held in memory.
+    for img in _prefetched(_iter_page_images(pdf_path)):
+        with _ocr_lock:
+            result = engine(img)
+        _collect_blocks(result, tables, text_blocks)
 
     logger.info(
         "PaddleOCR extracted %d table(s), %d text block(s)",
@@ -76,41 +85,109 @@ def extract_with_paddle(pdf_path: Path) -> dict[str, Any]:
     return {"tables": tables, "text_blocks": text_blocks, "method": "paddleocr"}
 
 
-def _pdf_to_images(pdf_path: Path) -> list[Path]:
-    """Convert PDF pages to PNG images in a temp directory."""
+def _collect_blocks(
+    result: list[dict[str, Any]],
+    tables: list[list[list[str]]],
+    text_blocks: list[str],
+) -> None:
+    """Sort one page's PP-Structure blocks into *tables* and *text_blocks*."""
+    add_text = text_blocks.append
+    for block in result:
+        block_type = block.get("type", "")
+        # Text blocks dominate a typical invoice page, so test them first.
+        if block_type == "text":
+            text = block.get("res", {}).get("text", "")
+            if text:
+                text = text.strip()
+                if text:
+                    add_text(text)
+        elif block_type == "table":
+            html = block.get("res", {}).get("html", "")
+            if html:
+                parsed = _parse_html_table(html)
+                if parsed:
+                    tables.append(parsed)
+        elif block_type == "figure":
+            # Figures may contain embedded text via OCR
+            ocr_res = block.get("res", [])
+            if isinstance(ocr_res, list):
+                text_blocks.extend(
+                    t.strip() for item in ocr_res
+                    if isinstance(item, dict) and (t := item.get("text", ""))
+                )
+
+
+def _prefetched(pages: Generator[Any, None, None]) -> Iterator[Any]:
+    """Yield from *pages*, producing the next item on a helper thread meanwhile.
+
+    Paddle inference releases the GIL, so rendering page N+1 overlaps OCR of
+    page N.  Only the helper thread advances *pages*, which keeps the PyMuPDF
+    document on a single thread.
+    """
+    try:
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="render") as pool:
+            pending = pool.submit(next, pages, None)
+            while (img := pending.result()) is not None:
+                pending = pool.submit(next, pages, None)
+                yield img
+    finally:
+        pages.close()
+
+
+def _iter_page_images(pdf_path: Path) -> Generator[Any, None, None]:
+    """Yield PDF pages rendered at 300 DPI as BGR ``uint8`` numpy arrays.
+
+    The arrays go straight to PaddleOCR, which takes the same layout
+    ``cv2.imread`` produces, so no page image is ever encoded to disk.
+    Pages are rendered one at a time as OCR consumes them: a 300-DPI A4
+    page is ~26 MB, so only the page being recognised is held in memory.
+    """
+    import numpy as np
+
     try:
         import fitz  # PyMuPDF  # type: ignore[import-untyped]
     except ImportError:
-        # Fallback: try pdf2image
+        # Fallback: try pdf2image, still one page per call
         try:
-            from pdf2image import convert_from_path  # type: ignore[import-untyped]
-            tmp_dir = Path(tempfile.mkdtemp(prefix="invoice_ocr_"))
-            images = convert_from_path(str(pdf_path), dpi=300)
-            paths: list[Path] = []
-            for i, img in enumerate(images):
-                p = tmp_dir / f"page_{i}.png"
-                img.save(str(p), "PNG")
-                paths.append(p)
-            return paths
+            from pdf2image import convert_from_path, pdfinfo_from_path  # type: ignore[import-untyped]
         except ImportError:
             logger.error("Neither PyMuPDF nor pdf2image is available for PDF→image conversion")
-            return []
+            return
+        for page in range(1, pdfinfo_from_path(str(pdf_path))["Pages"] + 1):
+            for img in convert_from_path(str(pdf_path), dpi=300, first_page=page, last_page=page):
+                yield np.ascontiguousarray(np.asarray(img.convert("RGB"))[..., ::-1])
+        return
 
-    tmp_dir = Path(tempfile.mkdtemp(prefix="invoice_ocr_"))
-    doc = fitz.open(str(pdf_path))
-    paths: list[Path] = []
-    for i, page in enumerate(doc):
-        mat = fitz.Matrix(3.0, 3.0)  # 300 DPI
-        pix = page.get_pixmap(matrix=mat)
-        p = tmp_dir / f"page_{i}.png"
-        pix.save(str(p))
-        paths.append(p)
-    doc.close()
-    return paths
+    mat = fitz.Matrix(3.0, 3.0)  # 300 DPI
+    with fitz.open(str(pdf_path)) as doc:
+        for page in doc:
+            pix = page.get_pixmap(matrix=mat, alpha=False)
+            rgb = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+            yield np.ascontiguousarray(rgb[..., ::-1])  # RGB → BGR
 
 
 def _parse_html_table(html: str) -> list[list[str]]:
-    """Parse an HTML table string into a list of rows."""
+    """Parse an HTML table string into a list of rows.
+
+    Uses lxml directly when available (one C-level parse, no soup tree);
+    otherwise BeautifulSoup.  Cell text matches ``get_text(strip=True)``:
+    each text node stripped, then joined without a separator.
+    """
+    if _HAS_LXML:
+        try:
+            root = lxml_html.fromstring(html)
+        except (etree.ParserError, ValueError):
+            return []
+        table = next(root.iter("table"), None)
+        if table is None:
+            return []
+        rows: list[list[str]] = []
+        for tr in table.iter("tr"):
+            cells = ["".join(t.strip() for t in td.itertext()) for td in tr.iter("td", "th")]
+            if any(cells):
+                rows.append(cells)
+        return rows
+
     try:
         from bs4 import BeautifulSoup  # type: ignore[import-untyped]
     except ImportError:
@@ -121,7 +198,7 @@ def _parse_html_table(html: str) -> list[list[str]]:
     if not table:
         return []
 
-    rows: list[list[str]] = []
+    rows = []
     for tr in table.find_all("tr"):
         cells = [td.get_text(strip=True) for td in tr.find_all(["td", "th"])]
         if any(cells):
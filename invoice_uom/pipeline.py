@@ -1,58 +1,187 @@
-"""Pipeline orchestrator – single-PDF processing end-to-end.
+"""Pipeline orchestrator – PDF processing end-to-end.
 
 Flow:
   1) Hash check (idempotency).
   2) Try Docling extraction; fall back to PaddleOCR.
   3) Extract line items.
   4) Per item: parse UOM/pack → compute price → trigger lookup if needed → score.
+     Distinct lookups run concurrently on a thread pool.
   5) Atomic write to ``outputs/`` or ``failed/``.
-  6) Write debug JSON.
+  6) Write debug JSON (when ``config.WRITE_DEBUG_ALWAYS`` is set): a
+     summary ``.debug.json`` plus per-item events streamed to ``.debug.ndjson``.
+
+``pipeline_batch`` runs the same stages for many PDFs with extraction, the
+quality gate and enrichment overlapped on separate threads.
 """
 
 from __future__ import annotations
 
+import atexit
+import functools
 import hashlib
 import json
 import logging
+import mmap
 import os
-import tempfile
+import queue
+import re
+import threading
 import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, BinaryIO, Callable, Iterable, Iterator
 
 from invoice_uom import config
+from invoice_uom.cache import get_cache
 from invoice_uom.extract_docling import extract_with_docling
 from invoice_uom.line_items import extract_line_items
 from invoice_uom.lookup_agent import LookupAgent
 from invoice_uom.scoring import compute_confidence, should_escalate
 from invoice_uom.supplier_normalize import extract_supplier_candidates, normalise_supplier
-from invoice_uom.uom_normalize import normalise_uom_code, parse_uom_and_pack
+from invoice_uom.uom_normalize import UOMParseResult, normalise_uom_code, parse_uom_and_pack
 
 logger = logging.getLogger(__name__)
 
+try:
+    import blake3  # type: ignore[import-not-found]
+    _HAS_BLAKE3 = True
+except ImportError:
+    _HAS_BLAKE3 = False
+
+try:
+    import orjson  # type: ignore[import-untyped]
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
 
 # ── manifest helpers ────────────────────────────────────────────────────────
 
+# Serialises manifest access when PDFs are processed concurrently
+_MANIFEST_LOCK = threading.RLock()
+
+# The manifest is read once and updated in memory; new entries are written
+# back every _MANIFEST_FLUSH_EVERY updates, by flush_manifest() and at exit.
+_MANIFEST_FLUSH_EVERY = 50
+_MANIFEST_CACHE: dict[str, Any] | None = None
+_MANIFEST_PATH: Path | None = None
+_MANIFEST_PENDING: dict[str, Any] = {}
+_MANIFEST_DIRTY_COUNT = 0
+
+# Stored with each manifest hash, so entries made with another algorithm
+# (older releases, or an environment without blake3) simply don't match.
+_HASH_ALGO = "blake3" if _HAS_BLAKE3 else "sha256"
+
+
 def _file_hash(path: Path) -> str:
-    h = hashlib.sha256()
+    """Content hash of *path*, tagged with the algorithm (``"<algo>:<hex>"``)."""
+    h = blake3.blake3(max_threads=blake3.blake3.AUTO) if _HAS_BLAKE3 else hashlib.sha256()
     with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        except (ValueError, OSError):  # empty or unmappable file
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return f"{_HASH_ALGO}:{h.hexdigest()}"
 
 
-def _load_manifest() -> dict[str, str]:
+def _read_manifest(path: Path) -> dict[str, Any]:
     try:
-        return json.loads(config.MANIFEST_FILE.read_text(encoding="utf-8"))
-    except (FileNotFoundError, json.JSONDecodeError):
+        data = path.read_bytes()
+        return orjson.loads(data) if _HAS_ORJSON else json.loads(data)
+    except (FileNotFoundError, json.JSONDecodeError):  # orjson's error subclasses it
         return {}
 
 
-def _save_manifest(manifest: dict[str, str]) -> None:
-    config.MANIFEST_FILE.parent.mkdir(parents=True, exist_ok=True)
-    tmp = config.MANIFEST_FILE.with_suffix(".tmp")
-    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
-    tmp.replace(config.MANIFEST_FILE)
+def _load_manifest() -> dict[str, Any]:
+    """The in-memory manifest for ``config.MANIFEST_FILE`` (read on first use)."""
+    global _MANIFEST_CACHE, _MANIFEST_PATH
+    with _MANIFEST_LOCK:
+        path = config.MANIFEST_FILE
+        if _MANIFEST_CACHE is None or _MANIFEST_PATH != path:
+            _flush_manifest_locked()  # pending entries belong to the old file
+            _MANIFEST_CACHE = _read_manifest(path)
+            _MANIFEST_PATH = path
+        return _MANIFEST_CACHE
+
+
+def _save_manifest(path: Path, manifest: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Per-process temp name so concurrent workers never interleave writes
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_bytes(_json_bytes(manifest))
+    tmp.replace(path)
+
+
+def _flush_manifest_locked() -> None:
+    if not _MANIFEST_PENDING or _MANIFEST_PATH is None:
+        return
+    # Merge into the file's current contents so entries written by other
+    # processes since we loaded it aren't lost.
+    manifest = _read_manifest(_MANIFEST_PATH)
+    manifest.update(_MANIFEST_PENDING)
+    _save_manifest(_MANIFEST_PATH, manifest)
+    if _MANIFEST_CACHE is not None:
+        _MANIFEST_CACHE.update(manifest)
+    _MANIFEST_PENDING.clear()
+
+
+def flush_manifest() -> None:
+    """Write manifest entries recorded since the last flush to disk."""
+    with _MANIFEST_LOCK:
+        _flush_manifest_locked()
+
+
+atexit.register(flush_manifest)
+
+
+def _unchanged(entry: Any, st: os.stat_result) -> bool:
+    """True if manifest *entry* was recorded for a file of *st*'s size and mtime.
+
+    Entries are ``{"hash", "size", "mtime_ns"}`` dicts; the bare hash strings
+    of older manifests never match here and fall back to hashing.
+    """
+    return (
+        isinstance(entry, dict)
+        and entry.get("size") == st.st_size
+        and entry.get("mtime_ns") == st.st_mtime_ns
+    )
+
+
+def _entry_hash(entry: Any) -> str | None:
+    return entry.get("hash") if isinstance(entry, dict) else entry
+
+
+def mark_processed(
+    pdf_path: Path,
+    fhash: str | None = None,
+    st: os.stat_result | None = None,
+) -> None:
+    """Record *pdf_path* in the idempotency manifest.
+
+    Safe to call again from a parent process to reconcile entries lost when
+    several worker processes updated the manifest at the same time.  The
+    entry reaches disk on the next flush (see :func:`flush_manifest`).
+    *st* should be the ``stat`` taken before *fhash* was computed.
+    """
+    global _MANIFEST_DIRTY_COUNT
+    st = st or pdf_path.stat()
+    if fhash is None:
+        if _unchanged(_load_manifest().get(pdf_path.stem), st):
+            return
+        fhash = _file_hash(pdf_path)
+    entry = {"hash": fhash, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    with _MANIFEST_LOCK:
+        manifest = _load_manifest()
+        if manifest.get(pdf_path.stem) == entry:
+            return
+        manifest[pdf_path.stem] = entry
+        _MANIFEST_PENDING[pdf_path.stem] = entry
+        _MANIFEST_DIRTY_COUNT += 1
+        if _MANIFEST_DIRTY_COUNT % _MANIFEST_FLUSH_EVERY == 0:
+            _flush_manifest_locked()
 
 
 # ── price computation ──────────────────────────────────────────────────────
@@ -85,7 +214,10 @@ def _compute_price_per_base_unit(
 
     # Step 2: normalise to EA
     if original_uom:
-        canonical = normalise_uom_code(original_uom)
+        canonical = (
+            item["_canonical_uom"] if "_canonical_uom" in item
+            else normalise_uom_code(original_uom)
+        )
         if canonical in config.EACH_UOMS:
             # Already per-unit
             debug_prices["formula"] = formula
@@ -112,162 +244,374 @@ def _compute_price_per_base_unit(
 
 # ── main orchestrator ──────────────────────────────────────────────────────
 
-def process_pdf(
-    pdf_path: Path,
-    output_dir: Path | None = None,
-    failed_dir: Path | None = None,
-    force: bool = False,
-    status_cb: Callable[[str], None] | None = None,
-) -> dict[str, Any] | None:
-    """Process a single invoice PDF end-to-end.
-
-    Returns the final output dict, or ``None`` if already processed.
-    """
+# Bound on PDFs buffered between two pipeline stages in ``pipeline_batch``
+_STAGE_QUEUE_SIZE = 4
+
+
+@dataclass
+class _Job:
+    """Per-PDF state handed from one processing stage to the next."""
+
+    pdf_path: Path
+    fhash: str
+    output_dir: Path
+    failed_dir: Path
+    status: Callable[[str], None]
+    st: os.stat_result | None = None
+    debug: dict[str, Any] = field(default_factory=dict)
+    events: DebugWriter = field(default_factory=lambda: DebugWriter(None))
+    extraction: dict[str, Any] = field(default_factory=dict)
+    raw_items: list[dict[str, Any]] = field(default_factory=list)
+    supplier_name: str = ""
+    output: dict[str, Any] | None = None
+    done: bool = False
+    # Set by ``pipeline_batch``: LLM fallbacks are queued on a shared
+    # BatchedLLMExtractor and only awaited in the enrichment stage.
+    llm_batcher: Any = None
+    llm_future: Future[dict[str, Any]] | None = None
+    llm_reason: str = ""
+
+
+def _prepare_dirs(output_dir: Path | None, failed_dir: Path | None) -> tuple[Path, Path]:
     output_dir = output_dir or config.OUTPUT_DIR
     failed_dir = failed_dir or config.FAILED_DIR
     output_dir.mkdir(parents=True, exist_ok=True)
     failed_dir.mkdir(parents=True, exist_ok=True)
+    return output_dir, failed_dir
 
-    pdf_name = pdf_path.stem
-    fhash = _file_hash(pdf_path)
 
-    # Idempotency check
-    if not force:
-        manifest = _load_manifest()
-        if manifest.get(pdf_name) == fhash:
-            logger.info("Skipping %s (already processed, hash match)", pdf_name)
-            return None
+def _start_job(
+    pdf_path: Path,
+    output_dir: Path,
+    failed_dir: Path,
+    force: bool,
+    status_cb: Callable[[str], None] | None,
+) -> _Job:
+    """Hash *pdf_path* and build its job; the job is already ``done`` if skipped."""
+    def _status(msg: str) -> None:
+        if status_cb:
+            status_cb(msg)
+
+    # Idempotency check: an unchanged size + mtime skips without reading
+    # the file; otherwise the content hash decides.
+    st = pdf_path.stat()
+    entry = None if force else _load_manifest().get(pdf_path.stem)
+    if _unchanged(entry, st):
+        logger.info("Skipping %s (already processed, size/mtime match)", pdf_path.stem)
+        return _Job(pdf_path, entry["hash"], output_dir, failed_dir, _status, st=st, done=True)
+
+    job = _Job(pdf_path, _file_hash(pdf_path), output_dir, failed_dir, _status, st=st)
+    if entry is not None and _entry_hash(entry) == job.fhash:
+        logger.info("Skipping %s (already processed, hash match)", pdf_path.stem)
+        # Touched but identical: refresh size/mtime for the fast path
+        mark_processed(pdf_path, job.fhash, st)
+        job.done = True
+        return job
 
     logger.info("Processing %s …", pdf_path.name)
-    debug: dict[str, Any] = {"file": pdf_path.name, "stages": {}}
+    job.debug = {"file": pdf_path.name, "stages": {}}
+    if config.WRITE_DEBUG_ALWAYS:
+        job.events = DebugWriter(output_dir / f"{pdf_path.stem}.debug.ndjson")
+    return job
 
-    try:
-        def _status(msg: str) -> None:
-            if status_cb:
-                status_cb(msg)
-
-        _status("Extracting PDF text and tables via Docling (fallback: PaddleOCR)...")
-        # ── Stage 1: extraction ──────────────────────────────────────────
-        extraction = _extract(pdf_path, debug)
-
-        _status("Parsing tables into structured line items...")
-        # ── Stage 2: line items ──────────────────────────────────────────
-        raw_items, items_debug = extract_line_items(extraction)
-        
-        if not raw_items:
-            _status("Running fallback extraction with pdfplumber (visual layout preservation)...")
-            try:
-                import pdfplumber  # type: ignore[import-untyped]
-                with pdfplumber.open(pdf_path) as pdf:
-                    pages_text = [p.extract_text(layout=True) for p in pdf.pages if p.extract_text(layout=True)]
-                    extraction["layout_text"] = "\n\n".join(pages_text)
-                
-                raw_items, items_debug2 = extract_line_items(extraction)
-                if raw_items:
-                    items_debug["layout_fallback_success"] = True
-                    _status(f"pdfplumber Fallback Success! Found {len(raw_items)} items.")
-                else:
-                    _status(f"pdfplumber layout was generated, but line_items regex still found 0 items. Layout Length: {len(extraction.get('layout_text', ''))}")
-                items_debug.update(items_debug2)
-            except ImportError:
-                _status("ERROR: pdfplumber is not installed in the environment!")
-                logger.warning("pdfplumber not installed")
-            except Exception as exc:
-                _status(f"ERROR during pdfplumber extraction: {exc}")
-                logger.warning("pdfplumber extraction failed: %s", exc)
-
-        debug["stages"]["line_items"] = items_debug
-        logger.info("Extracted %d raw line item(s)", len(raw_items))
-
-        _status("Detecting supplier name from page headers...")
-        # ── Stage 3: supplier detection ──────────────────────────────────
-        text_blocks = extraction.get("text_blocks", [])
-        supplier_raw, supplier_normalised = _detect_supplier(text_blocks, debug)
-
-        # ── Stage 3.5: QUALITY GATE — LLM fallback ──────────────────────
-        supplier_looks_bad = _supplier_looks_bad(supplier_normalised)
-        items_look_bad = _items_look_bad(raw_items)
-        needs_llm = not raw_items or supplier_looks_bad or items_look_bad
-
-        if needs_llm:
-            reason = (
-                "no items" if not raw_items
-                else "bad supplier" if supplier_looks_bad
-                else "low quality items"
-            )
-            logger.info(
-                "Quality gate triggered (%s, items=%d, supplier=%r), trying LLM fallback",
-                reason, len(raw_items), supplier_normalised,
-            )
-            _status(f"Quality gate triggered ({reason}). Attempting LLM Extraction Fallback...")
-            llm_result = _try_llm_extraction(extraction, pdf_path.name, debug)
-            if llm_result:
-                if llm_result.get("line_items"):
-                    raw_items = llm_result["line_items"]
-                    debug["stages"]["llm_extraction"] = {
-                        "triggered": True,
-                        "reason": reason,
-                        "items_from_llm": len(raw_items),
-                    }
-                if llm_result.get("supplier_name"):
-                    supplier_normalised = llm_result["supplier_name"]
-                    supplier_raw = llm_result["supplier_name"]
-                    debug["stages"]["supplier"]["llm_override"] = supplier_normalised
-
-        # ── Stage 4: per-item enrichment ─────────────────────────────────
-        lookup_agent = LookupAgent()
-        lookup_agent.reset_pdf_budget()
-
-        # Deduplicate lookup queries
-        lookup_queries_done: dict[str, dict[str, Any]] = {}
-
-        _status(f"Enriching and scoring {len(raw_items)} line items...")
-        final_items: list[dict[str, Any]] = []
-        for raw in raw_items:
-            item = _enrich_item(
-                raw, supplier_normalised, lookup_agent,
-                lookup_queries_done, debug, status_cb
-            )
-            final_items.append(item)
-
-        # ── Stage 5: build output ────────────────────────────────────────
-        num_escalations = sum(1 for i in final_items if i.get("escalation_flag"))
-        output = {
-            "file": pdf_path.name,
-            "supplier_name": supplier_normalised,
-            "line_items": final_items,
-            "stats": {
-                "num_items": len(final_items),
-                "num_escalations": num_escalations,
-            },
-        }
 
-        # Atomic writes
-        _atomic_write(output_dir / f"{pdf_name}.json", output)
-        _atomic_write(output_dir / f"{pdf_name}.debug.json", debug)
+def _stage_extract(job: _Job) -> None:
+    """Stages 1–2: document extraction and line-item parsing."""
+    _status = job.status
+    debug = job.debug
 
-        # Update manifest
-        manifest = _load_manifest()
-        manifest[pdf_name] = fhash
-        _save_manifest(manifest)
+    _status("Extracting PDF text and tables via Docling (fallback: PaddleOCR)...")
+    # ── Stage 1: extraction ──────────────────────────────────────────
+    extraction = _extract(job.pdf_path, debug)
+
+    _status("Parsing tables into structured line items...")
+    # ── Stage 2: line items ──────────────────────────────────────────
+    raw_items, items_debug = extract_line_items(extraction)
 
+    if not raw_items:
+        _status("Running fallback extraction with pdfplumber (visual layout preservation)...")
+        try:
+            import pdfplumber  # type: ignore[import-untyped]
+            with pdfplumber.open(job.pdf_path) as pdf:
+                pages_text = [p.extract_text(layout=True) for p in pdf.pages if p.extract_text(layout=True)]
+                extraction["layout_text"] = "\n\n".join(pages_text)
+
+            raw_items, items_debug2 = extract_line_items(extraction)
+            if raw_items:
+                items_debug["layout_fallback_success"] = True
+                _status(f"pdfplumber Fallback Success! Found {len(raw_items)} items.")
+            else:
+                _status(f"pdfplumber layout was generated, but line_items regex still found 0 items. Layout Length: {len(extraction.get('layout_text', ''))}")
+            items_debug.update(items_debug2)
+        except ImportError:
+            _status("ERROR: pdfplumber is not installed in the environment!")
+            logger.warning("pdfplumber not installed")
+        except Exception as exc:
+            _status(f"ERROR during pdfplumber extraction: {exc}")
+            logger.warning("pdfplumber extraction failed: %s", exc)
+
+    debug["stages"]["line_items"] = items_debug
+    logger.info("Extracted %d raw line item(s)", len(raw_items))
+    job.extraction = extraction
+    job.raw_items = raw_items
+
+
+def _stage_supplier(job: _Job) -> None:
+    """Stage 3: supplier detection, then the quality gate / LLM fallback."""
+    _status = job.status
+    debug = job.debug
+    raw_items = job.raw_items
+
+    _status("Detecting supplier name from page headers...")
+    # ── Stage 3: supplier detection ──────────────────────────────────
+    text_blocks = job.extraction.get("text_blocks", [])
+    _, supplier_normalised = _detect_supplier(text_blocks, debug)
+
+    # ── Stage 3.5: QUALITY GATE — LLM fallback ──────────────────────
+    supplier_looks_bad = _supplier_looks_bad(supplier_normalised)
+    items_look_bad = _items_look_bad(raw_items)
+    needs_llm = not raw_items or supplier_looks_bad or items_look_bad
+
+    if needs_llm:
+        reason = (
+            "no items" if not raw_items
+            else "bad supplier" if supplier_looks_bad
+            else "low quality items"
+        )
         logger.info(
-            "✓ %s → %d items, %d escalations",
-            pdf_name, len(final_items), num_escalations,
+            "Quality gate triggered (%s, items=%d, supplier=%r), trying LLM fallback",
+            reason, len(raw_items), supplier_normalised,
         )
-        return output
+        _status(f"Quality gate triggered ({reason}). Attempting LLM Extraction Fallback...")
+        job.supplier_name = supplier_normalised
+        if job.llm_batcher is not None:
+            raw_text = _llm_fallback_text(job.extraction)
+            if raw_text.strip():
+                job.llm_future = job.llm_batcher.submit(job.pdf_path.name, raw_text)
+                job.llm_reason = reason
+            return
+        llm_result = _try_llm_extraction(job.extraction, job.pdf_path.name, debug)
+        if llm_result:
+            _apply_llm_result(job, llm_result, reason)
+        return
+
+    job.supplier_name = supplier_normalised
+
+
+def _apply_llm_result(job: _Job, llm_result: dict[str, Any], reason: str) -> None:
+    """Replace the job's items and/or supplier with the LLM fallback's."""
+    debug = job.debug
+    if llm_result.get("line_items"):
+        job.raw_items = llm_result["line_items"]
+        debug["stages"]["llm_extraction"] = {
+            "triggered": True,
+            "reason": reason,
+            "items_from_llm": len(job.raw_items),
+        }
+    if llm_result.get("supplier_name"):
+        job.supplier_name = llm_result["supplier_name"]
+        debug["stages"]["supplier"]["llm_override"] = job.supplier_name
+
+
+def _stage_enrich(job: _Job) -> None:
+    """Stages 4–5: per-item enrichment, output writes and manifest update."""
+    if job.llm_future is not None:
+        llm_result = job.llm_future.result()
+        _record_llm_fallback(job.debug, llm_result)
+        _apply_llm_result(job, llm_result, job.llm_reason)
+
+    _status = job.status
+    debug = job.debug
+    raw_items = job.raw_items
+    supplier_normalised = job.supplier_name
+    pdf_name = job.pdf_path.stem
+
+    # ── Stage 4: per-item enrichment ─────────────────────────────────
+    lookup_agent = LookupAgent(cache=get_cache())
+    lookup_agent.reset_pdf_budget()
+
+    _status(f"Enriching and scoring {len(raw_items)} line items...")
+    prepared = [_prepare_item(raw, supplier_normalised) for raw in raw_items]
+
+    # Deduplicate lookup queries (first item wins), then resolve them
+    # concurrently – lookups are network-bound and independent.
+    queries: dict[str, dict[str, Any]] = {}
+    for raw, (_, _, query_key) in zip(raw_items, prepared):
+        if query_key:
+            queries.setdefault(query_key, raw)
+    lookups = _run_lookups(queries, lookup_agent, _status)
+
+    final_items = [
+        _finish_item(item, uom_result, lookups.get(query_key) if query_key else None, job.events)
+        for item, uom_result, query_key in prepared
+    ]
+    lookup_agent.flush_cache()
+
+    # ── Stage 5: build output ────────────────────────────────────────
+    num_escalations = sum(1 for i in final_items if i.get("escalation_flag"))
+    output = {
+        "file": job.pdf_path.name,
+        "supplier_name": supplier_normalised,
+        "line_items": final_items,
+        "stats": {
+            "num_items": len(final_items),
+            "num_escalations": num_escalations,
+        },
+    }
 
+    # Atomic writes (failures always carry the debug data in their error file)
+    _atomic_write(job.output_dir / f"{pdf_name}.json", output)
+    if config.WRITE_DEBUG_ALWAYS:
+        _atomic_write(job.output_dir / f"{pdf_name}.debug.json", debug, fsync=False)
+
+    # Update manifest
+    mark_processed(job.pdf_path, job.fhash, job.st)
+
+    logger.info(
+        "✓ %s → %d items, %d escalations",
+        pdf_name, len(final_items), num_escalations,
+    )
+    job.output = output
+    job.done = True
+
+
+_STAGES = (_stage_extract, _stage_supplier, _stage_enrich)
+
+
+def _run_stage(stage: Callable[[_Job], None], job: _Job) -> None:
+    """Run *stage* on *job* unless it already finished; record any failure.
+
+    Must handle the exception itself (rather than re-raise) so that the
+    traceback is captured while it is still the active exception.
+    """
+    if job.done:
+        return
+    try:
+        stage(job)
+        if job.done:
+            job.events.close()
     except Exception as exc:
-        logger.exception("✗ Failed to process %s", pdf_name)
-        error_output = {
-            "file": pdf_path.name,
-            "stage": debug.get("stages", {}).get("current_stage", "unknown"),
-            "error": str(exc),
-            "traceback": traceback.format_exc(),
-            "partial_debug": debug,
-        }
-        _atomic_write(failed_dir / f"{pdf_name}.error.json", error_output)
-        return None
+        job.events.close()
+        _record_failure(job.pdf_path, job.failed_dir, exc, job.debug)
+        job.done = True
+
+
+def _record_failure(pdf_path: Path, failed_dir: Path, exc: Exception, debug: dict[str, Any]) -> None:
+    """Log *exc* and write ``<failed_dir>/<name>.error.json`` for *pdf_path*.
+
+    Call from inside the ``except`` block so the traceback is still current.
+    """
+    logger.exception("✗ Failed to process %s", pdf_path.stem)
+    error_output = {
+        "file": pdf_path.name,
+        "stage": debug.get("stages", {}).get("current_stage", "unknown"),
+        "error": str(exc),
+        "traceback": traceback.format_exc(),
+        "partial_debug": debug,
+    }
+    _atomic_write(failed_dir / f"{pdf_path.stem}.error.json", error_output)
+
+
+def process_pdf(
+    pdf_path: Path,
+    output_dir: Path | None = None,
+    failed_dir: Path | None = None,
+    force: bool = False,
+    status_cb: Callable[[str], None] | None = None,
+) -> dict[str, Any] | None:
+    """Process a single invoice PDF end-to-end.
+
+    Returns the final output dict, or ``None`` if already processed.
+    """
+    output_dir, failed_dir = _prepare_dirs(output_dir, failed_dir)
+    job = _start_job(pdf_path, output_dir, failed_dir, force, status_cb)
+    for stage in _STAGES:
+        _run_stage(stage, job)
+    return job.output
+
+
+def pipeline_batch(
+    pdf_paths: Iterable[Path],
+    output_dir: Path | None = None,
+    failed_dir: Path | None = None,
+    force: bool = False,
+    status_cb: Callable[[Path, str], None] | None = None,
+) -> Iterator[tuple[Path, dict[str, Any] | None]]:
+    """Process several PDFs with their stages overlapped across files.
+
+    Extraction, supplier detection / LLM fallback and enrichment each run on
+    their own thread, connected by bounded queues, so Docling can work on
+    PDF N+1 while the lookups for PDF N are still in flight.  LLM fallbacks
+    from the quality gate are pooled into shared requests and only awaited
+    by the enrichment stage.
+
+    Parameters
+    ----------
+    pdf_paths : iterable of Path
+        PDFs to process.
+    output_dir, failed_dir, force
+        As for :func:`process_pdf`.
+    status_cb : callable, optional
+        Called as ``status_cb(pdf_path, message)`` from the stage threads.
+
+    Yields
+    ------
+    tuple of (Path, dict or None)
+        Each PDF with the result :func:`process_pdf` would have returned,
+        in input order.
+    """
+    output_dir, failed_dir = _prepare_dirs(output_dir, failed_dir)
+    queues: list[queue.Queue[_Job | None]] = [
+        queue.Queue(maxsize=_STAGE_QUEUE_SIZE) for _ in _STAGES
+    ]
+    results: queue.Queue[_Job | None] = queue.Queue()
+
+    try:
+        from invoice_uom.llm_extract import BatchedLLMExtractor
+        batcher: Any = BatchedLLMExtractor()
+    except ImportError:
+        batcher = None
+
+    def _feed() -> None:
+        try:
+            for pdf_path in pdf_paths:
+                cb = functools.partial(status_cb, pdf_path) if status_cb else None
+                try:
+                    job = _start_job(pdf_path, output_dir, failed_dir, force, cb)
+                except Exception as exc:
+                    # An unreadable file fails on its own, like a failed stage;
+                    # it still flows through so results stay in input order.
+                    debug = {"file": pdf_path.name, "stages": {"current_stage": "hashing"}}
+                    _record_failure(pdf_path, failed_dir, exc, debug)
+                    job = _Job(pdf_path, "", output_dir, failed_dir, lambda msg: None, done=True)
+                job.llm_batcher = batcher
+                queues[0].put(job)
+        finally:
+            queues[0].put(None)
+
+    def _work(stage: Callable[[_Job], None], inbox: queue.Queue, outbox: queue.Queue) -> None:
+        while (job := inbox.get()) is not None:
+            _run_stage(stage, job)
+            outbox.put(job)
+        if batcher is not None and stage is _stage_supplier:
+            # No more submissions are coming; don't sit out the batch timer.
+            batcher.flush()
+        outbox.put(None)
+
+    threads = [threading.Thread(target=_feed, name="pipeline-feed", daemon=True)]
+    for stage, inbox, outbox in zip(_STAGES, queues, [*queues[1:], results]):
+        threads.append(threading.Thread(
+            target=_work, args=(stage, inbox, outbox),
+            name=f"pipeline{stage.__name__.removeprefix('_stage')}", daemon=True,
+        ))
+    for t in threads:
+        t.start()
+
+    while (job := results.get()) is not None:
+        yield job.pdf_path, job.output
+    for t in threads:
+        t.join()
+    flush_manifest()
 
 
 # ── helpers ─────────────────────────────────────────────────────────────────
@@ -322,15 +666,41 @@ def _detect_supplier(
     return "", ""
 
 
-def _enrich_item(
+def _run_lookups(
+    queries: dict[str, dict[str, Any]],
+    lookup_agent: LookupAgent,
+    status: Callable[[str], None],
+) -> dict[str, dict[str, Any]]:
+    """Resolve each distinct lookup query on a thread pool.
+
+    Status messages are emitted from the calling thread only, since UI
+    callbacks (Streamlit) can't be driven from worker threads.
+    """
+    if not queries:
+        return {}
+    workers = min(config.LOOKUP_WORKERS, len(queries))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lookup") as pool:
+        futures = {}
+        for query_key, raw in queries.items():
+            status(f"Agentic Lookup via DuckDuckGo for: '{query_key}'...")
+            futures[query_key] = pool.submit(
+                lookup_agent.resolve,
+                raw.get("item_description", ""),
+                raw.get("sku"),
+                raw.get("manufacturer_part_number"),
+            )
+        return {query_key: f.result() for query_key, f in futures.items()}
+
+
+def _prepare_item(
     raw: dict[str, Any],
     supplier_name: str,
-    lookup_agent: LookupAgent,
-    lookup_queries_done: dict[str, dict[str, Any]],
-    debug: dict[str, Any],
-    status_cb: Callable[[str], None] | None = None,
-) -> dict[str, Any]:
-    """Enrich a single raw item: UOM parsing, price, lookup, scoring."""
+) -> tuple[dict[str, Any], UOMParseResult, str]:
+    """UOM parsing for a single raw item.
+
+    Returns the partially-enriched item, the chosen UOM parse result and the
+    lookup query key (empty when no lookup is needed).
+    """
     # Parse UOM from all available text
     # Strategy: check uom_raw first, then description.  BUT if uom_raw
     # resolves to a generic "EA" (pack_qty=1), still check the description
@@ -359,10 +729,8 @@ def _enrich_item(
         uom_result = desc_result
 
     if uom_result is None:
-        from invoice_uom.uom_normalize import UOMParseResult
         uom_result = UOMParseResult()
 
-    original_uom = uom_result.original_uom
     pack_qty = uom_result.detected_pack_quantity
     canonical_uom = uom_result.canonical_uom
 
@@ -371,7 +739,7 @@ def _enrich_item(
         "supplier_name": supplier_name,
         "item_description": raw.get("item_description", ""),
         "manufacturer_part_number": raw.get("manufacturer_part_number"),
-        "original_uom": original_uom,
+        "original_uom": uom_result.original_uom,
         "detected_pack_quantity": pack_qty,
         "canonical_base_uom": "EA",
         "quantity": raw.get("quantity"),
@@ -379,18 +747,13 @@ def _enrich_item(
         "amount": raw.get("amount"),
     }
 
-    # Agentic lookup if needed
-    evidence: dict[str, Any] = {}
-    llm_evidence: dict[str, Any] = {"llm_call_used": False, "llm_call_reason": None,
-                                     "llm_call_status": "not_needed", "llm_call_attempts": 0}
-    lookup_sources: list[dict[str, str]] = []
-
     needs_lookup = (
         (canonical_uom not in config.EACH_UOMS and pack_qty is None)
         or (canonical_uom is None)
         or (pack_qty is None and raw.get("quantity") is not None)
     ) and bool(raw.get("sku") or raw.get("manufacturer_part_number") or len(raw.get("item_description", "")) > 5)
 
+    query_key = ""
     if needs_lookup:
         query_key = LookupAgent._build_query(
             raw.get("item_description", ""),
@@ -398,36 +761,33 @@ def _enrich_item(
             raw.get("manufacturer_part_number"),
             supplier_name,
         )
-        if query_key and query_key in lookup_queries_done:
-            # Reuse previous lookup result
-            lr = lookup_queries_done[query_key]
-            if lr.get("pack_qty") is not None and pack_qty is None:
-                pack_qty = lr["pack_qty"]
-                item["detected_pack_quantity"] = pack_qty
-            if lr.get("uom") is not None and original_uom is None:
-                original_uom = lr["uom"]
-                item["original_uom"] = original_uom
-            lookup_sources = lr.get("lookup_sources", [])
-            llm_evidence = lr.get("llm_result", llm_evidence)
-            evidence["lookup_match"] = bool(lr.get("pack_qty") or lr.get("uom"))
-        elif query_key:
-            if status_cb:
-                status_cb(f"Agentic Lookup via DuckDuckGo for: '{query_key}'...")
-            lr = lookup_agent.resolve(
-                raw.get("item_description", ""),
-                raw.get("sku"),
-                raw.get("manufacturer_part_number"),
-            )
-            lookup_queries_done[query_key] = lr
-            if lr.get("pack_qty") is not None and pack_qty is None:
-                pack_qty = lr["pack_qty"]
-                item["detected_pack_quantity"] = pack_qty
-            if lr.get("uom") is not None and original_uom is None:
-                original_uom = lr["uom"]
-                item["original_uom"] = original_uom
-            lookup_sources = lr.get("lookup_sources", [])
-            llm_evidence = lr.get("llm_result", llm_evidence)
-            evidence["lookup_match"] = bool(lr.get("pack_qty") or lr.get("uom"))
+    return item, uom_result, query_key
+
+
+def _finish_item(
+    item: dict[str, Any],
+    uom_result: UOMParseResult,
+    lr: dict[str, Any] | None,
+    events: DebugWriter,
+) -> dict[str, Any]:
+    """Apply the lookup result *lr* (if any), then price and score *item*."""
+    evidence: dict[str, Any] = {}
+    llm_evidence: dict[str, Any] = {"llm_call_used": False, "llm_call_reason": None,
+                                     "llm_call_status": "not_needed", "llm_call_attempts": 0}
+    lookup_sources: list[dict[str, str]] = []
+
+    if lr is not None:
+        if lr.get("pack_qty") is not None and item["detected_pack_quantity"] is None:
+            item["detected_pack_quantity"] = lr["pack_qty"]
+        if lr.get("uom") is not None and item["original_uom"] is None:
+            item["original_uom"] = lr["uom"]
+        lookup_sources = lr.get("lookup_sources", [])
+        llm_evidence = lr.get("llm_result", llm_evidence)
+        evidence["lookup_match"] = bool(lr.get("pack_qty") or lr.get("uom"))
+
+    # Normalised once here for pricing and scoring, which both need it
+    original_uom = item["original_uom"]
+    item["_canonical_uom"] = normalise_uom_code(original_uom) if original_uom else None
 
     # Price computation
     price_debug: dict[str, Any] = {}
@@ -450,44 +810,98 @@ def _enrich_item(
     }
 
     # Remove internal-only fields
+    item.pop("_canonical_uom", None)
     item.pop("quantity", None)
     item.pop("unit_price", None)
     item.pop("amount", None)
 
-    # Add price debug to debug artifact
-    debug.setdefault("stages", {}).setdefault("price_computations", []).append(price_debug)
-    debug.setdefault("stages", {}).setdefault("confidence_breakdowns", []).append(breakdown)
+    # Per-item debug goes to the event stream rather than the summary dict
+    events.event("price_computation", price_debug)
+    events.event("confidence_breakdown", breakdown)
 
     return item
 
 
-def _atomic_write(path: Path, data: Any) -> None:
-    """Write JSON *data* to *path* atomically (write to temp, then rename)."""
+def _atomic_write(path: Path, data: Any, fsync: bool = True) -> None:
+    """Write JSON *data* to *path* atomically (write to temp, then replace).
+
+    With *fsync* the data is flushed to disk before the rename, so a crash
+    can't leave an empty file behind a manifest entry; debug artefacts skip it.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    fd, tmp_path = tempfile.mkstemp(
-        dir=str(path.parent), suffix=".tmp", prefix=".tmp_"
-    )
+    # Per-process temp name so concurrent workers never interleave writes
+    tmp = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
     try:
-        with os.fdopen(fd, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
-        # On Windows, rename fails if target exists
-        if path.exists():
-            path.unlink()
-        Path(tmp_path).rename(path)
+        with open(tmp, "wb") as f:
+            f.write(_json_bytes(data))
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)  # atomic on POSIX and Windows
     except Exception:
         try:
-            Path(tmp_path).unlink(missing_ok=True)
+            tmp.unlink(missing_ok=True)
         except Exception:
             pass
         raise
 
 
+class DebugWriter:
+    """Streams per-item debug events to ``<name>.debug.ndjson``.
+
+    Each ``event`` is written straight away as one JSON line, so the debug
+    data for large invoices is never held in memory and can be followed
+    with ``tail -f``.  A writer without a path drops events.
+    """
+
+    def __init__(self, path: Path | None) -> None:
+        self.path = path
+        self._fh: BinaryIO | None = None
+
+    def event(self, stage: str, payload: dict[str, Any]) -> None:
+        if self.path is None:
+            return
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "wb")
+        self._fh.write(_json_line({"event": stage, "data": payload}))
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+def _json_line(data: Any) -> bytes:
+    if _HAS_ORJSON:
+        return orjson.dumps(
+            data, default=str, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(data, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+
+
+def _json_bytes(data: Any) -> bytes:
+    """Indented UTF-8 JSON; values JSON can't represent are written via ``str``."""
+    if _HAS_ORJSON:
+        return orjson.dumps(
+            data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(data, indent=2, ensure_ascii=False, default=str).encode("utf-8")
+
+
+# Markdown / OCR artefacts that mark a supplier name as unusable
+_BAD_SUPPLIER_RE = re.compile("|".join(
+    map(re.escape, ["<!--", "##", "|", "---", "**", "image", "Invoice"])
+))
+# Descriptions that are clearly noise rather than products
+_NOISE_DESC_RE = re.compile(r"^_|^10\.|____")
+
+
 def _supplier_looks_bad(supplier: str) -> bool:
     """Return True if the supplier name is clearly wrong (markdown artifacts, etc.)."""
     if not supplier or len(supplier) < 3:
         return True
-    bad_patterns = ["<!--", "##", "|", "---", "**", "image", "Invoice"]
-    return any(p in supplier for p in bad_patterns)
+    return _BAD_SUPPLIER_RE.search(supplier) is not None
 
 
 def _items_look_bad(items: list[dict[str, Any]]) -> bool:
@@ -517,28 +931,21 @@ def _items_look_bad(items: list[dict[str, Any]]) -> bool:
         if valid_count == len(items):
             return False  # All items look legit
 
-    short_desc_count: int = 0
-    no_uom_count: int = 0
-    noise_count: int = 0
-
+    short_desc_count = 0
+    no_uom_count = 0
     for item in items:
         desc = item.get("item_description", "")
+        # Any clearly-noisy description condemns the whole list
+        if _NOISE_DESC_RE.search(desc):
+            return True
         if len(desc) < 10:
-            short_desc_count = short_desc_count + 1  # type: ignore
+            short_desc_count += 1
         if not item.get("uom_raw"):
-            no_uom_count = no_uom_count + 1  # type: ignore
-        # Check for noise patterns in description
-        if desc.startswith("_") or desc.startswith("10.") or "____" in desc:
-            noise_count = noise_count + 1  # type: ignore
+            no_uom_count += 1
 
-    total = len(items)
     # If >60% of items have short descs AND no UOM, it's bad
-    if short_desc_count > total * 0.6 and no_uom_count > total * 0.6:
-        return True
-    # If any item is clearly noise
-    if noise_count > 0:
-        return True
-    return False
+    total = len(items)
+    return short_desc_count * 10 > total * 6 and no_uom_count * 10 > total * 6
 
 
 def _try_llm_extraction(
@@ -553,36 +960,57 @@ def _try_llm_extraction(
         logger.warning("llm_extract module not available")
         return None
 
-    # Build raw text from all text blocks + any table content
+    raw_text = _llm_fallback_text(extraction)
+    if not raw_text.strip():
+        return None
+
+    result = extract_with_llm(raw_text, pdf_name)
+    _record_llm_fallback(debug, result)
+    return result
+
+
+def _llm_fallback_text(extraction: dict[str, Any]) -> str:
+    """Raw text sent to the LLM fallback for *extraction*.
+
+    Only the first ``config.LLM_EXTRACT_MAX_CHARS`` characters are built,
+    since the LLM client drops the rest anyway.
+    """
+    limit = config.LLM_EXTRACT_MAX_CHARS
     text_parts: list[str] = []
-    
+    size = -1  # no separator before the first part
+    for part in _llm_text_parts(extraction):
+        text_parts.append(part)
+        size += len(part) + 1
+        if size >= limit:
+            break
+    return "\n".join(text_parts)[:limit]
+
+
+def _llm_text_parts(extraction: dict[str, Any]) -> Iterator[str]:
+    # Build raw text from all text blocks + any table content
     # Prioritize pdfplumber perfectly aligned visual text if docling failed
     if extraction.get("layout_text"):
-        text_parts.append(extraction["layout_text"])
+        yield extraction["layout_text"]
+        return
+
+    # Prioritise the semantic HTML / formatting from Docling for the LLM
+    structured = extraction.get("structured_tables", [])
+    if structured:
+        for t in structured:
+            yield str(t)
     else:
-        # Prioritise the semantic HTML / formatting from Docling for the LLM
-        structured = extraction.get("structured_tables", [])
-        if structured:
-            for t in structured:
-                text_parts.append(str(t))
-        else:
-            # Fallback to flattening the 2D arrays
-            for table in extraction.get("tables", []):
-                for row in table:
-                    text_parts.append(" | ".join(str(c) for c in row))
-
-        for block in extraction.get("text_blocks", []):
-            text_parts.append(block)
-
-    raw_text = "\n".join(text_parts)
-    if not raw_text.strip():
-        return None
+        # Fallback to flattening the 2D arrays
+        for table in extraction.get("tables", []):
+            for row in table:
+                yield " | ".join(str(c) for c in row)
 
-    result = extract_with_llm(raw_text, pdf_name)
+    yield from extraction.get("text_blocks", [])
+
+
+def _record_llm_fallback(debug: dict[str, Any], result: dict[str, Any]) -> None:
     debug["stages"]["llm_fallback"] = {
         "attempted": True,
         "items_returned": len(result.get("line_items", [])),
         "supplier_returned": result.get("supplier_name", ""),
     }
-    return result
 
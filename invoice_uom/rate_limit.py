@@ -2,22 +2,42 @@
 
 Thread-safe.  All LLM call-sites must call ``limiter.acquire()`` before making a
 request.  Returns ``True`` if the call is allowed, ``False`` if the daily budget
-is exhausted.  Blocks (with back-off) if the per-minute bucket is empty.
+is exhausted.  Blocks until the next token is due if the per-minute bucket
+is empty.  The daily counter is saved in the background, not per call.
+
+Outbound lookup HTTP (search + product pages) is throttled separately, per
+host, by ``host_limiter(url).acquire()``.
 """
 
 from __future__ import annotations
 
+import atexit
 import json
+import logging
+import os
 import threading
 import time
+from collections import deque
 from datetime import date
 from pathlib import Path
+from urllib.parse import urlsplit
 
 from invoice_uom import config
 
+logger = logging.getLogger(__name__)
+
 
 class RateLimiter:
-    """Token-bucket (per-minute) + daily cap, with disk-persisted counter."""
+    """Token-bucket (per-minute) + daily cap, with disk-persisted counter.
+
+    The daily counter is written behind: ``acquire`` only marks it dirty and
+    a daemon thread saves it every ``_FLUSH_INTERVAL_S`` seconds, with a
+    final synced write at interpreter exit.  Day rollovers and reaching the
+    cap are written synchronously, since worker processes that leave via
+    ``os._exit`` never run the exit hook.
+    """
+
+    _FLUSH_INTERVAL_S = 5.0
 
     def __init__(
         self,
@@ -34,10 +54,14 @@ class RateLimiter:
         self._max_tokens = float(rpm)
         self._last_refill = time.monotonic()
         self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
 
         # Daily counter (persisted)
         self._today: str = ""
         self._daily_count: int = 0
+        self._dirty = False
+        self._flush_lock = threading.Lock()
+        self._flusher: threading.Thread | None = None
         self._load_daily_counter()
 
     # ── public API ──────────────────────────────────────────────────────
@@ -47,31 +71,53 @@ class RateLimiter:
         Returns ``True`` if the request is allowed.  Returns ``False`` if
         the daily cap has been reached.
         """
-        with self._lock:
-            self._rotate_day_if_needed()
-            if self._daily_count >= self._rpd:
-                return False
-
         deadline = time.monotonic() + timeout
-        while True:
-            with self._lock:
+        flush_now = False
+        with self._cond:
+            while True:
+                flush_now |= self._rotate_day_if_needed()
+                if self._daily_count >= self._rpd:
+                    allowed = False
+                    break
                 self._refill()
                 if self._tokens >= 1.0:
                     self._tokens -= 1.0
                     self._daily_count += 1
-                    self._persist_daily_counter()
-                    return True
-            # Wait before retrying
-            remaining = deadline - time.monotonic()
-            if remaining <= 0:
-                return False
-            time.sleep(min(2.0, remaining))
+                    self._mark_dirty()
+                    flush_now |= self._daily_count >= self._rpd
+                    allowed = True
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    allowed = False
+                    break
+                # Sleep exactly until the bucket holds a whole token again;
+                # the lock is released while waiting.
+                deficit = (1.0 - self._tokens) * 60.0 / self._rpm if self._rpm > 0 else remaining
+                self._cond.wait(min(deficit, remaining))
+        if flush_now:
+            self._flush_quietly(sync=True)
+        return allowed
 
     @property
     def daily_remaining(self) -> int:
         with self._lock:
-            self._rotate_day_if_needed()
-            return max(0, self._rpd - self._daily_count)
+            rotated = self._rotate_day_if_needed()
+            remaining = max(0, self._rpd - self._daily_count)
+        if rotated:
+            self._flush_quietly(sync=True)
+        return remaining
+
+    def flush(self, sync: bool = False) -> None:
+        """Write the daily counter now if it changed since the last write."""
+        # Serialises writers so an older snapshot never lands after a newer one
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = {"date": self._today, "count": self._daily_count}
+                self._dirty = False
+            self._persist_daily_counter(snapshot, sync=sync)
 
     # ── internals ───────────────────────────────────────────────────────
     def _refill(self) -> None:
@@ -80,12 +126,47 @@ class RateLimiter:
         self._tokens = min(self._max_tokens, self._tokens + elapsed * (self._rpm / 60.0))
         self._last_refill = now
 
-    def _rotate_day_if_needed(self) -> None:
+    def _rotate_day_if_needed(self) -> bool:
+        """Reset the counter on a new day; returns whether it rolled over."""
         today = date.today().isoformat()
-        if today != self._today:
-            self._today = today
-            self._daily_count = 0
-            self._persist_daily_counter()
+        if today == self._today:
+            return False
+        self._today = today
+        self._daily_count = 0
+        self._mark_dirty()
+        return True
+
+    def _mark_dirty(self) -> None:
+        """Flag the counter for the write-behind thread (caller holds the lock)."""
+        self._dirty = True
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="rate-limit-flush", daemon=True,
+            )
+            self._flusher.start()
+            atexit.register(self.flush, sync=True)
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self._FLUSH_INTERVAL_S)
+            self._flush_quietly()
+
+    def _flush_quietly(self, sync: bool = False) -> None:
+        try:
+            self.flush(sync=sync)
+        except OSError as exc:
+            logger.warning("Could not persist daily LLM counter: %s", exc)
+
+    def _after_fork_in_child(self) -> None:
+        """Fresh locks and no flusher: neither survives ``fork`` usefully.
+
+        The parent's flusher thread doesn't exist in the child, and a lock
+        held by another parent thread at fork time would never be released.
+        """
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._flusher = None
 
     def _load_daily_counter(self) -> None:
         try:
@@ -101,14 +182,16 @@ class RateLimiter:
             self._today = date.today().isoformat()
             self._daily_count = 0
 
-    def _persist_daily_counter(self) -> None:
+    def _persist_daily_counter(self, snapshot: dict[str, object], sync: bool = False) -> None:
         self._counter_file.parent.mkdir(parents=True, exist_ok=True)
-        tmp = self._counter_file.with_suffix(".tmp")
-        tmp.write_text(
-            json.dumps({"date": self._today, "count": self._daily_count}),
-            encoding="utf-8",
-        )
-        tmp.replace(self._counter_file)
+        # Per-process temp name so concurrent workers never interleave writes
+        tmp = self._counter_file.with_suffix(f"{self._counter_file.suffix}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(snapshot).encode("utf-8"))
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, self._counter_file)
 
 
 # Module-level singleton – import this everywhere.
@@ -124,3 +207,57 @@ def get_limiter() -> RateLimiter:
             if _limiter is None:
                 _limiter = RateLimiter()
     return _limiter
+
+
+def _reset_after_fork() -> None:
+    global _limiter_lock
+    _limiter_lock = threading.Lock()
+    if _limiter is not None:
+        _limiter._after_fork_in_child()
+
+
+if hasattr(os, "register_at_fork"):  # POSIX only; spawned children re-import
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class SlidingWindowLimiter:
+    """At most *max_requests* acquisitions in any *window* seconds."""
+
+    def __init__(
+        self,
+        max_requests: int = config.LOOKUP_HOST_MAX_REQUESTS,
+        window: float = config.LOOKUP_HOST_WINDOW_S,
+    ) -> None:
+        self._max = max_requests
+        self._window = window
+        self._stamps: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a slot in the window is free, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._stamps and now - self._stamps[0] >= self._window:
+                    self._stamps.popleft()
+                if len(self._stamps) < self._max:
+                    self._stamps.append(now)
+                    return
+                wait = self._window - (now - self._stamps[0])
+            time.sleep(wait)
+
+
+_host_limiters: dict[str, SlidingWindowLimiter] = {}
+_host_limiters_lock = threading.Lock()
+
+
+def host_limiter(url: str) -> SlidingWindowLimiter:
+    """Return the shared limiter for *url*'s host (created on first call)."""
+    host = urlsplit(url).netloc.lower()
+    limiter = _host_limiters.get(host)
+    if limiter is None:
+        with _host_limiters_lock:
+            limiter = _host_limiters.get(host)
+            if limiter is None:
+                limiter = _host_limiters[host] = SlidingWindowLimiter()
+    return limiter
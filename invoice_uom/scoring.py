@@ -9,6 +9,7 @@ from __future__ import annotations
 from typing import Any
 
 from invoice_uom import config
+from invoice_uom.uom_normalize import normalise_uom_code
 
 
 # ── score components ────────────────────────────────────────────────────────
@@ -55,45 +56,41 @@ def compute_confidence(
         Per-component contribution for debug output.
     """
     evidence = evidence or {}
+    get = item.get
+    pack_qty = get("detected_pack_quantity")
+
+    # (component, fired) in the order contributions are summed.  A flat
+    # table rather than a closure per component: this runs for every item.
+    signals = (
+        # Positive signals
+        ("has_description",       bool(get("item_description"))),
+        ("has_quantity",          get("quantity") is not None),
+        ("has_unit_price",        get("unit_price") is not None),
+        ("has_amount",            get("amount") is not None),
+        ("uom_explicit_inline",   get("original_uom") is not None),
+        ("pack_explicit_inline",  pack_qty is not None),
+        ("supplier_normalised",   bool(get("supplier_name"))),
+        ("has_mpn",               bool(get("manufacturer_part_number"))),
+        # Lookup evidence
+        ("lookup_evidence_match", bool(evidence.get("lookup_match"))),
+        # Deductions
+        ("conflicting_evidence",  bool(evidence.get("conflicting"))),
+        ("ocr_low_confidence",    bool(evidence.get("ocr_low"))),
+        ("column_ambiguity",      bool(evidence.get("column_ambiguity"))),
+        # Special: if UOM is a pack type but pack_qty is unknown → can't compute price
+        ("missing_uom_pack_for_price",
+         pack_qty is None and _canonical_uom(item) in config.PACK_UOMS),
+        ("price_null",            get("price_per_base_unit") is None),
+    )
+
     score = BASE_SCORE
     breakdown: dict[str, float] = {"base": BASE_SCORE}
-
-    def _apply(name: str, condition: bool) -> None:
-        nonlocal score
-        if condition:
+    for name, fired in signals:
+        if fired:
             delta = COMPONENT_WEIGHTS[name]
             score += delta
             breakdown[name] = delta
 
-    # Positive signals
-    _apply("has_description",     bool(item.get("item_description")))
-    _apply("has_quantity",        item.get("quantity") is not None)
-    _apply("has_unit_price",      item.get("unit_price") is not None)
-    _apply("has_amount",          item.get("amount") is not None)
-    _apply("uom_explicit_inline", item.get("original_uom") is not None)
-    _apply("pack_explicit_inline",item.get("detected_pack_quantity") is not None)
-    _apply("supplier_normalised", bool(item.get("supplier_name")))
-    _apply("has_mpn",            bool(item.get("manufacturer_part_number")))
-
-    # Lookup evidence
-    _apply("lookup_evidence_match", bool(evidence.get("lookup_match")))
-
-    # Deductions
-    _apply("conflicting_evidence",      bool(evidence.get("conflicting")))
-    _apply("ocr_low_confidence",        bool(evidence.get("ocr_low")))
-    _apply("column_ambiguity",          bool(evidence.get("column_ambiguity")))
-
-    # Special: if UOM is a pack type but pack_qty is unknown → can't compute price
-    uom = item.get("original_uom")
-    if uom:
-        from invoice_uom.uom_normalize import normalise_uom_code
-        canonical = normalise_uom_code(uom)
-        if canonical in config.PACK_UOMS and item.get("detected_pack_quantity") is None:
-            _apply("missing_uom_pack_for_price", True)
-
-    if item.get("price_per_base_unit") is None:
-        _apply("price_null", True)
-
     score = max(0.0, min(1.0, round(score, 4)))
     return score, breakdown
 
@@ -103,10 +100,17 @@ def should_escalate(score: float, item: dict[str, Any]) -> bool:
     if score < config.CONFIDENCE_THRESHOLD:
         return True
     # Escalate if critical fields missing that prevent price computation
-    uom = item.get("original_uom")
-    if uom:
-        from invoice_uom.uom_normalize import normalise_uom_code
-        canonical = normalise_uom_code(uom)
-        if canonical in config.PACK_UOMS and item.get("detected_pack_quantity") is None:
-            return True
+    canonical = _canonical_uom(item)
+    if canonical in config.PACK_UOMS and item.get("detected_pack_quantity") is None:
+        return True
     return False
+
+
+def _canonical_uom(item: dict[str, Any]) -> str | None:
+    """Canonical code of ``original_uom``, precomputed by the pipeline if present."""
+    if "_canonical_uom" in item:
+        return item["_canonical_uom"]
+    uom = item.get("original_uom")
+    if not uom:
+        return None
+    return normalise_uom_code(uom)
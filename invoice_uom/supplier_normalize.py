@@ -5,8 +5,9 @@ Deterministic alias lookup first, optional fuzzy match via rapidfuzz.
 
 from __future__ import annotations
 
+import functools
 import re
-from typing import Any
+from typing import Any, Mapping
 
 from invoice_uom import config
 
@@ -16,6 +17,56 @@ try:
 except ImportError:
     _HAS_RAPIDFUZZ = False
 
+# ── alias prefix trie ───────────────────────────────────────────────────────
+# Token trie over ``config.SUPPLIER_ALIASES`` so the longest alias prefix of
+# a name is found in one walk instead of re-joining every prefix.  The
+# canonical name sits under the ``""`` key, which no split token can be.
+_TRIE_VALUE = ""
+
+
+def _build_alias_trie(aliases: Mapping[str, str]) -> dict[str, Any]:
+    root: dict[str, Any] = {}
+    for key, canonical in aliases.items():
+        node = root
+        for tok in key.split():
+            node = node.setdefault(tok, {})
+        node[_TRIE_VALUE] = canonical
+    return root
+
+
+_ALIAS_TRIE = _build_alias_trie(config.SUPPLIER_ALIASES)
+
+
+def _longest_alias_prefix(key: str) -> str | None:
+    """Canonical name for the longest whole-token alias prefix of *key*."""
+    best = None
+    node = _ALIAS_TRIE
+    for tok in key.split():
+        node = node.get(tok)
+        if node is None:
+            break
+        best = node.get(_TRIE_VALUE, best)
+    return best
+
+
+# ── candidate extraction patterns ──────────────────────────────────────────
+_CORP_SUFFIX_RE = re.compile(r"\b(LLC|INC\.?|L\.L\.C\.?|LTD\.?|CORP\.?|COMPANY)\b", re.I)
+_DOMAIN_RE = re.compile(r"\b([\w\-]+)\.(?:com|net|org|co)\b", re.I)
+_TRAILING_PIPE_RE = re.compile(r"\|.*$")
+_HTML_COMMENT_RE = re.compile(r"<!--.*-->")
+_GENERIC_DOMAINS = frozenset(
+    ("gmail", "yahoo", "hotmail", "invoice", "sales", "info", "orders", "remit", "www")
+)
+
+# Every Pass 2 reject test that is a regex, in one scan per line.
+_SKIP_LINE_RE = re.compile(
+    r"^(?:[#|\[\]!<>()]|---)"  # markdown / image / formatting artefacts
+    r"|^(?:cust|ship|bill|sold|remit|invoice|order|date|page|po|job)\b"  # field labels
+    r"|\b\d{3}[-.]?\d{3}[-.]?\d{4}\b"  # phone numbers
+    r"|^[\d\s/\-\.]+$",  # dates / bare numbers
+    re.I,
+)
+
 
 def extract_supplier_candidates(text_blocks: list[str], max_blocks: int = 15) -> list[str]:
     """Heuristically pull supplier-name candidates from the first few text blocks.
@@ -24,53 +75,35 @@ def extract_supplier_candidates(text_blocks: list[str], max_blocks: int = 15) ->
     2. Falls back to cleaning arbitrary header lines.
     """
     candidates: list[str] = []
-    
+    header = [block.strip() for block in text_blocks[:max(max_blocks, 0)]]
+
     # Pass 1: Active anchor search (highest confidence)
-    for i, block in enumerate(text_blocks):
-        if i >= max_blocks:
-            break
-        line = block.strip()
+    for line in header:
         # If the block is too long, don't use it for the anchor search to avoid grabbing paragraphs
-        if len(line.split()) < 15:
-            if re.search(r"\b(LLC|INC\.?|L\.L\.C\.?|LTD\.?|CORP\.?|COMPANY)\b", line, re.I):
-                # Clean up trailing garbage if any
-                clean_line = re.sub(r"\|.*$", "", line).strip()
-                clean_line = re.sub(r"<!--.*-->", "", clean_line).strip()
-                if len(clean_line) > 3:
-                    candidates.insert(0, clean_line)  # highest priority
-        
+        if len(line.split()) < 15 and _CORP_SUFFIX_RE.search(line):
+            # Clean up trailing garbage if any
+            clean_line = _TRAILING_PIPE_RE.sub("", line).strip()
+            clean_line = _HTML_COMMENT_RE.sub("", clean_line).strip()
+            if len(clean_line) > 3:
+                candidates.insert(0, clean_line)  # highest priority
+
         # Look for domain names / emails that give away the company (now correctly matches raw domains without www)
-        domain_match = re.search(r"\b([\w\-]+)\.(?:com|net|org|co)\b", line, re.I)
+        domain_match = _DOMAIN_RE.search(line)
         if domain_match:
             domain = domain_match.group(1).replace("-", " ")
-            if len(domain) > 2 and domain.lower() not in ("gmail", "yahoo", "hotmail", "invoice", "sales", "info", "orders", "remit", "www"):
+            if len(domain) > 2 and domain.lower() not in _GENERIC_DOMAINS:
                 candidates.append(domain.upper())
 
     # Pass 2: Heuristic header cleaning
-    for i, block in enumerate(text_blocks):
-        if i >= max_blocks:
-            break
-        line = block.strip()
-        if not line or len(line) < 3:
-            continue
-        # Skip markdown artifacts
-        if line.startswith("<!--") or line.startswith("##") or line.startswith("#"):
-            continue
-        if line.startswith("|") or line.startswith("---"):
-            continue
-        # Skip lines that are just images or formatting
-        if re.match(r"^[\[\]!<>()]+", line):
-            continue
-        # Skip lines that look like dates, phone numbers, addresses only
-        if re.search(r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b", line): # phone
-            continue
-        if re.match(r"^[\d\s/\-\.]+$", line):
+    for line in header:
+        if len(line) < 3:
             continue
         # Skip very short single tokens (e.g. "SOLD", "TO:", field labels)
         if len(line) < 5 and ":" not in line:
             continue
-        # Skip field labels like "Cust. No.", "Ship To:", "Invoice #"
-        if re.match(r"^(cust|ship|bill|sold|remit|invoice|order|date|page|po|job)\b", line, re.I):
+        # Skip markdown artifacts, field labels ("Cust. No.", "Ship To:"),
+        # phone numbers and lines that are only dates / numbers
+        if _SKIP_LINE_RE.search(line):
             continue
         # Skip lines that are all numeric or very long paragraphs
         if len(line.split()) > 8:
@@ -78,17 +111,21 @@ def extract_supplier_candidates(text_blocks: list[str], max_blocks: int = 15) ->
         # Prefer multi-word candidates (more likely to be company names)
         if line not in candidates:
             candidates.append(line)
-            
+
     return candidates
 
 
+@functools.lru_cache(maxsize=2048)
 def normalise_supplier(raw_name: str) -> tuple[str, str]:
     """Return *(raw_name, normalised_name)*.
 
     Resolution order:
-    1. Exact alias lookup (case-insensitive).
+    1. Exact alias lookup (case-insensitive), then the longest alias that
+       is a whole-token prefix of the name.
     2. Fuzzy match against ``config.KNOWN_SUPPLIERS`` (if rapidfuzz available).
     3. Fall back to *raw_name*.
+
+    Memoised: the same header line recurs across pages and invoices.
     """
     key = raw_name.strip().upper()
 
@@ -96,11 +133,9 @@ def normalise_supplier(raw_name: str) -> tuple[str, str]:
     if key in config.SUPPLIER_ALIASES:
         return raw_name, config.SUPPLIER_ALIASES[key]
 
-    # Also try progressively shorter prefixes of the key
-    for word_count in range(len(key.split()), 0, -1):
-        prefix = " ".join(key.split()[:word_count])
-        if prefix in config.SUPPLIER_ALIASES:
-            return raw_name, config.SUPPLIER_ALIASES[prefix]
+    canonical = _longest_alias_prefix(key)
+    if canonical is not None:
+        return raw_name, canonical
 
     # 2. Fuzzy match
     if _HAS_RAPIDFUZZ and config.KNOWN_SUPPLIERS:
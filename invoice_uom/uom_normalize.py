@@ -5,9 +5,10 @@ All logic is deterministic (regex / rules).  No LLM calls.
 
 from __future__ import annotations
 
+import functools
 import re
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Iterable
 
 from invoice_uom import config
 
@@ -28,21 +29,72 @@ _OCR_FIXES: list[tuple[re.Pattern[str], str]] = [
 ]
 
 
+_WS_RE = re.compile(r"[^\S\n]+")
+_TEMPLATE_REF_RE = re.compile(r"\\(?:g<(\d+)>|(\d+))")
+
+# All fixes applied in one scan.  Every fix starts with ``\b``; hoisting it
+# out of the alternation lets sre reject non-boundary positions with one
+# check instead of trying each branch.  Branch *i* is the named group
+# ``f<i>`` with its own flags scoped to it; its numbered groups follow, so
+# group *n* of fix *i* is ``groupindex["f<i>"] + n`` in the fused pattern.
+_BOUNDARY = r"\b"
+assert all(pat.pattern.startswith(_BOUNDARY) for pat, _ in _OCR_FIXES)
+
+
+def _fused_branch(i: int, pat: re.Pattern[str]) -> str:
+    flags = "i" if pat.flags & re.I else "-i"
+    return f"(?P<f{i}>(?{flags}:{pat.pattern[len(_BOUNDARY):]}))"
+
+
+_OCR_FUSED = re.compile(
+    _BOUNDARY
+    + "(?:"
+    + "|".join(_fused_branch(i, pat) for i, (pat, _) in enumerate(_OCR_FIXES))
+    + ")"
+)
+
+
+def _fused_template(base: int, repl: str) -> tuple[str | int, ...]:
+    """Split *repl* into literals and (renumbered) group indices."""
+    parts: list[str | int] = []
+    pos = 0
+    for m in _TEMPLATE_REF_RE.finditer(repl):
+        parts += [repl[pos:m.start()], base + int(m.group(1) or m.group(2))]
+        pos = m.end()
+    parts.append(repl[pos:])
+    return tuple(parts)
+
+
+_OCR_REPLACEMENTS: dict[str, tuple[str | int, ...]] = {
+    f"f{i}": _fused_template(_OCR_FUSED.groupindex[f"f{i}"], repl)
+    for i, (_, repl) in enumerate(_OCR_FIXES)
+}
+
+
+def _ocr_replace(m: re.Match[str]) -> str:
+    return "".join(
+        p if isinstance(p, str) else m.group(p)
+        for p in _OCR_REPLACEMENTS[m.lastgroup]  # type: ignore[index]
+    )
+
+
 def _clean_ocr(text: str) -> str:
     """Apply OCR-noise corrections and normalise whitespace."""
-    text = re.sub(r"[^\S\n]+", " ", text)  # collapse whitespace (keep newlines)
+    text = _WS_RE.sub(" ", text)  # collapse whitespace (keep newlines)
     text = text.strip().rstrip(".")
-    for pat, repl in _OCR_FIXES:
-        text = pat.sub(repl, text)
-    return text
+    return _OCR_FUSED.sub(_ocr_replace, text)
 
 
 # ── pack-quantity patterns ──────────────────────────────────────────────────
 # Order matters: more specific patterns first.
 
-@dataclass
+@dataclass(frozen=True)
 class UOMParseResult:
-    """Result of parsing UOM / pack info from a text fragment."""
+    """Result of parsing UOM / pack info from a text fragment.
+
+    Immutable, since :func:`parse_uom_and_pack` hands the same memoised
+    instance to every caller with the same text.
+    """
 
     original_uom: str | None = None           # raw UOM token found
     canonical_uom: str | None = None          # mapped via alias table
@@ -71,15 +123,64 @@ _PACK_PATTERNS: list[tuple[re.Pattern[str], int, int]] = [
     (re.compile(r"(?<!\d)(\d+)\s*(CT|Count)\b", re.I), 1, 2),
 ]
 
+
+def _trie_alternation(words: Iterable[str]) -> str:
+    """Regex alternation of *words*, factored into a prefix trie.
+
+    ``CASE|CASES|CS`` becomes ``C(?:ASE(?:S)?|S)``: sre then reads each
+    shared prefix once instead of retrying every word at every position,
+    so scan cost barely grows with the alias table.  Where one word is a
+    prefix of another the longer continuation is tried first, matching a
+    longest-first ``|`` join.
+    """
+    trie: dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end of word
+
+    def emit(node: dict[str, Any]) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if "" in node:
+            return "(?:" + "|".join(branches) + ")?"
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return emit(trie)
+
+
 # Standalone UOM token (no pack qty)
 _UOM_ONLY_PATTERN = re.compile(
-    r"\b("
-    + "|".join(sorted(config.UOM_ALIASES.keys(), key=len, reverse=True))
-    + r")\b",
+    r"\b(" + _trie_alternation(config.UOM_ALIASES) + r")\b",
     re.I,
 )
 
+# Cheap screen run before the patterns above.  Every UOM word they can match
+# (pack-pattern words included) is an alias key, always starts after a
+# non-letter (``\b``, whitespace, or the digits of "100Ct"), and the one
+# pattern that accepts arbitrary letters needs a "/".  Words with a shorter
+# anchor as prefix are redundant.  Same ``re.I`` folding as the patterns, so
+# a miss here guarantees a miss there.
+def _anchor_words() -> list[str]:
+    words = {k.upper() for k in config.UOM_ALIASES}
+    return sorted(
+        (w for w in words if not any(o != w and w.startswith(o) for o in words)),
+        key=len,
+        reverse=True,
+    )
+
+
+_UOM_ANCHOR_RE = re.compile(
+    r"/|(?<![^\W\d])" + _trie_alternation(_anchor_words()),
+    re.I,
+)
 
+
+@functools.lru_cache(maxsize=4096)
 def parse_uom_and_pack(text: str) -> UOMParseResult:
     """Extract UOM and pack quantity from *text* using regex rules.
 
@@ -88,9 +189,19 @@ def parse_uom_and_pack(text: str) -> UOMParseResult:
     """
     if not text:
         return UOMParseResult()
+    return _parse_cleaned(_clean_ocr(text))
+
 
-    cleaned = _clean_ocr(text)
-    result = UOMParseResult()
+@functools.lru_cache(maxsize=4096)
+def _parse_cleaned(cleaned: str) -> UOMParseResult:
+    """Regex stage of :func:`parse_uom_and_pack`, keyed on the cleaned text.
+
+    Separate from the outer cache so raw variants that only differ in
+    spacing, a trailing dot or OCR noise ("25/CS", " 25/CS.") share one
+    entry.
+    """
+    if not _UOM_ANCHOR_RE.search(cleaned):
+        return UOMParseResult()
 
     # Try pack patterns first (they also yield a UOM).
     for pat, qty_grp, uom_grp in _PACK_PATTERNS:
@@ -101,31 +212,34 @@ def parse_uom_and_pack(text: str) -> UOMParseResult:
             except (ValueError, IndexError):
                 continue
             raw_uom = m.group(uom_grp).upper()
-            canonical = config.UOM_ALIASES.get(raw_uom, raw_uom)
-            result.original_uom = raw_uom
-            result.canonical_uom = canonical
-            result.detected_pack_quantity = qty
-            result.evidence_text = m.group(0)
-            result.pack_evidence_text = m.group(0)
-            return result
+            return UOMParseResult(
+                original_uom=raw_uom,
+                canonical_uom=config.UOM_ALIASES.get(raw_uom, raw_uom),
+                detected_pack_quantity=qty,
+                evidence_text=m.group(0),
+                pack_evidence_text=m.group(0),
+            )
 
     # Fallback: standalone UOM token (no pack qty detected)
     m = _UOM_ONLY_PATTERN.search(cleaned)
     if m:
         raw_uom = m.group(1).upper()
         canonical = config.UOM_ALIASES.get(raw_uom, raw_uom)
-        result.original_uom = raw_uom
-        result.canonical_uom = canonical
-        result.evidence_text = m.group(0)
         # If it's an EA-type UOM, implicit pack qty = 1
-        if canonical in config.EACH_UOMS:
-            result.detected_pack_quantity = 1
-            result.pack_evidence_text = m.group(0)
-        return result
+        is_each = canonical in config.EACH_UOMS
+        return UOMParseResult(
+            original_uom=raw_uom,
+            canonical_uom=canonical,
+            detected_pack_quantity=1 if is_each else None,
+            evidence_text=m.group(0),
+            pack_evidence_text=m.group(0) if is_each else None,
+        )
 
-    return result
+    return UOMParseResult()
 
 
+@functools.lru_cache(maxsize=4096)
 def normalise_uom_code(raw: str) -> str:
     """Map a raw UOM string to its canonical short code via the alias table."""
-    return config.UOM_ALIASES.get(raw.upper().strip(), raw.upper().strip())
+    key = raw.upper().strip()
+    return config.UOM_ALIASES.get(key, key)
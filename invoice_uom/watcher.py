@@ -1,31 +1,40 @@
 """Watchdog-based folder watcher – queues new PDFs for processing.
 
-Uses a work queue + worker thread for concurrency safety.
+Uses a work queue drained by one dispatcher thread into a worker pool.
 """
 
 from __future__ import annotations
 
+import functools
 import logging
 import queue
 import threading
-import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
 logger = logging.getLogger(__name__)
 
+_INTERRUPT_CHECK_S = 1.0
+_SETTLE_S = 0.5  # quiet period after the last event before a PDF is queued
+
 
 class _PDFHandler:
     """Enqueue newly created / moved PDF files.
 
-    Implements the watchdog FileSystemEventHandler interface.
+    Implements the watchdog FileSystemEventHandler interface.  Events are
+    debounced per path: each one (re)arms a timer, and the PDF is queued
+    once the file has been quiet for ``_SETTLE_S``.  Bursts from atomic
+    writes collapse into one run and the observer thread never sleeps.
     """
 
-    def __init__(self, work_queue: queue.Queue[Path]) -> None:
+    def __init__(self, work_queue: queue.Queue[Path | None]) -> None:
         from watchdog.events import FileSystemEventHandler  # type: ignore[import-untyped]
         self.__class__.__bases__ = (FileSystemEventHandler,)
         super().__init__()
         self._q = work_queue
+        self._pending: dict[Path, threading.Timer] = {}
+        self._lock = threading.Lock()
 
     def on_created(self, event: Any) -> None:
         self._maybe_enqueue(event)
@@ -37,15 +46,41 @@ class _PDFHandler:
         if getattr(event, "is_directory", False):
             return
         path = Path(str(event.src_path))
-        if path.suffix.lower() == ".pdf":
-            logger.info("Detected new PDF: %s", path.name)
-            # Small delay to allow the file write to complete
-            time.sleep(0.5)
-            self._q.put(path)
+        if path.suffix.lower() != ".pdf":
+            return
+        logger.info("Detected new PDF: %s", path.name)
+        timer = threading.Timer(_SETTLE_S, self._settled, args=(path,))
+        timer.daemon = True
+        with self._lock:
+            previous = self._pending.get(path)
+            if previous is not None:
+                previous.cancel()
+            self._pending[path] = timer
+            timer.start()
+
+    def _settled(self, path: Path) -> None:
+        with self._lock:
+            if self._pending.get(path) is not threading.current_thread():
+                return  # superseded by a later event
+            del self._pending[path]
+        self._q.put(path)
+
+    def close(self) -> None:
+        """Drop PDFs still settling; called when the watcher shuts down."""
+        with self._lock:
+            for timer in self._pending.values():
+                timer.cancel()
+            self._pending.clear()
 
 
 class Watcher:
-    """Watch *input_dir* for new PDFs and process them via the pipeline."""
+    """Watch *input_dir* for new PDFs and process them via the pipeline.
+
+    One dispatcher thread feeds a pool of *num_workers* threads from the
+    work queue.  Threads, not processes: the LLM rate limiter and the
+    manifest are per-process state, and a long-running watcher must keep
+    a single Gemini budget and a single manifest.
+    """
 
     def __init__(
         self,
@@ -58,13 +93,14 @@ class Watcher:
         self._output_dir = output_dir
         self._failed_dir = failed_dir
         self._num_workers = num_workers
-        self._queue: queue.Queue[Path] = queue.Queue()
+        # ``None`` is the dispatcher's shutdown sentinel.
+        self._queue: queue.Queue[Path | None] = queue.Queue()
         self._stop_event = threading.Event()
 
     def start(self) -> None:
-        """Start the observer + worker threads.  Blocks until interrupted."""
+        """Start the observer, dispatcher and worker pool.  Blocks until interrupted."""
         from watchdog.observers import Observer  # type: ignore[import-untyped]
-        from invoice_uom.pipeline import process_pdf  # noqa: F811
+        from invoice_uom.pipeline import flush_manifest, process_pdf
 
         self._process_pdf = process_pdf
         self._input_dir.mkdir(parents=True, exist_ok=True)
@@ -76,36 +112,54 @@ class Watcher:
         observer.start()
         logger.info("Watching %s for new PDFs …", self._input_dir)
 
-        workers: list[threading.Thread] = []
-        for i in range(self._num_workers):
-            t = threading.Thread(target=self._worker, name=f"worker-{i}", daemon=True)
-            t.start()
-            workers.append(t)
+        self._executor: Executor = ThreadPoolExecutor(
+            max_workers=self._num_workers, thread_name_prefix="worker",
+        )
+        dispatcher = threading.Thread(target=self._dispatch, name="dispatcher", daemon=True)
+        dispatcher.start()
 
         try:
-            while not self._stop_event.is_set():
-                time.sleep(1)
+            # Returns as soon as stop() fires; the timeout only keeps Ctrl+C
+            # deliverable on Windows, where an untimed wait can't be broken.
+            while not self._stop_event.wait(_INTERRUPT_CHECK_S):
+                pass
         except KeyboardInterrupt:
             logger.info("Shutting down watcher …")
         finally:
-            self._stop_event.set()
+            self.stop()
             observer.stop()
             observer.join()
+            handler.close()
+            # Shut the pool down only once the dispatcher is done submitting;
+            # queued PDFs are dropped, those already running finish.
+            dispatcher.join()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            flush_manifest()
 
     def stop(self) -> None:
+        if self._stop_event.is_set():
+            return
         self._stop_event.set()
+        self._queue.put(None)
 
-    def _worker(self) -> None:
-        from invoice_uom.pipeline import process_pdf
-
-        while not self._stop_event.is_set():
-            try:
-                pdf_path = self._queue.get(timeout=2)
-            except queue.Empty:
-                continue
+    def _dispatch(self) -> None:
+        while True:
+            pdf_path = self._queue.get()
             try:
-                process_pdf(pdf_path, self._output_dir, self._failed_dir)
+                if pdf_path is None or self._stop_event.is_set():
+                    return
+                future = self._executor.submit(
+                    self._process_pdf, pdf_path, self._output_dir, self._failed_dir
+                )
+                future.add_done_callback(functools.partial(self._on_done, pdf_path))
             except Exception:
-                logger.exception("Worker error processing %s", pdf_path)
+                logger.exception("Could not dispatch %s", pdf_path)
             finally:
                 self._queue.task_done()
+
+    def _on_done(self, pdf_path: Path, future: Future[Any]) -> None:
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            logger.error("Worker error processing %s", pdf_path, exc_info=exc)
@@ -0,0 +1,136 @@
+"""Tests for invoice_uom.cache – SQLite lookup cache round-trips."""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from invoice_uom.cache import (
+    _WRITE_QUEUE,
+    LookupCache,
+    LookupResult,
+    _pack_evidence,
+    _unpack_evidence,
+    get_cache,
+)
+
+
+def _cache(tmp_path: Path) -> LookupCache:
+    return LookupCache(db_path=tmp_path / "lookup_cache.db")
+
+
+class TestLookupCache:
+    def test_miss_returns_none(self, tmp_path: Path):
+        assert _cache(tmp_path).get("nothing here") is None
+
+    def test_round_trip(self, tmp_path: Path):
+        cache = _cache(tmp_path)
+        cache.put(LookupResult(
+            query="Nitrile Gloves Large",
+            pack_qty=100,
+            uom="BX",
+            evidence_snippets=[{"url": "https://example.com", "snippet": "100/BX"}],
+            source_urls=["https://example.com"],
+            llm_used=True,
+        ))
+        hit = cache.get("Nitrile Gloves Large")
+        assert hit is not None
+        assert hit.pack_qty == 100
+        assert hit.uom == "BX"
+        assert hit.evidence_snippets == [{"url": "https://example.com", "snippet": "100/BX"}]
+        assert hit.source_urls == ["https://example.com"]
+        assert hit.llm_used is True
+
+    def test_query_key_is_normalised(self, tmp_path: Path):
+        cache = _cache(tmp_path)
+        cache.put(LookupResult(query="  Paper   TOWELS\t25/CS ", pack_qty=25))
+        hit = cache.get("paper towels 25/cs")
+        assert hit is not None
+        assert hit.pack_qty == 25
+
+    def test_put_many(self, tmp_path: Path):
+        cache = _cache(tmp_path)
+        cache.put_many([
+            LookupResult(query="item a", pack_qty=1),
+            LookupResult(query="item b", pack_qty=2),
+        ])
+        assert cache.get("item a").pack_qty == 1  # type: ignore[union-attr]
+        assert cache.get("item b").pack_qty == 2  # type: ignore[union-attr]
+
+    def test_buffered_put_visible_and_flushed(self, tmp_path: Path):
+        cache = _cache(tmp_path)
+        cache.put(LookupResult(query="item c", pack_qty=3))
+        assert cache.get("item c").pack_qty == 3  # type: ignore[union-attr]
+        cache.flush()
+        reopened = _cache(tmp_path)
+        assert reopened.get("item c").pack_qty == 3  # type: ignore[union-attr]
+
+    def test_failed_flush_keeps_rows_buffered(self, tmp_path: Path, monkeypatch):
+        cache = _cache(tmp_path)
+        cache.put(LookupResult(query="item d", pack_qty=4))
+        monkeypatch.setattr("invoice_uom.cache._UPSERT_SQL", "INSERT INTO missing VALUES (?)")
+        with pytest.raises(sqlite3.OperationalError):
+            cache.flush()
+        monkeypatch.undo()
+        cache.flush()
+        reopened = _cache(tmp_path)
+        assert reopened.get("item d").pack_qty == 4  # type: ignore[union-attr]
+
+    def test_shared_cache_is_one_instance(self, tmp_path: Path, monkeypatch):
+        monkeypatch.setattr("invoice_uom.cache.config.CACHE_DB_FILE", tmp_path / "shared.db")
+        monkeypatch.setattr("invoice_uom.cache._shared", None)
+        cache = get_cache()
+        assert get_cache() is cache
+        assert cache._db_path == tmp_path / "shared.db"
+
+    def test_memory_layer_is_bounded(self, tmp_path: Path, monkeypatch):
+        monkeypatch.setattr("invoice_uom.cache._MEM_MAX", 2)
+        cache = _cache(tmp_path)
+        cache.put_many([LookupResult(query=f"item {i}", pack_qty=i) for i in range(3)])
+        assert len(cache._mem) == 2
+        # Evicted from memory, still served from SQLite.
+        assert cache.get("item 0").pack_qty == 0  # type: ignore[union-attr]
+        assert cache.get("ITEM 0").query == "ITEM 0"  # type: ignore[union-attr]
+
+    def test_reads_legacy_text_json_rows(self, tmp_path: Path):
+        cache = _cache(tmp_path)
+        with sqlite3.connect(tmp_path / "lookup_cache.db") as conn:
+            conn.execute(
+                "INSERT INTO lookup_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ("legacy item", 12, "CS", '[{"url": "u", "snippet": "s"}]', '["u"]', 0, 1.0),
+            )
+        hit = cache.get("legacy item")
+        assert hit is not None
+        assert hit.evidence_snippets == [{"url": "u", "snippet": "s"}]
+        assert hit.source_urls == ["u"]
+
+    def test_full_batch_committed_in_background(self, tmp_path: Path, monkeypatch):
+        monkeypatch.setattr("invoice_uom.cache._BATCH_SIZE", 2)
+        cache = _cache(tmp_path)
+        cache.put(LookupResult(query="item x", pack_qty=1))
+        cache.put(LookupResult(query="item y", pack_qty=2))
+        _WRITE_QUEUE.join()
+        with sqlite3.connect(tmp_path / "lookup_cache.db") as conn:
+            count = conn.execute("SELECT COUNT(*) FROM lookup_cache").fetchone()[0]
+        assert count == 2
+
+    def test_page_cache_respects_max_age(self, tmp_path: Path):
+        cache = _cache(tmp_path)
+        assert cache.get_page("https://a.example", max_age=60) is None
+        cache.put_page("https://a.example", ["100/BX"])
+        cache.put_page("https://b.example", [])
+        assert cache.get_page("https://a.example", max_age=60) == ["100/BX"]
+        assert cache.get_page("https://b.example", max_age=60) == []
+        assert cache.get_page("https://a.example", max_age=-1) is None
+
+    def test_evidence_urls_stored_once(self):
+        evidence = [
+            {"url": "https://a.example", "snippet": "100/BX"},
+            {"url": "https://a.example", "snippet": "box of 100"},
+            {"url": "https://b.example", "snippet": "case 10"},
+        ]
+        packed = _pack_evidence(evidence)
+        assert packed["u"] == ["https://a.example", "https://b.example"]
+        assert _unpack_evidence(packed) == evidence
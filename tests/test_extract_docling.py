@@ -0,0 +1,116 @@
+"""Tests for invoice_uom.extract_docling – markdown table / text parsing."""
+
+from __future__ import annotations
+
+import pytest
+
+from invoice_uom.extract_docling import (
+    _clean_cell,
+    _clean_md_line,
+    _extract_table,
+    _handle_table,
+    _handle_text,
+    _handler_for,
+    _ignore_item,
+    _is_separator_line,
+    _parse_markdown_content,
+    _parse_pipe_table,
+)
+
+
+class TestCleaners:
+    @pytest.mark.parametrize(
+        "raw, expected",
+        [
+            ("  Nitrile   Gloves  ", "Nitrile Gloves"),
+            ("<!-- image --> Widget", "Widget"),
+            ("## Header text", "Header text"),
+            ("a\tb\nc", "a b c"),
+            ("", ""),
+        ],
+    )
+    def test_clean_cell(self, raw: str, expected: str):
+        assert _clean_cell(raw) == expected
+
+    @pytest.mark.parametrize(
+        "raw, expected",
+        [
+            ("### Remit To", "Remit To"),
+            ("<!-- image -->", ""),
+            ("---", ""),
+            ("***", ""),
+            ("Gala Janitorial Supplies", "Gala Janitorial Supplies"),
+        ],
+    )
+    def test_clean_md_line(self, raw: str, expected: str):
+        assert _clean_md_line(raw) == expected
+
+    @pytest.mark.parametrize(
+        "line, expected",
+        [
+            ("|---|---|", True),
+            ("| :--- | ---: |", True),
+            ("---|---", True),
+            ("| a | b |", False),
+            ("||", False),
+            ("", False),
+        ],
+    )
+    def test_is_separator_line(self, line: str, expected: bool):
+        assert _is_separator_line(line) is expected
+
+
+class TestMarkdownParsing:
+    def test_parse_pipe_table(self):
+        md = "| Description | Qty |\n|---|---|\n| Widget A | 2 |\n"
+        assert _parse_pipe_table(md) == [["Description", "Qty"], ["Widget A", "2"]]
+
+    def test_parse_markdown_content_splits_tables_and_text(self):
+        md = (
+            "## Gala Janitorial Supplies\n"
+            "Remit To: PO Box 1\n"
+            "\n"
+            "| Description | Qty |\n"
+            "|---|---|\n"
+            "| Widget A | 2 |\n"
+            "| Widget B | 3 |\n"
+            "\n"
+            "Thank you for your business\n"
+        )
+        tables, text_blocks = _parse_markdown_content(md)
+        assert tables == [[["Description", "Qty"], ["Widget A", "2"], ["Widget B", "3"]]]
+        assert text_blocks == [
+            "Gala Janitorial Supplies Remit To: PO Box 1 Thank you for your business",
+        ]
+
+    def test_single_row_table_dropped(self):
+        tables, _ = _parse_markdown_content("| only | header |\n")
+        assert tables == []
+
+
+class TestItemDispatch:
+    def test_dispatch_on_exact_class_name(self):
+        TableItem = type("TableItem", (), {})
+        TextItem = type("TextItem", (), {})
+        SectionHeaderItem = type("SectionHeaderItem", (TextItem,), {})
+        assert _handler_for(TableItem) is _handle_table
+        assert _handler_for(TextItem) is _handle_text
+        assert _handler_for(SectionHeaderItem) is _ignore_item
+
+    def test_text_handler_collects_stripped_text(self):
+        item = type("TextItem", (), {"text": "  Invoice #42  "})()
+        out: dict[str, list] = {"tables": [], "structured_tables": [], "text_blocks": []}
+        _handler_for(type(item))(item, out)
+        assert out["text_blocks"] == ["Invoice #42"]
+
+
+class TestExtractTable:
+    def test_dataframe_export(self):
+        pd = pytest.importorskip("pandas")
+        df = pd.DataFrame({"Description": ["Widget A", "Widget B"], "Qty": [2, 3]})
+        item = type("TableItem", (), {"export_to_dataframe": lambda self: df})()
+        assert _extract_table(item) == [
+            ["Description", "Qty"],
+            ["Widget A", "2"],
+            ["Widget B", "3"],
+        ]
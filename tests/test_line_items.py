@@ -7,6 +7,7 @@ import pytest
 from invoice_uom.line_items import (
     extract_line_items_from_tables,
     extract_line_items_from_text,
+    _identify_columns,
     _is_non_item,
 )
 
@@ -135,3 +136,14 @@ class TestColumnMapping:
         assert len(items) == 1
         assert items[0]["sku"] == "SK-001"
         assert items[0]["manufacturer_part_number"] == "MFR-B14"
+
+    def test_repeated_header_mapping_not_mutated(self):
+        header = ["Qty", "Price", "Amount"]
+        tables = [
+            [header, ["2", "1.00", "2.00"]],
+            [list(header), ["3", "1.50", "4.50"]],
+        ]
+        items, debug = extract_line_items_from_tables(tables)
+        assert len(items) == 2
+        # The description fallback is applied to a copy, not the cached map
+        assert "description" not in _identify_columns(tuple(header))
@@ -0,0 +1,181 @@
+"""Tests for invoice_uom.llm_extract – Gemini fallback plumbing (no network)."""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from invoice_uom import llm_extract
+
+
+class TestResponseCache:
+    def test_cached_response_skips_api(self, tmp_path: Path, monkeypatch):
+        monkeypatch.setattr("invoice_uom.config.GEMINI_CACHE_DIR", tmp_path)
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        monkeypatch.setenv("INVOICE_UOM_GEMINI_CACHE", "1")
+        llm_extract._read_cached.cache_clear()
+
+        raw = "QTY SKU DESCRIPTION\n2 12X88 Heavy Duty Drill"
+        stored = {"supplier_name": "Grainger", "line_items": [], "llm_extraction_used": True}
+        llm_extract._store_cached(llm_extract._cache_key(llm_extract._EXTRACT_PROMPT + raw), stored)
+
+        first = llm_extract.extract_with_llm(raw, "a.pdf")
+        assert first == stored
+        first["line_items"].append({"item_description": "mutated"})
+        assert llm_extract.extract_with_llm(raw, "a.pdf") == stored
+
+    def test_key_depends_on_prompt(self):
+        assert llm_extract._cache_key("a") != llm_extract._cache_key("b")
+
+
+class TestBatch:
+    def test_results_in_input_order(self, tmp_path: Path, monkeypatch):
+        monkeypatch.setattr("invoice_uom.config.GEMINI_CACHE_DIR", tmp_path)
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        monkeypatch.setenv("INVOICE_UOM_GEMINI_CACHE", "1")
+        llm_extract._read_cached.cache_clear()
+
+        texts = [(f"{n}.pdf", f"invoice text {n}") for n in range(5)]
+        for name, raw in texts:
+            llm_extract._store_cached(
+                llm_extract._cache_key(llm_extract._EXTRACT_PROMPT + raw),
+                {"supplier_name": name, "line_items": [], "llm_extraction_used": True},
+            )
+
+        results = llm_extract.extract_batch(texts, concurrency=2)
+        assert [r["supplier_name"] for r in results] == [name for name, _ in texts]
+
+
+class TestRetryPolicy:
+    def test_retry_after_header_preferred(self):
+        exc = Exception("429 RESOURCE_EXHAUSTED retry after: 7")
+        exc.response = type("R", (), {"headers": {"retry-after": "3"}})()  # type: ignore[attr-defined]
+        assert llm_extract._retry_after(exc) == 3.0
+
+    def test_retry_after_from_message(self):
+        assert llm_extract._retry_after(Exception("429 retry after: 7")) == 7.0
+        assert llm_extract._retry_after(Exception("429")) is None
+
+    def test_next_wait_bounds(self):
+        for prev in (1.0, 10.0, 50.0):
+            for _ in range(50):
+                wait = llm_extract._next_wait(prev)
+                assert llm_extract._RETRY_BASE <= wait <= min(llm_extract._RETRY_CAP, prev * 3)
+
+
+class TestSingleFlight:
+    def test_duplicate_prompts_share_one_request(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        monkeypatch.delenv("INVOICE_UOM_GEMINI_CACHE", raising=False)
+        calls: list[str] = []
+
+        async def fake_generate(api_key, text, prompt, pdf_name, store_key):
+            calls.append(text)
+            await asyncio.sleep(0.01)
+            return {"supplier_name": text, "line_items": [{"sku": "1"}], "llm_extraction_used": True}
+
+        monkeypatch.setattr(llm_extract, "_generate", fake_generate)
+        results = llm_extract.extract_batch([("a.pdf", "same"), ("b.pdf", "same"), ("c.pdf", "other")])
+        assert sorted(calls) == ["other", "same"]
+        assert results[0] == results[1]
+        assert results[0]["line_items"][0] is not results[1]["line_items"][0]
+        assert not llm_extract._inflight
+
+    def test_duplicates_on_other_threads_share_one_request(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        monkeypatch.delenv("INVOICE_UOM_GEMINI_CACHE", raising=False)
+        calls: list[str] = []
+
+        async def fake_generate(api_key, text, prompt, pdf_name, store_key):
+            calls.append(text)
+            await asyncio.sleep(0.2)
+            return {"supplier_name": text, "line_items": [], "llm_extraction_used": True}
+
+        monkeypatch.setattr(llm_extract, "_generate", fake_generate)
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(pool.map(lambda n: llm_extract.extract_with_llm("same", f"{n}.pdf"), range(3)))
+        assert calls == ["same"]
+        assert [r["supplier_name"] for r in results] == ["same"] * 3
+        assert not llm_extract._inflight
+
+
+class TestSyncWrapper:
+    def test_callable_inside_running_loop(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        monkeypatch.delenv("INVOICE_UOM_GEMINI_CACHE", raising=False)
+
+        async def fake_generate(api_key, text, prompt, pdf_name, store_key):
+            return {"supplier_name": text, "line_items": [], "llm_extraction_used": True}
+
+        monkeypatch.setattr(llm_extract, "_generate", fake_generate)
+
+        async def caller():
+            return llm_extract.extract_with_llm("inside", "a.pdf")
+
+        assert asyncio.run(caller())["supplier_name"] == "inside"
+
+
+class TestCrossDocumentBatching:
+    def test_mismatched_reply_falls_back_per_document(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        monkeypatch.delenv("INVOICE_UOM_GEMINI_CACHE", raising=False)
+
+        async def fake_request(api_key, prompt, schema):
+            assert prompt.count(llm_extract._BATCH_SEPARATOR) == 1
+            return '[{"pdf_name": "a.pdf", "supplier_name": "Acme", "line_items": []}]'
+
+        per_doc: list[str] = []
+
+        def fake_batch(texts):
+            per_doc.extend(name for name, _ in texts)
+            return [{"supplier_name": name, "line_items": [], "llm_extraction_used": True} for name, _ in texts]
+
+        monkeypatch.setattr(llm_extract, "_request", fake_request)
+        monkeypatch.setattr(llm_extract, "_batch_schema", lambda: None)
+        monkeypatch.setattr(llm_extract, "extract_batch", fake_batch)
+        results = llm_extract.extract_many_with_llm([("a.pdf", "text a"), ("b.pdf", "text b")])
+        assert per_doc == ["a.pdf", "b.pdf"]
+        assert [r["supplier_name"] for r in results] == ["a.pdf", "b.pdf"]
+
+    def test_reply_mapped_back_by_name(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        monkeypatch.delenv("INVOICE_UOM_GEMINI_CACHE", raising=False)
+
+        async def fake_request(api_key, prompt, schema):
+            return (
+                '[{"pdf_name": "b.pdf", "supplier_name": "Beta", "line_items": []},'
+                ' {"pdf_name": "a.pdf", "supplier_name": "Acme",'
+                '  "line_items": [{"item_description": "Nitrile gloves", "quantity": "2"}]}]'
+            )
+
+        monkeypatch.setattr(llm_extract, "_request", fake_request)
+        monkeypatch.setattr(llm_extract, "_batch_schema", lambda: None)
+        a, b = llm_extract.extract_many_with_llm([("a.pdf", "text a"), ("b.pdf", "text b")])
+        assert (a["supplier_name"], b["supplier_name"]) == ("Acme", "Beta")
+        assert a["line_items"][0]["quantity"] == 2.0
+
+    def test_batcher_flushes_on_size_and_on_demand(self, monkeypatch):
+        calls: list[list[str]] = []
+
+        def fake_many(docs):
+            calls.append([name for name, _ in docs])
+            return [{"supplier_name": name} for name, _ in docs]
+
+        monkeypatch.setattr(llm_extract, "extract_many_with_llm", fake_many)
+        batcher = llm_extract.BatchedLLMExtractor(max_docs=2, max_wait=60)
+        first = batcher.submit("a.pdf", "x")
+        second = batcher.submit("b.pdf", "y")
+        assert first.result(timeout=5) == {"supplier_name": "a.pdf"}
+        assert second.result(timeout=5) == {"supplier_name": "b.pdf"}
+        third = batcher.submit("c.pdf", "z")
+        batcher.flush()
+        assert third.result(timeout=5) == {"supplier_name": "c.pdf"}
+        assert calls == [["a.pdf", "b.pdf"], ["c.pdf"]]
+
+    def test_batcher_flushes_after_max_wait(self, monkeypatch):
+        monkeypatch.setattr(
+            llm_extract, "extract_many_with_llm", lambda docs: [{"n": len(docs)} for _ in docs],
+        )
+        batcher = llm_extract.BatchedLLMExtractor(max_docs=8, max_wait=0.05)
+        assert batcher.submit("a.pdf", "x").result(timeout=5) == {"n": 1}
@@ -0,0 +1,120 @@
+"""Tests for invoice_uom.lookup_agent – query building and page fetching (no network)."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+
+from invoice_uom.cache import LookupCache
+from invoice_uom.lookup_agent import _PACK_SNIPPET_RE, LookupAgent, _read_page
+
+
+class TestFetchSnippets:
+    def test_first_ranked_page_with_snippets_wins(self, monkeypatch):
+        delays = {"https://a": 0.05, "https://b": 0.0, "https://c": 0.0}
+
+        def fake_fetch_one(session, url):
+            time.sleep(delays[url])
+            if url == "https://a":
+                return []
+            return [{"url": url, "snippet": "100/CS"}]
+
+        monkeypatch.setattr("invoice_uom.lookup_agent._HAS_BS4", True)
+        monkeypatch.setattr("invoice_uom.lookup_agent._get_session", lambda: None)
+        monkeypatch.setattr(LookupAgent, "_fetch_one", staticmethod(fake_fetch_one))
+
+        snippets = LookupAgent._fetch_snippets(list(delays))
+        assert snippets == [{"url": "https://b", "snippet": "100/CS"}]
+
+    def test_cached_pages_not_refetched(self, tmp_path: Path, monkeypatch):
+        fetched: list[str] = []
+
+        def fake_fetch_one(session, url):
+            fetched.append(url)
+            return None if url == "https://down" else [{"url": url, "snippet": "12/BX"}]
+
+        monkeypatch.setattr("invoice_uom.lookup_agent._HAS_BS4", True)
+        monkeypatch.setattr("invoice_uom.lookup_agent._get_session", lambda: None)
+        monkeypatch.setattr(LookupAgent, "_fetch_one", staticmethod(fake_fetch_one))
+        cache = LookupCache(db_path=tmp_path / "lookup_cache.db")
+        cache.put_page("https://a", [])
+
+        urls = ["https://a", "https://down", "https://b"]
+        assert LookupAgent._fetch_snippets(urls, cache) == [{"url": "https://b", "snippet": "12/BX"}]
+        assert sorted(fetched) == ["https://b", "https://down"]
+        assert cache.get_page("https://down", max_age=60) is None  # failures aren't cached
+
+        fetched.clear()
+        assert LookupAgent._fetch_snippets(urls, cache) == [{"url": "https://b", "snippet": "12/BX"}]
+        assert fetched == ["https://down"]
+
+
+class TestBuildQuery:
+    def test_prefers_mpn_then_sku(self):
+        assert LookupAgent._build_query("Widget", "SKU1", " MPN1 ") == "MPN1"
+        assert LookupAgent._build_query("Widget", "SKU1", None) == "SKU1"
+
+    def test_description_cleaned(self):
+        assert LookupAgent._build_query("Nitrile*Gloves, (Large)", None, None) == "Nitrile Gloves Large"
+
+
+class _FakeResponse:
+    encoding = None
+
+    def __init__(self, chunks: list[str]) -> None:
+        self.chunks = chunks
+        self.pulled = 0
+        self.closed = False
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def _iter(self):
+        for chunk in self.chunks:
+            self.pulled += 1
+            yield chunk
+
+    iter_text = _iter
+
+    def iter_content(self, chunk_size: int, decode_unicode: bool):
+        return self._iter()
+
+    def close(self) -> None:
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TestReadPage:
+    def test_requests_style_body_is_capped(self, monkeypatch):
+        monkeypatch.setattr("invoice_uom.lookup_agent._MAX_PAGE_CHARS", 10)
+        resp = _FakeResponse(["abcd"] * 100)
+        session = type("S", (), {"stream": False, "get": lambda self, url, **kw: resp})()
+        assert _read_page(session, "https://x", timeout=1) == "abcdabcdab"
+        assert resp.pulled == 3
+        assert resp.closed
+
+    def test_httpx_style_stream(self):
+        resp = _FakeResponse(["<html>", "100/CS", "</html>"])
+        session = type("C", (), {"stream": lambda self, method, url, **kw: resp})()
+        assert _read_page(session, "https://x", timeout=1) == "<html>100/CS</html>"
+
+
+class TestPackSnippetPattern:
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("Sold as 100/CS, box of 50", ["100/CS", "box of 50"]),
+            ("PK12 - 10 per case - 5 each", ["PK12", "10 per case", "5 each"]),
+            ("12/CASEMENT window, 5 EAST street", []),
+            ("UNPACK 6 items", []),
+        ],
+    )
+    def test_matches(self, text: str, expected: list[str]):
+        assert [m.group() for m in _PACK_SNIPPET_RE.finditer(text)] == expected
@@ -0,0 +1,52 @@
+"""Tests for invoice_uom.ocr_paddle – HTML table parsing and page prefetch."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from invoice_uom.ocr_paddle import _parse_html_table, _prefetched
+
+
+class TestParseHtmlTable:
+    @pytest.mark.parametrize(
+        "html, expected",
+        [
+            (
+                "<html><body><table><tr><th>Qty</th><th>Description</th></tr>"
+                "<tr><td>2</td><td>Nitrile <b>Gloves</b> L</td></tr></table></body></html>",
+                [["Qty", "Description"], ["2", "NitrileGlovesL"]],
+            ),
+            ("<table><tr><td> </td><td></td></tr><tr><td>A &amp; B</td></tr></table>", [["A & B"]]),
+            ("<p>no table</p>", []),
+            ("", []),
+        ],
+    )
+    def test_rows(self, html: str, expected: list[list[str]]):
+        assert _parse_html_table(html) == expected
+
+    def test_bs4_fallback_matches(self, monkeypatch):
+        pytest.importorskip("bs4")
+        html = "<table><tr><th>Qty</th><td>12 <i>CS</i></td></tr></table>"
+        fast = _parse_html_table(html)
+        monkeypatch.setattr("invoice_uom.ocr_paddle._HAS_LXML", False)
+        assert _parse_html_table(html) == fast == [["Qty", "12CS"]]
+
+
+class TestPrefetched:
+    def test_order_thread_and_close(self):
+        threads: set[str] = set()
+        closed = []
+
+        def pages():
+            try:
+                for i in range(3):
+                    threads.add(threading.current_thread().name)
+                    yield i
+            finally:
+                closed.append(True)
+
+        assert list(_prefetched(pages())) == [0, 1, 2]
+        assert closed == [True]
+        assert threading.current_thread().name not in threads
@@ -0,0 +1,108 @@
+"""Tests for invoice_uom.pipeline – per-item enrichment plumbing (no network)."""
+
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+
+from invoice_uom import pipeline
+from invoice_uom.pipeline import _finish_item, _prepare_item, _run_lookups
+
+
+class _FakeAgent:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self.threads: set[str] = set()
+
+    def resolve(self, description, sku=None, mpn=None):
+        self.calls.append(description)
+        self.threads.add(threading.current_thread().name)
+        return {"pack_qty": 12, "uom": "CS", "lookup_sources": [], "llm_result": {}}
+
+
+class TestEnrichment:
+    def test_lookups_run_off_the_calling_thread(self):
+        agent = _FakeAgent()
+        messages: list[str] = []
+        queries = {"q1": {"item_description": "Trash bags"}, "q2": {"item_description": "Paper towels"}}
+        result = _run_lookups(queries, agent, messages.append)  # type: ignore[arg-type]
+        assert set(result) == {"q1", "q2"}
+        assert sorted(agent.calls) == ["Paper towels", "Trash bags"]
+        assert threading.current_thread().name not in agent.threads
+        assert len(messages) == 2
+
+    def test_lookup_fills_missing_pack(self, tmp_path: Path):
+        raw = {"item_description": "Heavy duty trash bags", "quantity": 2, "unit_price": 24.0, "uom_raw": "CS"}
+        item, uom_result, query_key = _prepare_item(raw, "Grainger")
+        assert query_key
+        events = pipeline.DebugWriter(tmp_path / "x.debug.ndjson")
+        lookup = {"pack_qty": 12, "uom": "CS", "lookup_sources": [], "llm_result": {}}
+        out = _finish_item(item, uom_result, lookup, events)
+        events.close()
+        assert out["detected_pack_quantity"] == 12
+        assert out["price_per_base_unit"] == 2.0
+        lines = (tmp_path / "x.debug.ndjson").read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["event"] for line in lines] == ["price_computation", "confidence_breakdown"]
+
+
+class TestPipelineBatch:
+    def test_results_in_input_order_and_failures_isolated(self, tmp_path: Path, monkeypatch):
+        monkeypatch.setattr(pipeline.config, "MANIFEST_FILE", tmp_path / "manifest.json")
+        pdfs = []
+        for name in ("a", "b", "c"):
+            pdf = tmp_path / f"{name}.pdf"
+            pdf.write_bytes(name.encode())
+            pdfs.append(pdf)
+        pdfs.insert(0, tmp_path / "missing.pdf")  # stat() fails before any stage
+
+        def fake_extract(job):
+            if job.pdf_path.stem == "b":
+                raise RuntimeError("boom")
+            job.status("extracting")
+
+        def fake_enrich(job):
+            job.output = {"file": job.pdf_path.name}
+            job.done = True
+
+        monkeypatch.setattr(pipeline, "_STAGES", (fake_extract, lambda job: None, fake_enrich))
+        messages: list[tuple[str, str]] = []
+        results = list(pipeline.pipeline_batch(
+            pdfs, tmp_path / "out", tmp_path / "failed",
+            status_cb=lambda pdf, msg: messages.append((pdf.stem, msg)),
+        ))
+        assert [(p.stem, r) for p, r in results] == [
+            ("missing", None), ("a", {"file": "a.pdf"}), ("b", None), ("c", {"file": "c.pdf"}),
+        ]
+        assert (tmp_path / "failed" / "b.error.json").exists()
+        assert (tmp_path / "failed" / "missing.error.json").exists()
+        assert sorted(messages) == [("a", "extracting"), ("c", "extracting")]
+
+
+class TestManifest:
+    def test_entries_buffered_until_flush_and_merged(self, tmp_path: Path, monkeypatch):
+        manifest_file = tmp_path / "manifest.json"
+        monkeypatch.setattr(pipeline.config, "MANIFEST_FILE", manifest_file)
+        pdf = tmp_path / "a.pdf"
+        pdf.write_bytes(b"a")
+
+        pipeline.mark_processed(pdf)
+        assert not manifest_file.exists()
+        assert pipeline._load_manifest()["a"]["hash"] == pipeline._file_hash(pdf)
+
+        # Written by another process in the meantime
+        manifest_file.write_text(json.dumps({"other": "x"}), encoding="utf-8")
+        pipeline.flush_manifest()
+        assert set(json.loads(manifest_file.read_text(encoding="utf-8"))) == {"a", "other"}
+
+    def test_unchanged_stat_skips_without_hashing(self, tmp_path: Path, monkeypatch):
+        monkeypatch.setattr(pipeline.config, "MANIFEST_FILE", tmp_path / "manifest.json")
+        pdf = tmp_path / "a.pdf"
+        pdf.write_bytes(b"a")
+        pipeline.mark_processed(pdf)
+
+        def no_hash(path):
+            raise AssertionError("hashed an unchanged file")
+
+        monkeypatch.setattr(pipeline, "_file_hash", no_hash)
+        assert pipeline.process_pdf(pdf, tmp_path / "out", tmp_path / "failed") is None
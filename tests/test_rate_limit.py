@@ -0,0 +1,63 @@
+"""Tests for invoice_uom.rate_limit – LLM token bucket and per-host lookup throttling."""
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+from invoice_uom.rate_limit import RateLimiter, SlidingWindowLimiter, host_limiter
+
+
+class TestRateLimiter:
+    def test_waits_for_the_token_deficit(self, tmp_path: Path):
+        limiter = RateLimiter(rpm=600, rpd=100, counter_file=tmp_path / "counter.json")
+        limiter._tokens = 0.0
+        start = time.monotonic()
+        assert limiter.acquire(timeout=5)
+        assert 0.05 <= time.monotonic() - start < 1.0
+
+    def test_counter_written_behind_and_daily_cap(self, tmp_path: Path):
+        counter = tmp_path / "counter.json"
+        limiter = RateLimiter(rpm=60, rpd=3, counter_file=counter)
+        assert limiter.acquire()
+        assert not counter.exists()  # ordinary calls are written behind
+        limiter.flush()
+        assert json.loads(counter.read_text(encoding="utf-8"))["count"] == 1
+        assert limiter.acquire() and limiter.acquire()
+        # Reaching the cap is persisted straight away, without a flush().
+        assert json.loads(counter.read_text(encoding="utf-8"))["count"] == 3
+        assert not limiter.acquire()
+        assert RateLimiter(rpm=60, rpd=3, counter_file=counter).daily_remaining == 0
+        assert list(tmp_path.iterdir()) == [counter]
+
+    def test_day_rollover_is_persisted_immediately(self, tmp_path: Path):
+        counter = tmp_path / "counter.json"
+        counter.write_text(json.dumps({"date": "2000-01-01", "count": 7}), encoding="utf-8")
+        limiter = RateLimiter(rpm=60, rpd=10, counter_file=counter)
+        limiter._today = "2000-01-01"  # as if the process started yesterday
+        assert limiter.daily_remaining == 10
+        assert json.loads(counter.read_text(encoding="utf-8"))["count"] == 0
+
+    def test_fork_child_gets_fresh_flusher_and_locks(self, tmp_path: Path):
+        limiter = RateLimiter(rpm=60, rpd=10, counter_file=tmp_path / "counter.json")
+        assert limiter.acquire()
+        assert limiter._flusher is not None
+        limiter._lock.acquire()  # held by some other thread at fork time
+        limiter._after_fork_in_child()
+        assert limiter._flusher is None
+        assert limiter.acquire()
+        assert limiter._flusher is not None
+
+
+class TestSlidingWindowLimiter:
+    def test_blocks_once_window_is_full(self):
+        limiter = SlidingWindowLimiter(max_requests=2, window=0.2)
+        start = time.monotonic()
+        for _ in range(3):
+            limiter.acquire()
+        assert time.monotonic() - start >= 0.19
+
+    def test_one_limiter_per_host(self):
+        assert host_limiter("https://Example.com/a") is host_limiter("https://example.com/b")
+        assert host_limiter("https://example.com/") is not host_limiter("https://other.example/")
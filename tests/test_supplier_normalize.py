@@ -0,0 +1,49 @@
+"""Tests for invoice_uom.supplier_normalize – alias and prefix resolution."""
+
+from __future__ import annotations
+
+import pytest
+
+from invoice_uom.supplier_normalize import extract_supplier_candidates, normalise_supplier
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    normalise_supplier.cache_clear()
+    yield
+    normalise_supplier.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("Sysco", "Sysco"),                                   # exact alias
+        ("  us foods ", "US Foods"),                          # case / spacing
+        ("Gala Janitorial Supplies Inc", "Gala Janitorial Supplies"),
+        ("GORDON  FOOD   SERVICE", "Gordon Food Service"),    # longest prefix wins
+        ("Gordon Ramsay", "Gordon Ramsay"),                   # partial prefix only
+        ("", ""),
+    ],
+)
+def test_alias_resolution(raw: str, expected: str, monkeypatch):
+    monkeypatch.setattr("invoice_uom.supplier_normalize._HAS_RAPIDFUZZ", False)
+    assert normalise_supplier(raw) == (raw, expected)
+
+
+def test_candidates_rank_anchors_and_skip_header_noise():
+    blocks = [
+        "## Invoice",
+        "Remit To: PO Box 1",
+        "Phone 555-123-4567",
+        "12/01/2024",
+        "| Qty | Description |",
+        "orders@galasupply.com",
+        "Gala Janitorial Supplies LLC",
+        "Thank you for your business",
+    ]
+    assert extract_supplier_candidates(blocks) == [
+        "Gala Janitorial Supplies LLC",
+        "GALASUPPLY",
+        "orders@galasupply.com",
+        "Thank you for your business",
+    ]
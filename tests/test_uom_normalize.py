@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import re
+
 import pytest
 
 from invoice_uom.uom_normalize import parse_uom_and_pack, normalise_uom_code, _clean_ocr
@@ -27,6 +29,12 @@ class TestCleanOCR:
         cleaned = _clean_ocr("1O")
         assert "10" in cleaned
 
+    def test_fused_fixes_keep_group_references(self):
+        assert _clean_ocr("I2 2O 2l 2S P K 3 e a") == "12 20 21 25 PK3 EA"
+
+    def test_digit_fixes_stay_case_sensitive(self):
+        assert _clean_ocr("2s 2o") == "2s 2o"
+
 
 # ── parse_uom_and_pack parametrised tests ───────────────────────────────────
 
@@ -135,3 +143,55 @@ def test_pack_evidence_text():
     result = parse_uom_and_pack("case of 12")
     assert result.pack_evidence_text is not None
     assert "12" in result.pack_evidence_text
+
+
+# ── memoisation ──────────────────────────────────────────────────────────────
+
+def test_memoised_result_is_shared_and_frozen():
+    import dataclasses
+
+    result = parse_uom_and_pack("100/BX")
+    assert parse_uom_and_pack("100/BX") is result
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        result.detected_pack_quantity = 1  # type: ignore[misc]
+
+
+# ── anchor pre-filter ────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize(
+    "text, screened",
+    [
+        ("Nitrile exam mittens large", False),  # "ea" only inside a word
+        ("Towelette100Ct", True),               # anchor right after digits
+        ("(6 per packaging)", True),            # pack pattern without trailing \b
+        ("widget 3/ft", True),                  # "/" alone is enough
+    ],
+)
+def test_anchor_prefilter(text: str, screened: bool):
+    from invoice_uom.uom_normalize import _UOM_ANCHOR_RE
+
+    assert bool(_UOM_ANCHOR_RE.search(text)) is screened
+
+
+def test_anchor_words_cover_every_pack_pattern_word():
+    from invoice_uom.uom_normalize import _PACK_PATTERNS, _anchor_words
+
+    anchors = _anchor_words()
+    for pat, _, _ in _PACK_PATTERNS:
+        for group in re.findall(r"\(([A-Za-z|]+)\)", pat.pattern):
+            for word in group.upper().split("|"):
+                assert any(word.startswith(a) for a in anchors), word
+
+
+def test_raw_variants_share_cleaned_result():
+    assert parse_uom_and_pack(" 12 /  CASE.") is parse_uom_and_pack("12 / CASE")
+
+
+def test_trie_alternation_prefers_longest_word():
+    from invoice_uom.uom_normalize import _trie_alternation
+
+    pat = re.compile(r"\b(" + _trie_alternation(["CASE", "CASES", "CS", "PACKAGE"]) + r")\b")
+    assert pat.pattern == r"\b((?:C(?:ASE(?:S)?|S)|PACKAGE))\b"
+    assert pat.search("2 CASES").group(1) == "CASES"
+    assert pat.search("CASE of 2").group(1) == "CASE"
+    assert pat.search("PACKAGES") is None
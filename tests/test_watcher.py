@@ -0,0 +1,75 @@
+"""Tests for invoice_uom.watcher – worker queue lifecycle (no watchdog needed)."""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from invoice_uom.watcher import Watcher, _PDFHandler
+
+
+def _watcher(tmp_path: Path, seen: list[Path]) -> Watcher:
+    w = Watcher(tmp_path / "in", tmp_path / "out")
+    # Same wiring as start(), with a fake standing in for the pipeline.
+    w._executor = ThreadPoolExecutor(max_workers=2)
+    w._process_pdf = lambda pdf, out, failed: seen.append(pdf)
+    return w
+
+
+class TestDispatcher:
+    def test_dispatches_queue_and_exits_on_stop(self, tmp_path: Path):
+        seen: list[Path] = []
+        w = _watcher(tmp_path, seen)
+        dispatcher = threading.Thread(target=w._dispatch)
+        dispatcher.start()
+        for name in ("a.pdf", "b.pdf", "c.pdf"):
+            w._queue.put(tmp_path / name)
+        w._queue.join()
+        w.stop()
+        dispatcher.join(timeout=1)
+        assert not dispatcher.is_alive()
+        w._executor.shutdown(wait=True)
+        assert sorted(seen) == [tmp_path / "a.pdf", tmp_path / "b.pdf", tmp_path / "c.pdf"]
+
+    def test_worker_errors_are_logged_not_raised(self, tmp_path: Path, caplog):
+        w = _watcher(tmp_path, [])
+
+        def boom(pdf: Path, out: Path, failed: Path | None) -> None:
+            raise RuntimeError("bad pdf")
+
+        w._process_pdf = boom
+        dispatcher = threading.Thread(target=w._dispatch)
+        dispatcher.start()
+        w._queue.put(tmp_path / "a.pdf")
+        w._queue.join()
+        w.stop()
+        dispatcher.join(timeout=1)
+        w._executor.shutdown(wait=True)
+        assert "Worker error processing" in caplog.text
+
+    def test_stop_is_idempotent(self, tmp_path: Path):
+        w = _watcher(tmp_path, [])
+        w.stop()
+        w.stop()
+        assert w._queue.qsize() == 1
+
+
+class TestHandler:
+    def test_event_burst_enqueues_once(self, tmp_path: Path, monkeypatch):
+        pytest.importorskip("watchdog")
+        monkeypatch.setattr("invoice_uom.watcher._SETTLE_S", 0.05)
+        q: queue.Queue[Path | None] = queue.Queue()
+        handler = _PDFHandler(q)
+        pdf = tmp_path / "a.pdf"
+        for _ in range(3):
+            handler.on_created(SimpleNamespace(src_path=str(pdf), is_directory=False))
+        handler.on_created(SimpleNamespace(src_path=str(tmp_path / "notes.txt"), is_directory=False))
+        time.sleep(0.3)
+        assert q.get_nowait() == pdf
+        assert q.empty()